@@ -2,7 +2,16 @@ import csv
 import os
 import time
 from googlesearch import search
-from requests_html import HTMLSession # HTMLSession을 제대로 임포트
+from html_extractor import extract_article_fields # lxml 단일 패스 추출기 (도메인별 규칙 캐시)
+from url_canonicalizer import dedupe_urls # 추적 파라미터/AMP/http 차이만 다른 중복 URL 제거
+from http_cache import get_shared_response_cache # 디스크 응답 캐시 (ETag/Last-Modified 재검증, 공유 세션 사용)
+from host_health import get_shared_host_health, HostRequestGuard # 호스트별 적응형 동시성/서킷 브레이커
+from html_archive import get_shared_html_archive # 원본 HTML 보관소 (오프라인 전처리 재실행용)
+
+RESPONSE_CACHE_PARSER_NAME = "aljazeera_crawler_v2" # 캐시에 저장되는 파싱 결과의 이름 (추출 규칙이 바뀌면 버전 변경)
+ARCHIVE_RAW_HTML = True # True면 받은 기사 HTML을 html_archive/에 보관
+ARCHIVE_CRAWLER_NAME = "aljazeera_crawler" # 보관소에 기록되는 크롤러 이름 (재처리 시 파서 선택에 사용)
+ARTICLE_REQUEST_TIMEOUT_SECONDS = 20 # 기사 다운로드 최대 타임아웃 (응답이 빠른 호스트는 host_health가 더 짧게 조정)
 
 # --- 함수 정의 ---
 def search_google_for_urls(query, num_to_fetch=5, language='en'): # 기본 언어를 'en'으로 설정
@@ -14,17 +23,35 @@ def search_google_for_urls(query, num_to_fetch=5, language='en'): # 기본 언
         # 여기서는 num_results를 내부적으로 num으로 매핑하거나, 라이브러리가 이를 지원한다고 가정
         # 또는, 가장 기본적인 search(query, lang=language)만 사용하고 결과 수를 라이브러리 기본값에 맡길 수도 있음
         # 여기서는 num_results를 그대로 사용하되, 라이브러리가 이를 num으로 이해한다고 가정
-        search_results_urls = list(search(query, lang=language, num_results=num_to_fetch))
+        search_results_urls = dedupe_urls(search(query, lang=language, num_results=num_to_fetch))
         print(f"Found {len(search_results_urls)} URLs.")
         return search_results_urls
     except Exception as e:
         print(f"Error during Google search for '{query}': {e}")
         return []
 
+def parse_article_html(url, html_text):
+    """이미 받은 HTML에서 제목, 발행일, 본문을 추출하여 딕셔너리로 반환합니다 (네트워크 사용 안 함)."""
+    article_data = {
+        "title": "Title not found",
+        "published_date": "Published date not found",
+        "url": url,
+        "body": "Body not found"
+    }
+    # HTML을 한 번만 파싱하고, 제목/발행일/본문 선택자 규칙을 한 번의 트리 순회로 평가
+    # (규칙 목록과 도메인별 덮어쓰기는 html_extractor.py의 DEFAULT_EXTRACTION_RULES / DOMAIN_EXTRACTION_RULES)
+    title, published_date, body = extract_article_fields(html_text, url)
+    if title is not None:
+        article_data["title"] = title
+    if published_date is not None:
+        article_data["published_date"] = published_date
+    if body:
+        article_data["body"] = body
+    return article_data
+
 def crawl_article_data(url_to_crawl):
     """주어진 URL에서 뉴스 기사의 제목, 발행일, 본문을 크롤링하고 딕셔너리로 반환합니다."""
     print(f"\nAttempting to crawl: {url_to_crawl}")
-    session = HTMLSession() # 각 크롤링마다 새 세션 사용
     article_data = {
         "title": "Title not found",
         "published_date": "Published date not found",
@@ -32,79 +59,32 @@ def crawl_article_data(url_to_crawl):
         "body": "Body not found"
     }
     try:
-        response = session.get(url_to_crawl, timeout=20) # 타임아웃 증가
-        response.raise_for_status() # HTTP 오류 시 예외 발생
-
-        # 제목 추출 (더 많은 일반적인 경우 고려)
-        title_selectors = ['h1', 'header h1', 'h2.article-title', 'h1.entry-title'] # 다양한 선택지
-        for selector in title_selectors:
-            title_element = response.html.find(selector, first=True)
-            if title_element:
-                article_data["title"] = title_element.text.strip()
-                break
-        
-        # 발행일 추출 (더 많은 메타 태그 및 일반적인 패턴 고려)
-        date_selectors_meta = [
-            'meta[property="article:published_time"]',
-            'meta[name="pubdate"]',
-            'meta[name="creation_date"]',
-            'meta[name="cXenseParse:recs:publishtime"]',
-            'meta[name="dcterms.created"]',
-            'meta[name="date"]'
-        ]
-        date_found = False
-        for selector in date_selectors_meta:
-            meta_date_element = response.html.find(selector, first=True)
-            if meta_date_element and 'content' in meta_date_element.attrs and meta_date_element.attrs['content']:
-                article_data["published_date"] = meta_date_element.attrs['content'].strip()
-                date_found = True
-                break
-        
-        if not date_found: # 화면에 보이는 날짜 시도 (더 일반적인 선택자)
-            # time 태그는 datetime 속성을 가질 가능성이 높음
-            time_element = response.html.find('time', first=True)
-            if time_element and time_element.attrs.get('datetime'):
-                article_data["published_date"] = time_element.attrs['datetime'].strip()
-            elif time_element: # datetime 속성이 없으면 텍스트라도
-                 article_data["published_date"] = time_element.text.strip()
-            else: # 그 외 일반적인 클래스명 시도
-                date_display_elements = response.html.find('span[class*="date"], div[class*="date"], p[class*="date"]', first=True)
-                if date_display_elements:
-                    article_data["published_date"] = date_display_elements.text.strip()
-
-        # 본문 내용 추출 (더 많은 일반적인 컨테이너 및 <p> 태그 조합)
-        article_body_parts = []
-        content_selectors = ['article', 'main', 'div.story-content', 'div.article-content', 
-                             'div.entry-content', 'div.post-content', 'div.content', 'div.body', 
-                             'section[class*="article-body"]']
-        
-        content_container = None
-        for selector in content_selectors:
-            content_container = response.html.find(selector, first=True)
-            if content_container:
-                break
-        
-        if content_container: # 특정 컨테이너를 찾았으면 그 안의 p 태그
-            paragraph_elements = content_container.find('p')
-        else: # 못 찾았으면 전체 문서에서 p 태그 (최후의 수단)
-            paragraph_elements = response.html.find('p')
-
-        if paragraph_elements:
-            for p_element in paragraph_elements:
-                # 짧은 p 태그 (예: 캡션, 광고 링크 등)는 제외하는 로직 추가 가능
-                if len(p_element.text.strip()) > 50 : # 예: 50자 이상인 문단만 포함
-                    article_body_parts.append(p_element.text.strip())
-        
-        if article_body_parts:
-            article_data["body"] = "\n".join(article_body_parts)
-        
+        response_cache = get_shared_response_cache()
+        host_health = get_shared_host_health() # 서킷이 열렸거나 슬롯 대기가 초과된 호스트는 요청하지 않고 예외 발생
+        request_guard = HostRequestGuard(host_health, url_to_crawl)
+        try:
+            fetched = response_cache.fetch(url_to_crawl, timeout=host_health.timeout_for(url_to_crawl, ARTICLE_REQUEST_TIMEOUT_SECONDS),
+                                           parser=RESPONSE_CACHE_PARSER_NAME,
+                                           before_network_request=request_guard.before_network_request) # HTTP 오류 시 예외 발생
+        except Exception as fetch_error:
+            request_guard.finish(fetch_error)
+            raise
+        request_guard.finish()
+        if ARCHIVE_RAW_HTML:
+            try:
+                get_shared_html_archive().put(url_to_crawl, fetched.text, crawler=ARCHIVE_CRAWLER_NAME)
+            except Exception as archive_error:
+                print(f"Warning: Could not archive raw HTML for {url_to_crawl}: {archive_error}")
+        if fetched.from_cache and fetched.parsed: # 바뀌지 않은 페이지: 다운로드와 파싱 모두 생략
+            print(f"Cache hit ({fetched.status}) for {url_to_crawl}, skipping parse.")
+            return dict(fetched.parsed, url=url_to_crawl)
+        article_data = parse_article_html(url_to_crawl, fetched.text)
         print(f"Crawling for '{article_data['title'][:30]}...' completed.")
+        response_cache.store_parsed(url_to_crawl, RESPONSE_CACHE_PARSER_NAME, article_data)
 
     except Exception as e:
         print(f"Error crawling {url_to_crawl}: {e}")
-    finally:
-        session.close() # 세션 종료
-        return article_data
+    return article_data
 
 def run_news_collection_pipeline(search_query, csv_filename="crawled_news.csv", num_articles_per_query=5):
     """주어진 검색어로 뉴스를 크롤링하고 지정된 CSV 파일에 추가(append)합니다."""
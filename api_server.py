@@ -1,7 +1,10 @@
 import os
 from flask import Flask, jsonify, request
 from flask_cors import CORS # 다른 도메인에서의 요청 허용
-from supabase import create_client, Client # Supabase 클라이언트
+from resource_registry import register_resource, warm_up # Supabase 클라이언트 지연 생성 (임포트 시 연결하지 않음)
+from news_replica import get_news_replica # news_articles 로컬 읽기 복제본 (SQLite + FTS5)
+from response_cache import ResponseCache # /api/news 응답 캐시 (LRU + TTL, stale-while-revalidate)
+from feed_cursor import encode_feed_cursor, decode_feed_cursor, keyset_postgrest_filter, StaleFeedCursorError # 커서(keyset) 페이지네이션
 from dotenv import load_dotenv # .env 파일 로드
 from datetime import datetime, timezone # 날짜/시간 객체 및 UTC
 import pandas as pd # 날짜 파싱 등에 간혹 유용하게 사용
@@ -21,18 +24,36 @@ CORS(app)
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY") # .env 파일에서 가져옴 (service_role 키 권장)
 NEWS_TABLE_NAME_IN_DB = "news_articles" # Supabase에 생성한 테이블 이름
+SERVE_FROM_NEWS_REPLICA = True # True면 파이프라인이 유지하는 로컬 복제본(news_replica.sqlite3)에서 먼저 조회
+MAX_NEWS_ITEMS_PER_PAGE = 100 # 한 요청의 최대 limit
+NEWS_TOTAL_COUNT_MODE = "estimated" # Supabase 전체 개수: 'exact'(정확, 큰 테이블에서 느림) / 'estimated'(작으면 정확, 크면 추정) / 'planned'(추정)
 
-supabase_client: Client = None
-if SUPABASE_URL and SUPABASE_KEY:
+# --- 응답 캐시 설정 ---
+# 데이터는 파이프라인 실행 때만 바뀌므로 응답을 메모리에 캐시하고, 파이프라인이 저장 후 갱신하는 세대 파일로 무효화합니다.
+USE_NEWS_RESPONSE_CACHE = True
+NEWS_CACHE_WARM_PAGES = 2     # 서버 시작 시 미리 캐시할 필터 없는 페이지 수
+NEWS_CACHE_WARM_PER_PAGE = 10 # script.js의 NEWS_ITEMS_PER_PAGE와 맞춤
+news_response_cache = ResponseCache()
+news_count_cache = ResponseCache(max_entries=256) # (date, keyword, country) -> 전체 개수
+
+def _create_supabase_client():
+    if not (SUPABASE_URL and SUPABASE_KEY):
+        print("API Server FATAL ERROR: Supabase URL or SERVICE_ROLE Key not found in .env file. API cannot function.")
+        return None # 실제 운영 시에는 여기서 서버가 시작되지 않도록 처리할 수도 있음
     try:
-        supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        from supabase import create_client # 패키지 임포트가 느리므로 처음 연결할 때 임포트
+        client = create_client(SUPABASE_URL, SUPABASE_KEY)
         print("Successfully connected to Supabase for API server.")
+        return client
     except Exception as e:
         print(f"Error connecting to Supabase for API server: {e}")
-        # supabase_client는 None으로 유지되어 API 호출 시 에러 반환됨
-else:
-    print("API Server FATAL ERROR: Supabase URL or SERVICE_ROLE Key not found in .env file. API cannot function.")
-    # 실제 운영 시에는 여기서 서버가 시작되지 않도록 처리할 수도 있음
+        return None # API 호출 시 에러 반환됨
+
+_supabase_client_resource = register_resource("api_supabase_client", _create_supabase_client) # 이름은 모듈별로 다르게 (run_pipeline의 클라이언트와 설정/로그가 다름)
+
+def get_supabase_client():
+    """Supabase 클라이언트를 반환합니다 (처음 요청 또는 warm_up 시 생성, 실패 시 None)."""
+    return _supabase_client_resource.get()
 
 # --- 시간대 설정 (미국 동부 시간) ---
 US_EASTERN_TIMEZONE_STR = 'America/New_York'
@@ -75,88 +96,261 @@ def format_news_item_for_frontend(db_news_item):
         "title": str(db_news_item.get('title', 'Untitled News')),
         "link": str(db_news_item.get('url', '#')),
         "description": str(db_news_item.get('body', 'No description available.')), # DB의 'body' 컬럼 (요약본)
-        "relevance_score": float(db_news_item.get('relevance_score', 0.0)),
+        "relevance_score": float(db_news_item.get('relevance_score') or 0.0), # NULL 점수는 0으로
         "image_url": str(db_news_item.get('image_url', '')), # 이미지 URL
         "location": str(db_news_item.get('country_iso_code', '')) # 국가 ISO 코드 (프론트엔드에서는 'location' 키로 사용 가능)
     }
 
+# --- 피드 조회: 로컬 복제본 -> Supabase 폴백 ---
+def get_ready_news_replica():
+    """동기화를 마친 로컬 읽기 복제본(news_replica.sqlite3)을 반환합니다. 쓸 수 없으면 None (Supabase로 폴백)."""
+    if not SERVE_FROM_NEWS_REPLICA:
+        return None
+    news_replica = get_news_replica()
+    try:
+        if news_replica is None or not news_replica.is_ready():
+            return None
+        return news_replica
+    except Exception as e:
+        print(f"API Warning: Local news replica is not usable, falling back to Supabase: {e}")
+        return None
+
+def apply_supabase_feed_filters(query_builder, date_filter, keyword_filter, country_iso_filter, after=None):
+    """날짜/키워드/국가 필터와 (있으면) 커서 조건을 Supabase 쿼리 빌더에 적용합니다."""
+    if date_filter:
+        # Supabase DB의 'published_date' 컬럼이 TIMESTAMPTZ (UTC로 저장)라고 가정
+        # 해당 날짜의 UTC 시작(00:00:00Z)과 끝(23:59:59.999999Z)으로 범위 검색
+        try:
+            # 날짜 문자열 유효성 검사 (간단하게)
+            datetime.strptime(date_filter, '%Y-%m-%d') 
+            start_utc_str = f"{date_filter}T00:00:00Z"
+            end_utc_str = f"{date_filter}T23:59:59.999999Z"
+            query_builder = query_builder.gte('published_date', start_utc_str)
+            query_builder = query_builder.lte('published_date', end_utc_str)
+            print(f"API: Applying date filter for (UTC): {start_utc_str} to {end_utc_str}")
+        except ValueError:
+            print(f"API Warning: Invalid date format for filter: '{date_filter}'. Ignoring date filter.")
+    
+    # 키워드와 커서 조건은 둘 다 or 논리 필터이므로 함께 있으면 하나의 and(...)로 묶어서 적용
+    logic_filters = []
+    if keyword_filter and keyword_filter.strip():
+        # PostgreSQL의 ilike (대소문자 무시) 또는 더 강력한 Full-Text Search (fts) 사용
+        # 여기서는 title 또는 body에 키워드가 포함된 경우 (간단한 형태)
+        search_pattern = f"%{keyword_filter.strip()}%"
+        logic_filters.append(f"or(title.ilike.{search_pattern},body.ilike.{search_pattern})")
+        print(f"API: Applying keyword filter: '{keyword_filter.strip()}'")
+    if after is not None:
+        logic_filters.append(keyset_postgrest_filter(after))
+    if logic_filters:
+        query_builder = query_builder.or_(logic_filters[0] if len(logic_filters) == 1 else f"and({','.join(logic_filters)})")
+        
+    if country_iso_filter and country_iso_filter.strip():
+        # 국가 ISO 코드로 필터링 (DB에는 대문자로 저장되어 있다고 가정)
+        query_builder = query_builder.eq('country_iso_code', country_iso_filter.strip().upper())
+        print(f"API: Applying country ISO code filter: '{country_iso_filter.strip().upper()}'")
+    return query_builder
+
+def resolve_cursor_id_in_supabase(supabase_client, after):
+    """
+    로컬 복제본 행으로 만든 커서는 id가 비어 있을 수 있으므로, Supabase에서 이어 읽기 전에 url(UNIQUE)로 그 행의 id를 채웁니다.
+    행이 지워져 찾을 수 없으면 StaleFeedCursorError.
+    """
+    if after is None or after['id'] is not None or not after.get('url'):
+        return after
+    response = supabase_client.table(NEWS_TABLE_NAME_IN_DB).select("id").eq("url", after['url']).limit(1).execute()
+    if getattr(response, 'error', None):
+        raise RuntimeError(str(response.error))
+    if not response.data or response.data[0].get('id') is None:
+        raise StaleFeedCursorError("The article this cursor points to no longer exists. Request the first page without a cursor.")
+    return {**after, 'id': response.data[0]['id']}
+
+def query_news_from_supabase(supabase_client, limit, date_filter, keyword_filter, country_iso_filter, offset=0, after=None):
+    """Supabase에서 피드 행 목록을 조회합니다. after(커서)가 있으면 OFFSET 대신 커서 조건으로 이어서 읽습니다."""
+    after = resolve_cursor_id_in_supabase(supabase_client, after)
+    # Supabase 쿼리 빌더 시작 (전체 개수는 필요할 때만 count_news_in_supabase로 따로 조회)
+    query_builder = supabase_client.table(NEWS_TABLE_NAME_IN_DB).select(
+        "id, title, published_date, url, body, relevance_score, image_url, country_iso_code" # 필요한 모든 컬럼 명시
+    )
+    query_builder = apply_supabase_feed_filters(query_builder, date_filter, keyword_filter, country_iso_filter, after)
+
+    # 정렬: 1순위 관련도 점수 (높은 순), 2순위 발행일 (최신 순), 3순위 id (커서가 가리키는 위치를 유일하게 만듦)
+    # nulls_last=True: null 값을 가진 필드를 정렬 시 마지막으로 보냄
+    query_builder = query_builder.order('relevance_score', desc=True, nulls_last=True)
+    query_builder = query_builder.order('published_date', desc=True, nulls_last=True)
+    query_builder = query_builder.order('id', desc=True, nulls_last=True)
+    
+    # 페이징 적용 (커서 조회는 offset이 항상 0)
+    query_builder = query_builder.range(offset, offset + limit - 1)
+
+    # 쿼리 실행
+    response = query_builder.execute()
+    if getattr(response, 'error', None):
+        raise RuntimeError(str(response.error))
+    return response.data or []
+
+def count_news_in_supabase(supabase_client, date_filter, keyword_filter, country_iso_filter):
+    """필터에 맞는 행 수 (NEWS_TOTAL_COUNT_MODE에 따라 정확한 값 또는 추정치)."""
+    query_builder = supabase_client.table(NEWS_TABLE_NAME_IN_DB).select("id", count=NEWS_TOTAL_COUNT_MODE)
+    query_builder = apply_supabase_feed_filters(query_builder, date_filter, keyword_filter, country_iso_filter)
+    response = query_builder.limit(1).execute()
+    if getattr(response, 'error', None):
+        raise RuntimeError(str(response.error))
+    return response.count
+
+def fetch_news_rows(limit, date_filter, keyword_filter, country_iso_filter, offset=0, after=None):
+    """피드 행 목록을 로컬 복제본(가능하면) 또는 Supabase에서 조회합니다. DB를 쓸 수 없으면 None."""
+    news_replica = get_ready_news_replica()
+    if news_replica is not None:
+        try:
+            return news_replica.query_feed(limit, date_filter, keyword_filter, country_iso_filter, offset=offset, after=after)
+        except Exception as e:
+            print(f"API Warning: Local news replica query failed, falling back to Supabase: {e}")
+    supabase_client = get_supabase_client()
+    if not supabase_client:
+        return None
+    return query_news_from_supabase(supabase_client, limit, date_filter, keyword_filter, country_iso_filter, offset, after)
+
+def count_news_rows(date_filter, keyword_filter, country_iso_filter):
+    """필터에 맞는 전체 행 수. 조회 결과는 필터별로 news_count_cache에 캐시됩니다."""
+    def load_count():
+        news_replica = get_ready_news_replica()
+        if news_replica is not None:
+            try:
+                return news_replica.count_feed(date_filter, keyword_filter, country_iso_filter), True
+            except Exception as e:
+                print(f"API Warning: Local news replica count failed, falling back to Supabase: {e}")
+        supabase_client = get_supabase_client()
+        if not supabase_client:
+            return None, False
+        return count_news_in_supabase(supabase_client, date_filter, keyword_filter, country_iso_filter), True
+    total_count, _ = news_count_cache.get_or_load((date_filter, keyword_filter, country_iso_filter), load_count)
+    return total_count
+
+def build_news_feed_payload(page, per_page, date_filter, keyword_filter, country_iso_filter, cursor=None, include_count=True):
+    """
+    피드 응답 본문(dict)과 HTTP 상태 코드를 만듭니다. cursor가 있으면 그 위치부터 keyset으로, 없으면 page로 (OFFSET) 읽습니다.
+    요청 컨텍스트를 사용하지 않으므로 캐시의 백그라운드 갱신에서도 호출할 수 있습니다.
+    """
+    after = decode_feed_cursor(cursor) if cursor else None
+    offset = 0 if after is not None else (page - 1) * per_page
+    try:
+        # 한 행을 더 읽어 다음 페이지가 있는지 확인 (개수를 세지 않아도 '다음' 버튼 상태를 알 수 있음)
+        news_rows = fetch_news_rows(per_page + 1, date_filter, keyword_filter, country_iso_filter, offset, after)
+    except StaleFeedCursorError as e:
+        return {"error": "Invalid cursor.", "details": str(e)}, 400
+    except Exception as e:
+        print(f"Supabase API query error: {e}")
+        return {"error": "Failed to retrieve news data from database.", "details": str(e)}, 500
+    if news_rows is None:
+        return {"error": "Database connection not available. Please check server logs."}, 500
+
+    has_more = len(news_rows) > per_page
+    news_rows = news_rows[:per_page]
+    total_items_count = None
+    if include_count:
+        try:
+            total_items_count = count_news_rows(date_filter, keyword_filter, country_iso_filter)
+        except Exception as e:
+            print(f"API Warning: Could not count news items, omitting total_count: {e}")
+    return {
+        "news": [format_news_item_for_frontend(item) for item in news_rows],
+        "total_count": total_items_count, # include_count가 거짓이거나 개수 조회 실패 시 None
+        "page": page,
+        "per_page": per_page,
+        "has_more": has_more,
+        "next_cursor": encode_feed_cursor(news_rows[-1]) if has_more else None # 다음 페이지 요청 시 cursor로 전달
+    }, 200
+
+# --- 응답 캐시 ---
+def normalize_news_query(page, per_page, date_filter, keyword_filter, country_iso_filter, cursor=None, include_count=None):
+    """
+    요청 파라미터를 캐시 키로 쓸 수 있게 정규화합니다. 결과가 같은 요청은 같은 키가 됩니다
+    (키워드는 대소문자 무시 검색이므로 소문자로, 국가 코드는 대문자로, 빈 값과 잘못된 날짜는 None으로).
+    include_count가 None이면 커서 없는 요청(첫 페이지 또는 page 방식)만 전체 개수를 포함합니다.
+    """
+    date_filter = (date_filter or "").strip() or None
+    if date_filter:
+        try:
+            datetime.strptime(date_filter, '%Y-%m-%d')
+        except ValueError:
+            print(f"API Warning: Invalid date format for filter: '{date_filter}'. Ignoring date filter.")
+            date_filter = None
+    keyword_filter = (keyword_filter or "").strip().lower() or None
+    country_iso_filter = (country_iso_filter or "").strip().upper() or None
+    cursor = (cursor or "").strip() or None
+    if include_count is None:
+        include_count = cursor is None
+    return (page, per_page, date_filter, keyword_filter, country_iso_filter, cursor, bool(include_count))
+
+def get_cached_news_feed_payload(page, per_page, date_filter, keyword_filter, country_iso_filter, cursor=None, include_count=None):
+    """캐시를 거쳐 (응답 본문, 상태 코드, 캐시 상태)를 반환합니다. 캐시를 끄면 캐시 상태는 'bypass'."""
+    query_key = normalize_news_query(page, per_page, date_filter, keyword_filter, country_iso_filter, cursor, include_count)
+    if not USE_NEWS_RESPONSE_CACHE:
+        return (*build_news_feed_payload(*query_key), 'bypass')
+
+    def load_payload():
+        payload, status_code = build_news_feed_payload(*query_key)
+        return (payload, status_code), status_code == 200 # 오류 응답은 캐시하지 않음
+    (payload, status_code), cache_status = news_response_cache.get_or_load(query_key, load_payload)
+    return payload, status_code, cache_status
+
+def warm_news_feed_cache(pages=NEWS_CACHE_WARM_PAGES, per_page=NEWS_CACHE_WARM_PER_PAGE):
+    """
+    필터 없는 첫 페이지들을 프론트엔드와 같은 방식(다음 페이지는 next_cursor)으로 미리 캐시에 올려
+    서버 시작 직후 요청도 DB를 기다리지 않게 합니다.
+    """
+    cursor = None
+    for page in range(1, pages + 1):
+        try:
+            payload, status_code, _ = get_cached_news_feed_payload(page, per_page, None, None, None, cursor)
+        except Exception as e:
+            print(f"Warning: Could not warm news feed cache (page {page}): {e}")
+            return
+        cursor = payload.get("next_cursor") if status_code == 200 else None
+        if not cursor:
+            return
+
+def parse_bool_arg(value):
+    """'1'/'true'/'yes'/'on'은 True, '0'/'false'/'no'/'off'는 False, 없으면 None."""
+    if value is None:
+        return None
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
 # --- API 엔드포인트 정의: /api/news ---
 @app.route('/api/news', methods=['GET'])
 def get_news_feed_data():
-    """뉴스 데이터를 조회하여 JSON 형태로 반환합니다. 페이징, 날짜/키워드/국가 필터링 지원."""
-    if not supabase_client:
-        return jsonify({"error": "Database connection not available. Please check server logs."}), 500
-
+    """
+    뉴스 데이터를 조회하여 JSON 형태로 반환합니다. 페이징, 날짜/키워드/국가 필터링 지원.
+    응답의 next_cursor를 다음 요청의 cursor로 넘기면 keyset 방식으로 이어서 읽습니다 (깊은 페이지도 첫 페이지와 같은 비용).
+    total_count는 include_count=1일 때 (커서 없는 요청은 기본값) 포함되며 필터별로 캐시됩니다.
+    같은 (정규화된) 조건의 응답은 news_response_cache에서 재사용합니다.
+    """
     try:
         # 요청 파라미터 가져오기 (프론트엔드 script.js와 일치)
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('limit', 10, type=int) # script.js의 NEWS_ITEMS_PER_PAGE와 맞춤
-        offset = (page - 1) * per_page
+        if page < 1 or not 1 <= per_page <= MAX_NEWS_ITEMS_PER_PAGE:
+            return jsonify({"error": f"'page' must be >= 1 and 'limit' between 1 and {MAX_NEWS_ITEMS_PER_PAGE}."}), 400
         
         date_filter = request.args.get('date')           # 형식: YYYY-MM-DD
         keyword_filter = request.args.get('keyword')     # 검색할 키워드 문자열
         country_iso_filter = request.args.get('country_iso') # 필터링할 국가의 ISO A2 코드
+        cursor = request.args.get('cursor')              # 이전 응답의 next_cursor
+        include_count = parse_bool_arg(request.args.get('include_count'))
 
-        # Supabase 쿼리 빌더 시작
-        query_builder = supabase_client.table(NEWS_TABLE_NAME_IN_DB).select(
-            "id, title, published_date, url, body, relevance_score, image_url, country_iso_code", # 필요한 모든 컬럼 명시
-            count="exact" # 전체 결과 수를 함께 가져옴 (페이징용)
-        )
-
-        # 필터 적용
-        if date_filter:
-            # Supabase DB의 'published_date' 컬럼이 TIMESTAMPTZ (UTC로 저장)라고 가정
-            # 해당 날짜의 UTC 시작(00:00:00Z)과 끝(23:59:59.999999Z)으로 범위 검색
+        if cursor:
             try:
-                # 날짜 문자열 유효성 검사 (간단하게)
-                datetime.strptime(date_filter, '%Y-%m-%d') 
-                start_utc_str = f"{date_filter}T00:00:00Z"
-                end_utc_str = f"{date_filter}T23:59:59.999999Z"
-                query_builder = query_builder.gte('published_date', start_utc_str)
-                query_builder = query_builder.lte('published_date', end_utc_str)
-                print(f"API: Applying date filter for (UTC): {start_utc_str} to {end_utc_str}")
-            except ValueError:
-                print(f"API Warning: Invalid date format for filter: '{date_filter}'. Ignoring date filter.")
-        
-        if keyword_filter and keyword_filter.strip():
-            # PostgreSQL의 ilike (대소문자 무시) 또는 더 강력한 Full-Text Search (fts) 사용
-            # 여기서는 title 또는 body에 키워드가 포함된 경우 (간단한 형태)
-            search_pattern = f"%{keyword_filter.strip()}%"
-            query_builder = query_builder.or_(f"title.ilike.{search_pattern},body.ilike.{search_pattern}")
-            print(f"API: Applying keyword filter: '{keyword_filter.strip()}'")
-            
-        if country_iso_filter and country_iso_filter.strip():
-            # 국가 ISO 코드로 필터링 (DB에는 대문자로 저장되어 있다고 가정)
-            query_builder = query_builder.eq('country_iso_code', country_iso_filter.strip().upper())
-            print(f"API: Applying country ISO code filter: '{country_iso_filter.strip().upper()}'")
-
-        # 정렬: 1순위 관련도 점수 (높은 순), 2순위 발행일 (최신 순)
-        # nulls_last=True: null 값을 가진 필드를 정렬 시 마지막으로 보냄
-        query_builder = query_builder.order('relevance_score', desc=True, nulls_last=True)
-        query_builder = query_builder.order('published_date', desc=True, nulls_last=True)
-        
-        # 페이징 적용
-        query_builder = query_builder.range(offset, offset + per_page - 1)
-
-        # 쿼리 실행
-        response = query_builder.execute()
+                decode_feed_cursor(cursor.strip())
+            except ValueError as e:
+                return jsonify({"error": "Invalid cursor.", "details": str(e)}), 400
 
-        # 응답 처리
-        if hasattr(response, 'data') and response.data is not None:
-            formatted_news_list = [format_news_item_for_frontend(item) for item in response.data]
-            total_items_count = response.count if hasattr(response, 'count') else len(formatted_news_list)
-            
-            return jsonify({
-                "news": formatted_news_list,
-                "total_count": total_items_count,
-                "page": page,
-                "per_page": per_page
-            })
-        elif hasattr(response, 'error') and response.error:
-            print(f"Supabase API query error: {response.error}")
-            return jsonify({"error": "Failed to retrieve news data from database.", "details": str(response.error)}), 500
-        else: # 데이터가 없는 경우 (정상적일 수 있음)
-            return jsonify({"news": [], "total_count": 0, "page": page, "per_page": per_page})
+        payload, status_code, cache_status = get_cached_news_feed_payload(
+            page, per_page, date_filter, keyword_filter, country_iso_filter, cursor, include_count
+        )
+        response = jsonify(payload)
+        response.status_code = status_code
+        response.headers['X-Cache'] = cache_status.upper() # HIT / STALE / MISS / BYPASS (디버깅용)
+        return response
 
     except Exception as e:
         print(f"API Server Exception in /api/news: {e}")
@@ -165,6 +359,9 @@ def get_news_feed_data():
 
 # --- 서버 실행 (이 파일을 직접 실행할 경우) ---
 if __name__ == '__main__':
+    warm_up("api_supabase_client", "news_replica") # 첫 요청이 연결 생성 시간을 기다리지 않도록 시작 시 미리 연결
+    if USE_NEWS_RESPONSE_CACHE:
+        warm_news_feed_cache()
     # 디버그 모드는 개발 중에만 사용, 프로덕션에서는 False로 설정하고 Gunicorn 등 WSGI 서버 사용
     # host='0.0.0.0'으로 설정하면 로컬 네트워크 내 다른 기기에서도 접속 가능 (개발 시 유용)
     app.run(host='0.0.0.0', port=5001, debug=True) 
@@ -0,0 +1,212 @@
+import json
+import time
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# --- 대량 upsert 설정 ---
+# 레코드를 행 수/JSON 크기 상한이 있는 청크로 나눠 몇 개의 연결로 동시에 보내고, 실패한 청크만 백오프 후 다시 보냅니다.
+# 대량 백필에서도 요청 하나가 페이로드 제한에 걸리거나 한 번의 오류로 전체가 실패하지 않습니다.
+BULK_WRITE_MAX_CHUNK_ROWS = 500               # 청크당 최대 레코드 수
+BULK_WRITE_MAX_CHUNK_BYTES = 1 * 1024 * 1024  # 청크당 최대 JSON 크기 (PostgREST 요청 본문 제한보다 작게)
+BULK_WRITE_MAX_WORKERS = 3                    # 동시에 보내는 청크 수
+BULK_WRITE_MAX_ATTEMPTS = 4                   # 청크당 최대 시도 횟수 (첫 시도 포함)
+BULK_WRITE_BACKOFF_BASE_SECONDS = 1.0         # 재시도 대기: base * 2^(시도-1) + 지터
+BULK_WRITE_BACKOFF_MAX_SECONDS = 30.0
+
+
+def record_json_size(record):
+    return len(json.dumps(record, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def chunk_records(records, max_rows=BULK_WRITE_MAX_CHUNK_ROWS, max_bytes=BULK_WRITE_MAX_CHUNK_BYTES):
+    """레코드 목록을 (레코드 목록, JSON 크기) 청크로 나눕니다. 상한보다 큰 레코드 하나는 단독 청크가 됩니다."""
+    chunks = []
+    current, current_bytes = [], 2 # JSON 배열의 '[]'
+    for record in records:
+        size = record_json_size(record) + 1 # 구분자 ','
+        if current and (len(current) >= max_rows or current_bytes + size > max_bytes):
+            chunks.append((current, current_bytes))
+            current, current_bytes = [], 2
+        current.append(record)
+        current_bytes += size
+    if current:
+        chunks.append((current, current_bytes))
+    return chunks
+
+
+class BulkUpsertWriter:
+    """
+    client.table(table_name).upsert(records, on_conflict=...).execute() 인터페이스(supabase-py 또는
+    SqliteUpsertClient)로 레코드를 청크 단위 병렬 upsert 합니다.
+    """
+
+    def __init__(self, client, table_name, on_conflict="url", max_chunk_rows=BULK_WRITE_MAX_CHUNK_ROWS,
+                 max_chunk_bytes=BULK_WRITE_MAX_CHUNK_BYTES, max_workers=BULK_WRITE_MAX_WORKERS,
+                 max_attempts=BULK_WRITE_MAX_ATTEMPTS, backoff_base_seconds=BULK_WRITE_BACKOFF_BASE_SECONDS):
+        self.client = client
+        self.table_name = table_name
+        self.on_conflict = on_conflict
+        self.max_chunk_rows = max_chunk_rows
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+
+    def _upsert_once(self, records):
+        response = self.client.table(self.table_name).upsert(records, on_conflict=self.on_conflict).execute()
+        # supabase-py v1.x 이후, 에러는 response.error 로 확인
+        error = getattr(response, 'error', None)
+        if error:
+            raise RuntimeError(str(error))
+        return response
+
+    def _write_chunk(self, chunk_number, num_chunks, records, num_bytes):
+        """
+        청크 하나를 성공할 때까지(최대 max_attempts) 보냅니다.
+        (성공 여부, 시도 횟수, 마지막 오류, DB가 돌려준 행 목록)을 반환.
+        """
+        last_error = None
+        for attempt in range(1, self.max_attempts + 1):
+            start_time = time.perf_counter()
+            try:
+                response = self._upsert_once(records)
+                elapsed = time.perf_counter() - start_time
+                print(f"  Chunk {chunk_number}/{num_chunks}: {len(records)} rows, {num_bytes / 1024:.1f} KB in {elapsed:.2f}s "
+                      f"({len(records) / max(elapsed, 1e-6):.0f} rows/s, {num_bytes / 1024 / max(elapsed, 1e-6):.0f} KB/s, attempt {attempt}).")
+                return True, attempt, None, list(getattr(response, 'data', None) or [])
+            except Exception as e:
+                last_error = e
+                if attempt < self.max_attempts:
+                    delay = min(BULK_WRITE_BACKOFF_MAX_SECONDS, self.backoff_base_seconds * 2 ** (attempt - 1))
+                    delay += random.uniform(0, delay * 0.1) # 여러 청크가 동시에 재시도하지 않도록 지터
+                    print(f"  Chunk {chunk_number}/{num_chunks} failed (attempt {attempt}/{self.max_attempts}): {e}. Retrying in {delay:.1f}s...")
+                    time.sleep(delay)
+        print(f"  Chunk {chunk_number}/{num_chunks} failed after {self.max_attempts} attempts: {last_error}")
+        if records:
+            print(f"  Sample of first record in failed chunk: {records[0]}")
+        return False, self.max_attempts, last_error, []
+
+    def write(self, records):
+        """
+        레코드를 upsert 하고 결과 통계 dict를 반환합니다:
+        'num_records', 'num_chunks', 'num_written', 'num_failed_chunks', 'failed_records', 'num_retries', 'seconds',
+        'returned_rows' (DB가 upsert 응답으로 돌려준 저장된 행. id 등 DB가 채운 컬럼 포함).
+        """
+        start_time = time.perf_counter()
+        chunks = chunk_records(records, self.max_chunk_rows, self.max_chunk_bytes)
+        stats = {'num_records': len(records), 'num_chunks': len(chunks), 'num_written': 0,
+                 'num_failed_chunks': 0, 'failed_records': [], 'num_retries': 0, 'seconds': 0.0, 'returned_rows': []}
+        if not chunks:
+            return stats
+        print(f"Upserting {len(records)} records into '{self.table_name}' in {len(chunks)} chunk(s) "
+              f"(on_conflict='{self.on_conflict}', workers: {min(self.max_workers, len(chunks))})...")
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks)), thread_name_prefix="bulk-upsert") as executor:
+            futures = {
+                executor.submit(self._write_chunk, chunk_number, len(chunks), chunk, num_bytes): chunk
+                for chunk_number, (chunk, num_bytes) in enumerate(chunks, start=1)
+            }
+            for future in as_completed(futures):
+                succeeded, attempts, _, returned_rows = future.result()
+                stats['num_retries'] += attempts - 1
+                if succeeded:
+                    stats['num_written'] += len(futures[future])
+                    stats['returned_rows'].extend(returned_rows)
+                else:
+                    stats['num_failed_chunks'] += 1
+                    stats['failed_records'].extend(futures[future])
+        stats['seconds'] = time.perf_counter() - start_time
+        print(f"Upsert finished: {stats['num_written']}/{len(records)} records written in {stats['seconds']:.2f}s "
+              f"({stats['num_written'] / max(stats['seconds'], 1e-6):.0f} rows/s, {stats['num_retries']} retries, "
+              f"{stats['num_failed_chunks']} failed chunks).")
+        return stats
+
+
+# --- 로컬 테스트용 upsert 대상 (PostgREST 대신 SQLite) ---
+class _SqliteResponse:
+    def __init__(self, data, error=None):
+        self.data = data
+        self.error = error
+        self.count = None
+
+
+class _SqliteUpsertQuery:
+    def __init__(self, client, table_name, records, on_conflict):
+        self._client = client
+        self._table_name = table_name
+        self._records = records
+        self._on_conflict = on_conflict
+
+    def execute(self):
+        return self._client._execute_upsert(self._table_name, self._records, self._on_conflict)
+
+
+class _SqliteTable:
+    def __init__(self, client, table_name):
+        self._client = client
+        self._table_name = table_name
+
+    def upsert(self, records, on_conflict="url", **kwargs):
+        return _SqliteUpsertQuery(self._client, self._table_name, list(records), on_conflict)
+
+
+class SqliteUpsertClient:
+    """
+    supabase-py의 client.table(name).upsert(records, on_conflict=...).execute() 형태를 흉내 내는 SQLite 클라이언트.
+    테이블과 컬럼은 처음 들어온 레코드의 키로 만들고 (id 자동 증가, on_conflict 컬럼 UNIQUE), 없는 컬럼은 추가합니다.
+    simulate_failures=N이면 처음 N번의 execute()가 ConnectionError를 냅니다 (재시도 확인용).
+    """
+
+    def __init__(self, db_path=":memory:", simulate_failures=0):
+        self.db_path = db_path
+        self.simulate_failures = simulate_failures
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._columns = {} # 테이블 이름 -> 컬럼 이름 집합
+
+    def table(self, table_name):
+        return _SqliteTable(self, table_name)
+
+    def _ensure_table(self, table_name, columns, on_conflict):
+        known_columns = self._columns.get(table_name)
+        if known_columns is None:
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table_name}" (id INTEGER PRIMARY KEY AUTOINCREMENT, "{on_conflict}" UNIQUE)'
+            )
+            known_columns = self._columns[table_name] = {
+                row[1] for row in self._conn.execute(f'PRAGMA table_info("{table_name}")')
+            }
+        for column in columns:
+            if column not in known_columns:
+                self._conn.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{column}"')
+                known_columns.add(column)
+
+    def _execute_upsert(self, table_name, records, on_conflict):
+        with self._lock:
+            if self.simulate_failures > 0:
+                self.simulate_failures -= 1
+                raise ConnectionError("simulated connection failure")
+            if not records:
+                return _SqliteResponse([])
+            columns = list(dict.fromkeys(column for record in records for column in record))
+            self._ensure_table(table_name, columns, on_conflict)
+            column_list = ", ".join(f'"{column}"' for column in columns)
+            placeholders = ", ".join("?" * len(columns))
+            updates = ", ".join(f'"{column}" = excluded."{column}"' for column in columns if column != on_conflict)
+            conflict_action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+            self._conn.executemany(
+                f'INSERT INTO "{table_name}" ({column_list}) VALUES ({placeholders}) '
+                f'ON CONFLICT("{on_conflict}") {conflict_action}',
+                [tuple(record.get(column) for column in columns) for record in records],
+            )
+            self._conn.commit()
+            return _SqliteResponse(records)
+
+    def count_rows(self, table_name):
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
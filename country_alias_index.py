@@ -0,0 +1,170 @@
+import re
+import json
+import unicodedata
+from functools import lru_cache
+
+# --- 국가 별칭 색인 ---
+# GeoJSON의 국가명, 흔히 쓰는 별칭과 국민/형용사형(demonym)을 정규화한 키로 한 번 색인해 두고,
+# NER 엔티티 문자열을 엔티티 길이에 비례하는 시간에 ISO 코드로 변환합니다.
+COUNTRY_NAME_PROPERTIES = ("ADMIN_NAME", "ADMIN", "NAME", "name")     # 앞에 있는 속성명을 우선 사용
+COUNTRY_ISO_PROPERTIES = ("ISO_A2_CODE", "ISO_A2", "ISO_A2_EH", "iso_a2")
+COUNTRY_RESOLVE_MEMO_SIZE = 4096 # 이미 본 엔티티 문자열의 변환 결과를 기억하는 개수
+
+# ISO 코드별 추가 별칭 (GeoJSON에 해당 국가가 있을 때만 등록)
+COUNTRY_ALIASES = {
+    "US": ["united states", "united states of america", "u.s.", "u.s.a.", "usa", "america"],
+    "GB": ["united kingdom", "u.k.", "uk", "great britain", "britain"],
+    "RU": ["russian federation"],
+    "KR": ["republic of korea", "korea"],
+    "KP": ["democratic people's republic of korea", "dprk"],
+    "PS": ["palestinian territories", "state of palestine", "gaza", "gaza strip", "west bank"],
+    "CN": ["people's republic of china", "prc", "mainland china"],
+    "IR": ["islamic republic of iran"],
+    "SY": ["syrian arab republic"],
+    "CD": ["democratic republic of the congo", "drc", "dr congo"],
+    "CG": ["republic of the congo"],
+    "MM": ["burma"],
+    "CI": ["ivory coast", "côte d'ivoire"],
+    "TW": ["republic of china"],
+    "AE": ["uae"],
+}
+# ISO 코드별 국민/형용사형 (NER이 'Ukrainian' 등을 GPE로 태깅하는 경우 대비)
+COUNTRY_DEMONYMS = {
+    "UA": ["ukrainian", "ukrainians"],
+    "RU": ["russian", "russians"],
+    "IL": ["israeli", "israelis"],
+    "PS": ["palestinian", "palestinians"],
+    "US": ["american", "americans"],
+    "CN": ["chinese"],
+    "SD": ["sudanese"],
+    "KR": ["south korean", "south koreans"],
+    "KP": ["north korean", "north koreans"],
+    "GB": ["british"],
+    "FR": ["french"],
+    "DE": ["german", "germans"],
+    "IR": ["iranian", "iranians"],
+    "IQ": ["iraqi", "iraqis"],
+    "SY": ["syrian", "syrians"],
+    "AF": ["afghan", "afghans"],
+    "YE": ["yemeni", "yemenis"],
+    "LB": ["lebanese"],
+    "TR": ["turkish"],
+    "IN": ["indian", "indians"],
+    "PK": ["pakistani", "pakistanis"],
+    "JP": ["japanese"],
+    "TW": ["taiwanese"],
+    "ET": ["ethiopian", "ethiopians"],
+    "SO": ["somali", "somalis"],
+    "ML": ["malian"],
+    "NG": ["nigerian", "nigerians"],
+    "LY": ["libyan", "libyans"],
+    "VE": ["venezuelan", "venezuelans"],
+    "MM": ["burmese"],
+}
+
+# 별칭의 일부로만 쓰일 때 특정 국가를 가리키지 않는 단어 ('United' -> US 같은 오판 방지)
+GENERIC_COUNTRY_WORDS = {
+    "of", "the", "and", "republic", "democratic", "people", "peoples", "united", "state", "states",
+    "federation", "islamic", "arab", "kingdom", "strip", "bank", "west", "east", "north", "south", "mainland",
+}
+
+_JSON_STRING_OR_COMMENT_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"|/\*.*?\*/|//[^\n]*', re.DOTALL)
+_NON_WORD_PATTERN = re.compile(r"[^\w\s]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def strip_json_comments(text):
+    """JSON 문자열 밖의 /* */ 및 // 주석을 제거합니다 (배포된 countries_geo.json에 주석이 포함되어 있음)."""
+    return _JSON_STRING_OR_COMMENT_PATTERN.sub(lambda m: m.group(0) if m.group(0).startswith('"') else "", text)
+
+
+def normalize_country_key(text):
+    """비교용 키: 소문자, 악센트/구두점 제거('u.s.' -> 'us'), 앞의 'the'와 소유격 제거, 공백 정리."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
+    text = text.replace("'s ", " ").replace("’s ", " ")
+    if text.endswith("'s"):
+        text = text[:-2]
+    text = _NON_WORD_PATTERN.sub(lambda m: "" if m.group(0) == "." else " ", text)
+    text = _WHITESPACE_PATTERN.sub(" ", text).strip()
+    if text.startswith("the "):
+        text = text[len("the "):]
+    return text
+
+
+def load_country_records(geojson_path):
+    """GeoJSON에서 (국가명, ISO_A2) 목록을 읽습니다. 주석이 있는 파일과 ADMIN_NAME/ISO_A2_CODE 속성명도 지원."""
+    with open(geojson_path, "r", encoding="utf-8") as f:
+        geojson_data = json.loads(strip_json_comments(f.read()))
+    records = []
+    for feature in geojson_data.get("features", []):
+        properties = feature.get("properties") or {}
+        country_name = next((properties[key] for key in COUNTRY_NAME_PROPERTIES if properties.get(key)), None)
+        iso_a2 = next((properties[key] for key in COUNTRY_ISO_PROPERTIES if properties.get(key)), None)
+        if country_name and iso_a2 and str(iso_a2).strip() != "-99": # 유효한 ISO A2 코드만
+            records.append((str(country_name).strip(), str(iso_a2).upper().strip()))
+    return records
+
+
+class CountryAliasIndex:
+    """
+    정규화한 별칭 -> ISO 코드 색인.
+    resolve(entity_text)는 (1) 엔티티 전체가 별칭과 일치, (2) 엔티티 안에 별칭이 단어 단위로 포함
+    ('northern Sudan' -> SD), (3) 엔티티가 별칭의 연속된 단어 일부('Korea' -> KR) 순서로 찾습니다.
+    """
+
+    def __init__(self, country_records, extra_aliases=COUNTRY_ALIASES, demonyms=COUNTRY_DEMONYMS,
+                 memo_size=COUNTRY_RESOLVE_MEMO_SIZE):
+        self.exact = {}          # 정규화 키 -> ISO
+        self._alias_trie = {}    # 단어 트라이 (엔티티 안에 포함된 별칭 찾기), None 키에 ISO
+        self._alias_parts = {}   # 별칭의 연속 단어 일부(튜플) -> ISO (먼저 등록된 별칭 우선)
+        loaded_isos = set()
+        for country_name, iso in country_records:
+            self.add_alias(country_name, iso)
+            loaded_isos.add(iso)
+        for alias_table in (extra_aliases or {}, demonyms or {}):
+            for iso, aliases in alias_table.items():
+                if iso in loaded_isos:
+                    for alias in aliases:
+                        self.add_alias(alias, iso)
+        self.resolve = lru_cache(maxsize=memo_size)(self._resolve)
+
+    def add_alias(self, alias, iso):
+        key = normalize_country_key(alias)
+        if not key or key in self.exact:
+            return
+        self.exact[key] = iso
+        words = tuple(key.split())
+        node = self._alias_trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(None, iso)
+        for start in range(len(words)):
+            for end in range(start + 1, len(words) + 1):
+                part = words[start:end]
+                if not all(word in GENERIC_COUNTRY_WORDS for word in part):
+                    self._alias_parts.setdefault(part, iso)
+
+    def _resolve(self, entity_text):
+        key = normalize_country_key(entity_text)
+        if not key:
+            return None
+        iso = self.exact.get(key)
+        if iso:
+            return iso
+        words = key.split()
+        # 엔티티 안에 포함된 가장 긴 별칭 (왼쪽부터)
+        for start in range(len(words)):
+            node = self._alias_trie.get(words[start])
+            position = start + 1
+            longest_iso = None
+            while node is not None:
+                longest_iso = node.get(None, longest_iso)
+                if position >= len(words):
+                    break
+                node = node.get(words[position])
+                position += 1
+            if longest_iso:
+                return longest_iso
+        # 엔티티가 별칭의 일부인 경우 (예: 'Korea' -> 'South Korea')
+        return self._alias_parts.get(tuple(words))
+
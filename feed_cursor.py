@@ -0,0 +1,69 @@
+import json
+import base64
+
+# --- 피드 keyset(커서) 페이지네이션 ---
+# 피드 정렬 키 (relevance_score DESC, published_date DESC, id DESC, 모두 NULL은 마지막)의 마지막 값을 불투명한 커서로 넘기고,
+# 다음 페이지는 OFFSET 없이 '커서 뒤의 행'만 조건으로 읽습니다. 몇 번째 페이지든 첫 페이지와 같은 비용입니다.
+# 커서 조건은 NULL을 마지막으로 보내는 정렬 규칙을 그대로 따르므로 NULL 점수/날짜가 있는 행도 빠짐없이 이어집니다.
+# 커서에는 url도 함께 넣습니다. 아직 id를 받지 못한 로컬 복제본 행은 (점수, 날짜, NULL id)가 같을 수 있으므로
+# 복제본은 url을 마지막 정렬 키로 씁니다. 이런 커서(id 없음)를 Supabase에서 이어 읽을 때는 url로 그 행의 id를 찾아 채웁니다
+# (Supabase 행은 모두 id가 있으므로 id가 빈 커서를 그대로 쓰면 같은 (점수, 날짜) 그룹의 나머지 행을 건너뜀).
+FEED_SORT_KEYS = ("relevance_score", "published_date", "id")
+FEED_CURSOR_TIEBREAK_KEY = "url"
+FEED_CURSOR_VERSION = 1
+
+
+class StaleFeedCursorError(ValueError):
+    """커서가 가리키는 행을 더 이상 찾을 수 없어 이어 읽을 수 없음 (커서 없이 첫 페이지부터 다시 요청해야 함)."""
+
+
+def encode_feed_cursor(row):
+    """DB 행(dict)의 정렬 키 값으로 URL에 그대로 쓸 수 있는 커서 문자열을 만듭니다."""
+    keys = FEED_SORT_KEYS + (FEED_CURSOR_TIEBREAK_KEY,)
+    payload = json.dumps([FEED_CURSOR_VERSION] + [row.get(key) for key in keys], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_feed_cursor(cursor):
+    """커서 문자열을 {정렬 키(와 url): 값} dict로 되돌립니다. 형식이 잘못되었으면 ValueError."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8"))
+    except Exception as e:
+        raise ValueError(f"Malformed cursor: {e}") from None
+    keys = FEED_SORT_KEYS + (FEED_CURSOR_TIEBREAK_KEY,)
+    if not isinstance(payload, list) or len(payload) != len(keys) + 1 or payload[0] != FEED_CURSOR_VERSION:
+        raise ValueError("Malformed cursor: unexpected payload")
+    values = dict(zip(keys, payload[1:]))
+    score = values["relevance_score"]
+    if score is not None and (isinstance(score, bool) or not isinstance(score, (int, float))):
+        raise ValueError("Malformed cursor: relevance_score must be a number")
+    if values["published_date"] is not None and not isinstance(values["published_date"], str):
+        raise ValueError("Malformed cursor: published_date must be a string")
+    if values["id"] is not None and not isinstance(values["id"], (int, str)):
+        raise ValueError("Malformed cursor: id must be an integer or string")
+    if values["url"] is not None and not isinstance(values["url"], str):
+        raise ValueError("Malformed cursor: url must be a string")
+    return values
+
+
+def _postgrest_value(value):
+    # 논리 필터 안에서는 , . : ( ) 가 예약 문자이므로 값을 큰따옴표로 감쌈
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def keyset_postgrest_filter(cursor_values, sort_keys=FEED_SORT_KEYS):
+    """
+    정렬 순서(DESC, NULL 마지막)에서 커서 행 '뒤'에 오는 행의 조건을 PostgREST 논리 필터 문자열(or=(...) 안에 넣을 식)로 반환합니다.
+    키 c의 값 v가 있으면 'c < v OR c IS NULL OR (c = v AND 나머지)', 없으면 'c IS NULL AND 나머지'.
+    """
+    column, rest = sort_keys[0], sort_keys[1:]
+    value = cursor_values[column]
+    if not rest:
+        if value is None:
+            return f"and({column}.is.null,{column}.not.is.null)" # 항상 거짓 (이어질 행 없음)
+        return f"or({column}.lt.{_postgrest_value(value)},{column}.is.null)"
+    rest_filter = keyset_postgrest_filter(cursor_values, rest)
+    if value is None:
+        return f"and({column}.is.null,{rest_filter})"
+    quoted = _postgrest_value(value)
+    return f"or({column}.lt.{quoted},{column}.is.null,and({column}.eq.{quoted},{rest_filter}))"
@@ -1,13 +1,67 @@
 import pandas as pd
 import os
 import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 from googlesearch import search
 from newspaper import Article, Config as NewspaperConfig # Config 임포트 추가
+from newspaper.article import ArticleDownloadState # 저장된 본문으로 nlp()만 실행할 때 사용
 import nltk
+from http_session import fetch_html, DEFAULT_USER_AGENT # 공유 연결 풀 세션 (keep-alive, 재시도)
+from http_cache import get_shared_response_cache # 디스크 응답 캐시 (ETag/Last-Modified 재검증)
+from url_canonicalizer import dedupe_urls # 추적 파라미터/AMP/http 차이만 다른 중복 URL 제거
+from host_health import get_shared_host_health, HostRequestGuard # 호스트별 적응형 동시성/서킷 브레이커
+from html_archive import get_shared_html_archive # 원본 HTML 보관소 (오프라인 전처리 재실행용)
+
+# --- 동시 크롤링 설정 ---
+DEFAULT_CRAWL_MAX_WORKERS = 4 # 동시에 기사를 다운로드할 스레드 수 (1이면 기존처럼 순차 실행)
+PER_DOMAIN_MIN_INTERVAL_SECONDS = 1.5 # 같은 도메인에 대한 요청 간 최소 간격 (초)
+ARTICLE_REQUEST_TIMEOUT_SECONDS = 15 # 기사 다운로드 타임아웃 (초)
+USE_HTTP_RESPONSE_CACHE = True # True면 바뀌지 않은 기사는 다운로드와 newspaper 파싱을 모두 건너뜀
+RESPONSE_CACHE_PARSER_NAME = "google_news_crawler" # 캐시에 저장되는 파싱 결과의 이름 (크롤러별로 구분)
+ARCHIVE_RAW_HTML = True # True면 받은 기사 HTML을 html_archive/에 보관 (run_pipeline.py --replay로 재처리 가능)
+ARCHIVE_CRAWLER_NAME = "google_news_crawler" # 보관소에 기록되는 크롤러 이름 (재처리 시 파서 선택에 사용)
+USE_HOST_HEALTH_TRACKING = True # True면 느린 호스트는 동시 요청 수/타임아웃을 줄이고, 계속 실패하는 호스트는 건너뜀
+# newspaper3k의 article.nlp() (summary/keywords)는 하위 단계에서 쓰이지 않으므로 기본값은 실행 안 함.
+# 필요하면 crawl_article_data(run_nlp=True) 또는 add_summaries_and_keywords()로 나중에 계산.
+RUN_NEWSPAPER_NLP_DURING_CRAWL = False
+
+# --- Newspaper3k 설정 (모든 기사에서 공유, 매 호출마다 새로 만들지 않음) ---
+NEWSPAPER_CONFIG = NewspaperConfig()
+NEWSPAPER_CONFIG.browser_user_agent = DEFAULT_USER_AGENT
+NEWSPAPER_CONFIG.request_timeout = ARTICLE_REQUEST_TIMEOUT_SECONDS # 요청 타임아웃 설정 (초)
+NEWSPAPER_CONFIG.memoize_articles = False # 기사 캐싱 비활성화 (매번 새로 가져오기)
+# NEWSPAPER_CONFIG.fetch_images = False # 이미지는 URL만 가져오므로 False로 설정하여 속도 향상 가능
+
+# --- 도메인별 요청 간격 제한 클래스 ---
+class DomainRateLimiter:
+    """도메인(호스트)별로 요청 간 최소 간격을 보장합니다. 여러 스레드에서 동시에 사용 가능."""
+    def __init__(self, min_interval_seconds=PER_DOMAIN_MIN_INTERVAL_SECONDS):
+        self.min_interval_seconds = min_interval_seconds
+        self._lock = threading.Lock()
+        self._next_allowed_time = {} # {'www.bbc.com': 다음 요청 가능 시각(monotonic)}
+
+    def wait_for_slot(self, url):
+        """해당 URL 도메인의 다음 요청 가능 시각까지 대기합니다. 슬롯은 잠금 안에서 예약하고 대기는 잠금 밖에서 합니다."""
+        domain = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot_time = max(now, self._next_allowed_time.get(domain, now))
+            self._next_allowed_time[domain] = slot_time + self.min_interval_seconds
+        wait_seconds = slot_time - now
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+# --- NLTK 리소스 다운로드 함수 ---
+_nltk_resources_checked = False
 
-# --- NLTK 리소스 다운로드 함수 (변경 없음) ---
 def download_nltk_resources_if_needed():
-    """NLTK의 'punkt' 리소스가 없으면 다운로드합니다."""
+    """NLTK의 'punkt' 리소스가 없으면 다운로드합니다. article.nlp()를 실행할 때만 필요하며 프로세스당 한 번만 확인."""
+    global _nltk_resources_checked
+    if _nltk_resources_checked:
+        return
+    _nltk_resources_checked = True
     try:
         nltk.data.find('tokenizers/punkt')
     except (LookupError, nltk.downloader.DownloadError):
@@ -25,48 +79,142 @@ def search_google_for_urls(query, num_to_fetch=5, language='en', tbs='qdr:w'):
     try:
         # tbs='qdr:w' (최근 1주일), 'qdr:d' (최근 1일), 'qdr:m' (최근 1달)
         # stop 파라미터로 가져올 결과 수 지정
-        search_results_urls = list(search(query, lang=language, stop=num_to_fetch, pause=2.0, tbs=tbs))
+        raw_result_urls = list(search(query, lang=language, stop=num_to_fetch, pause=2.0, tbs=tbs))
+        # 정규형이 같은 URL은 하나만 남김 (다운로드와 저장에는 검색 결과의 원래 URL을 사용)
+        search_results_urls = dedupe_urls(raw_result_urls)
         print(f"Found {len(search_results_urls)} URLs for '{query}'.")
         return search_results_urls
     except Exception as e:
         print(f"Error during Google search for '{query}': {e}")
         return []
 
-# --- 기사 데이터 크롤링 함수 (Newspaper3k 설정 추가 및 반환값 명확화) ---
-def crawl_article_data(url_to_crawl):
-    """주어진 URL에서 뉴스 기사의 주요 정보를 크롤링하고 딕셔너리로 반환합니다."""
-    print(f"  Crawling article: {url_to_crawl}")
+# --- newspaper3k 요약/키워드 계산 함수 (지연 실행용) ---
+def compute_summary_and_keywords(title, body, url=""):
+    """이미 추출된 제목/본문으로 newspaper3k의 nlp()만 실행하여 (summary, keywords 문자열)을 반환합니다.
+    다운로드/파싱을 다시 하지 않으므로 관련도 필터를 통과한 기사에만 나중에 적용할 수 있습니다."""
+    if not body:
+        return "", ""
+    download_nltk_resources_if_needed()
+    article = Article(url or "http://localhost/", config=NEWSPAPER_CONFIG)
+    article.set_title(title or "")
+    article.set_text(body)
+    article.download_state = ArticleDownloadState.SUCCESS # 다운로드/파싱 완료 상태로 표시 (nlp() 전제조건)
+    article.is_parsed = True
+    article.nlp()
+    return (article.summary or ""), (', '.join(article.keywords) if article.keywords else "")
+
+def add_summaries_and_keywords(articles_df, title_col="title", body_col="body", url_col="url",
+                               summary_col="summary", keywords_col="keywords"):
+    """DataFrame의 각 행에 newspaper3k 요약/키워드 컬럼을 채워 반환합니다 (이미 값이 있는 행은 건너뜀).
+    예: 관련도 점수(RELEVANCE_THRESHOLD)를 통과한 기사에만 호출."""
+    if articles_df is None or articles_df.empty:
+        return articles_df
+    enriched_df = articles_df.copy()
+    for col in (summary_col, keywords_col):
+        if col not in enriched_df.columns:
+            enriched_df[col] = ""
+    for index, row in enriched_df.iterrows():
+        if str(row.get(summary_col) or "").strip():
+            continue
+        try:
+            summary, keywords = compute_summary_and_keywords(
+                str(row.get(title_col) or ""), str(row.get(body_col) or ""), str(row.get(url_col) or "")
+            )
+            enriched_df.at[index, summary_col] = summary
+            enriched_df.at[index, keywords_col] = keywords
+        except Exception as e:
+            print(f"    Warning: newspaper3k nlp() failed for {row.get(url_col)}: {e}")
+    return enriched_df
+
+# --- 원본 HTML 보관 및 파싱 함수 ---
+def archive_raw_html(url, html_text):
+    """ARCHIVE_RAW_HTML이 True면 받은 HTML을 보관소에 저장합니다. 보관 실패는 크롤링 결과에 영향을 주지 않습니다."""
+    if not ARCHIVE_RAW_HTML:
+        return
     try:
-        config = NewspaperConfig()
-        config.browser_user_agent = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
-        config.request_timeout = 15 # 요청 타임아웃 설정 (초)
-        config.memoize_articles = False # 기사 캐싱 비활성화 (매번 새로 가져오기)
-        # config.fetch_images = False # 이미지는 URL만 가져오므로 False로 설정하여 속도 향상 가능
-
-        article = Article(url_to_crawl, config=config)
-        article.download()
-        article.parse()
+        get_shared_html_archive().put(url, html_text, crawler=ARCHIVE_CRAWLER_NAME)
+    except Exception as e:
+        print(f"    Warning: Could not archive raw HTML for {url}: {e}")
+
+def parse_article_html(url, html_text, run_nlp=False):
+    """이미 받은 HTML을 newspaper3k로 파싱하여 crawl_article_data와 같은 형식의 dict를 반환합니다 (네트워크 사용 안 함)."""
+    article = Article(url, config=NEWSPAPER_CONFIG)
+    article.download(input_html=html_text)
+    article.parse()
+    if run_nlp:
+        download_nltk_resources_if_needed()
         article.nlp() # NLP 처리 (요약, 키워드 등에 필요)
 
-        # 발행일 처리 (datetime 객체 -> 문자열, 없을 경우 빈 문자열)
-        published_date_str = ""
-        if article.publish_date:
+    # 발행일 처리 (datetime 객체 -> 문자열, 없을 경우 빈 문자열)
+    published_date_str = ""
+    if article.publish_date:
+        try:
+            published_date_str = article.publish_date.strftime('%Y-%m-%d %H:%M:%S')
+        except AttributeError: # 가끔 publish_date가 이상한 타입으로 올 때 대비
+            published_date_str = str(article.publish_date)
+
+    return {
+        "title": article.title if article.title else "N/A",
+        "authors": ', '.join(article.authors) if article.authors else "",
+        "published_date": published_date_str,
+        "body": article.text if article.text else "",
+        "image_url": article.top_image if article.top_image else "", # 이미지 URL
+        "keywords": ', '.join(article.keywords) if article.keywords else "", # newspaper3k가 추출한 키워드
+        "summary": article.summary if article.summary else "", # newspaper3k가 생성한 요약
+        "url": url
+    }
+
+# --- 기사 데이터 크롤링 함수 (Newspaper3k 설정 추가 및 반환값 명확화) ---
+def crawl_article_data(url_to_crawl, rate_limiter=None, run_nlp=None, host_health=None):
+    """주어진 URL에서 뉴스 기사의 주요 정보를 크롤링하고 딕셔너리로 반환합니다.
+    rate_limiter가 주어지면 실제 네트워크 요청 직전에만 도메인별 간격을 기다립니다 (캐시 적중 시 대기 없음).
+    run_nlp가 None이면 RUN_NEWSPAPER_NLP_DURING_CRAWL 설정을 따르며, False면 keywords/summary는 빈 문자열입니다.
+    host_health가 None이면 USE_HOST_HEALTH_TRACKING 설정에 따라 공유 HostHealthTracker를 사용합니다
+    (서킷이 열린 호스트는 요청 없이 실패 행을 반환하고, 타임아웃은 호스트의 평균 지연시간에 맞춰 줄어듦)."""
+    if run_nlp is None:
+        run_nlp = RUN_NEWSPAPER_NLP_DURING_CRAWL
+    if host_health is None and USE_HOST_HEALTH_TRACKING:
+        host_health = get_shared_host_health()
+    print(f"  Crawling article: {url_to_crawl}")
+    request_guard = HostRequestGuard(host_health, url_to_crawl, rate_limiter=rate_limiter)
+    before_network_request = request_guard.before_network_request
+    request_timeout = host_health.timeout_for(url_to_crawl, ARTICLE_REQUEST_TIMEOUT_SECONDS) if host_health else ARTICLE_REQUEST_TIMEOUT_SECONDS
+    try:
+        # HTML은 공유 세션으로 받아 연결을 재사용하고, newspaper에는 받은 HTML만 넘겨 파싱
+        response_cache = get_shared_response_cache() if USE_HTTP_RESPONSE_CACHE else None
+        if response_cache:
             try:
-                published_date_str = article.publish_date.strftime('%Y-%m-%d %H:%M:%S')
-            except AttributeError: # 가끔 publish_date가 이상한 타입으로 올 때 대비
-                published_date_str = str(article.publish_date)
-
-
-        return {
-            "title": article.title if article.title else "N/A",
-            "authors": ', '.join(article.authors) if article.authors else "",
-            "published_date": published_date_str,
-            "body": article.text if article.text else "",
-            "image_url": article.top_image if article.top_image else "", # 이미지 URL
-            "keywords": ', '.join(article.keywords) if article.keywords else "", # newspaper3k가 추출한 키워드
-            "summary": article.summary if article.summary else "", # newspaper3k가 생성한 요약
-            "url": url_to_crawl
-        }
+                fetched = response_cache.fetch(url_to_crawl, timeout=request_timeout,
+                                               parser=RESPONSE_CACHE_PARSER_NAME, before_network_request=before_network_request)
+            except Exception as fetch_error:
+                request_guard.finish(fetch_error)
+                raise
+            request_guard.finish()
+            archive_raw_html(url_to_crawl, fetched.text)
+            if fetched.from_cache and fetched.parsed:
+                print(f"    Cache hit ({fetched.status}), skipping download and parse: {url_to_crawl}")
+                cached_data = dict(fetched.parsed, url=url_to_crawl)
+                if run_nlp and not cached_data.get("summary"): # 캐시된 결과에 요약이 없으면 본문으로만 계산
+                    cached_data["summary"], cached_data["keywords"] = compute_summary_and_keywords(
+                        cached_data.get("title", ""), cached_data.get("body", ""), url_to_crawl
+                    )
+                    response_cache.store_parsed(url_to_crawl, RESPONSE_CACHE_PARSER_NAME, cached_data)
+                return cached_data
+            html_text = fetched.text
+        else:
+            before_network_request(url_to_crawl)
+            try:
+                html_text = fetch_html(url_to_crawl, timeout=request_timeout).text
+            except Exception as fetch_error:
+                request_guard.finish(fetch_error)
+                raise
+            request_guard.finish()
+            archive_raw_html(url_to_crawl, html_text)
+
+        article_data = parse_article_html(url_to_crawl, html_text, run_nlp=run_nlp)
+        if response_cache:
+            response_cache.store_parsed(url_to_crawl, RESPONSE_CACHE_PARSER_NAME, article_data)
+        return article_data
     except Exception as e:
         print(f"    Error crawling article {url_to_crawl}: {e}")
         return { # 실패 시 빈 데이터 반환 또는 특정 값으로 채움
@@ -74,24 +222,41 @@ def crawl_article_data(url_to_crawl):
             "body": "", "image_url": "", "keywords": "", "summary": "", "url": url_to_crawl
         }
 
+# --- 여러 URL 동시 크롤링 함수 ---
+def crawl_articles_concurrently(urls, max_workers=DEFAULT_CRAWL_MAX_WORKERS, rate_limiter=None):
+    """URL 목록을 스레드 풀로 동시에 크롤링합니다. 결과 순서는 입력 URL 순서와 같습니다.
+    요청 간격은 전역 sleep 대신 도메인별로 적용되므로, 서로 다른 사이트는 병렬로 받아옵니다."""
+    if rate_limiter is None:
+        rate_limiter = DomainRateLimiter()
+
+    def crawl_with_rate_limit(url):
+        return crawl_article_data(url, rate_limiter=rate_limiter)
+
+    if max_workers is None or max_workers <= 1: # 순차 모드 (기존 동작과 동일한 결과)
+        return [crawl_with_rate_limit(url) for url in urls]
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-crawl") as executor:
+        # executor.map은 입력 순서대로 결과를 돌려주므로 DataFrame 행 순서가 유지됨
+        return list(executor.map(crawl_with_rate_limit, urls))
+
 # --- 뉴스 수집 파이프라인 실행 함수 (DataFrame 반환으로 변경) ---
-def run_news_collection_pipeline(search_query, num_articles_to_fetch=5, lang='en'):
-    """단일 검색어에 대해 뉴스 URL을 검색하고 기사 데이터를 크롤링하여 DataFrame으로 반환합니다."""
+def run_news_collection_pipeline(search_query, num_articles_to_fetch=5, lang='en', max_workers=DEFAULT_CRAWL_MAX_WORKERS, rate_limiter=None):
+    """단일 검색어에 대해 뉴스 URL을 검색하고 기사 데이터를 크롤링하여 DataFrame으로 반환합니다.
+    max_workers > 1 이면 기사들을 동시에 다운로드합니다 (도메인별 요청 간격 유지)."""
     print(f"\n=== Starting News Collection for Query: '{search_query}' ===")
     
     found_urls = search_google_for_urls(search_query, num_to_fetch=num_articles_to_fetch, language=lang)
     
-    collected_articles_data = []
     if found_urls:
-        print(f"\nProcessing {len(found_urls)} articles for '{search_query}'...")
+        valid_urls = []
         for i, url in enumerate(found_urls):
             if url: # 유효한 URL인지 한번 더 체크
-                data = crawl_article_data(url)
-                collected_articles_data.append(data)
-                if i < len(found_urls) - 1: # 마지막 요청이 아니면 잠시 대기
-                    time.sleep(1.5) # 요청 간 간격 (조절 가능)
+                valid_urls.append(url)
             else:
                 print(f"  Skipping invalid URL at index {i}.")
+
+        print(f"\nProcessing {len(valid_urls)} articles for '{search_query}' (workers: {max_workers})...")
+        collected_articles_data = crawl_articles_concurrently(valid_urls, max_workers=max_workers, rate_limiter=rate_limiter)
         
         if collected_articles_data:
             df_articles = pd.DataFrame(collected_articles_data)
@@ -106,8 +271,6 @@ def run_news_collection_pipeline(search_query, num_articles_to_fetch=5, lang='en
 
 # --- 메인 실행 부분 (이 파일을 직접 테스트할 때만 작동) ---
 if __name__ == "__main__":
-    download_nltk_resources_if_needed() # 스크립트 직접 실행 시 NLTK 리소스 다운로드 확인
-
     test_query = "global AI ethics concerns" 
     num_to_fetch_test = 3 # 테스트용 기사 수
     
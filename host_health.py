@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+
+# --- 호스트별 상태 추적 설정 ---
+# 느리거나 죽은 뉴스 사이트 하나가 실행 시간을 잡아먹지 않도록, 호스트별 지연시간/오류를 추적하여
+# 동시 요청 수를 AIMD 방식으로 조절하고, 연속 실패 시 서킷을 열어 일정 시간 요청을 보내지 않습니다.
+HOST_HEALTH_STATE_PATH = "host_health.json" # 실행 간 호스트 상태 유지 파일
+HOST_MIN_CONCURRENCY = 1.0
+HOST_MAX_CONCURRENCY = 4.0
+HOST_INITIAL_CONCURRENCY = 2.0
+HOST_SLOW_LATENCY_SECONDS = 8.0      # 이보다 느린 응답은 '혼잡' 신호로 보고 동시성 감소
+HOST_LATENCY_EWMA_ALPHA = 0.3        # 지연시간 지수이동평균 가중치
+HOST_TIMEOUT_LATENCY_MULTIPLIER = 4.0 # 요청 타임아웃 = 평균 지연시간 x 배수 (아래 범위로 제한)
+HOST_MIN_TIMEOUT_SECONDS = 5.0
+HOST_MAX_TIMEOUT_SECONDS = 20.0
+CIRCUIT_FAILURE_THRESHOLD = 3        # 연속 실패가 이 횟수에 도달하면 서킷 열림
+CIRCUIT_BASE_COOLDOWN_SECONDS = 15 * 60 # 첫 서킷 열림 시간 (다시 실패할 때마다 2배, 최대 24시간)
+CIRCUIT_MAX_COOLDOWN_SECONDS = 24 * 3600
+HOST_SLOT_WAIT_TIMEOUT_SECONDS = 60  # 호스트 동시성 슬롯을 기다리는 최대 시간
+
+
+class HostCircuitOpenError(Exception):
+    """호스트의 서킷이 열려 있어 요청을 보내지 않았음을 나타냅니다."""
+
+
+class HostSlotTimeoutError(Exception):
+    """호스트 동시성 슬롯을 기다리다 시간이 초과되어 요청을 보내지 않았음을 나타냅니다 (서킷 열림이 아니며 호스트 실패로 기록하지 않음)."""
+
+
+def host_of(url):
+    return (urlsplit(str(url)).hostname or "").lower()
+
+
+def is_host_failure(exception):
+    """예외가 호스트 장애(연결 실패, 타임아웃, 5xx/429)인지 판단합니다. 404 같은 4xx는 호스트가 살아있는 것으로 봅니다."""
+    response = getattr(exception, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if status_code is not None:
+        return status_code >= 500 or status_code == 429
+    return True
+
+
+class _HostState:
+    def __init__(self, data=None):
+        data = data or {}
+        self.concurrency_limit = float(data.get("concurrency_limit", HOST_INITIAL_CONCURRENCY))
+        self.latency_ewma = data.get("latency_ewma") # 초, 아직 측정값 없으면 None
+        self.consecutive_failures = int(data.get("consecutive_failures", 0))
+        self.circuit_open_until = float(data.get("circuit_open_until", 0.0)) # time.time() 기준
+        self.circuit_open_count = int(data.get("circuit_open_count", 0))
+        self.total_successes = int(data.get("total_successes", 0))
+        self.total_failures = int(data.get("total_failures", 0))
+        self.in_flight = 0
+        self.half_open_trial_in_flight = False
+
+    def to_dict(self):
+        return {
+            "concurrency_limit": round(self.concurrency_limit, 3),
+            "latency_ewma": self.latency_ewma,
+            "consecutive_failures": self.consecutive_failures,
+            "circuit_open_until": self.circuit_open_until,
+            "circuit_open_count": self.circuit_open_count,
+            "total_successes": self.total_successes,
+            "total_failures": self.total_failures,
+        }
+
+
+class HostHealthTracker:
+    """호스트별 AIMD 동시성 제한, 서킷 브레이커, 적응형 타임아웃. 여러 스레드에서 동시에 사용 가능."""
+
+    def __init__(self, state_path=HOST_HEALTH_STATE_PATH):
+        if state_path and not os.path.isabs(state_path):
+            state_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), state_path)
+        self.state_path = state_path
+        self._condition = threading.Condition()
+        self._hosts = {}
+        self._load()
+
+    # --- 상태 저장/로드 ---
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            self._hosts = {host: _HostState(data) for host, data in saved.get("hosts", {}).items()}
+            print(f"Loaded health state for {len(self._hosts)} hosts from '{self.state_path}'.")
+        except Exception as e:
+            print(f"Warning: Could not load host health state from '{self.state_path}': {e}")
+
+    def save(self):
+        """호스트 상태를 파일로 저장합니다 (다음 실행에서 서킷/동시성/지연시간을 이어서 사용)."""
+        if not self.state_path:
+            return
+        with self._condition:
+            data = {"saved_at": time.time(), "hosts": {host: state.to_dict() for host, state in self._hosts.items()}}
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+        return state
+
+    # --- 조회 ---
+    def is_circuit_open(self, url):
+        with self._condition:
+            state = self._hosts.get(host_of(url))
+            return bool(state and state.circuit_open_until > time.time())
+
+    def timeout_for(self, url, default_timeout=HOST_MAX_TIMEOUT_SECONDS):
+        """호스트의 평균 지연시간을 기준으로 요청 타임아웃을 계산합니다 (측정값이 없으면 default_timeout)."""
+        with self._condition:
+            state = self._hosts.get(host_of(url))
+            if not state or state.latency_ewma is None:
+                return default_timeout
+            adaptive = state.latency_ewma * HOST_TIMEOUT_LATENCY_MULTIPLIER
+        return max(HOST_MIN_TIMEOUT_SECONDS, min(HOST_MAX_TIMEOUT_SECONDS, default_timeout, adaptive))
+
+    # --- 요청 슬롯 ---
+    def acquire(self, url, wait_timeout=HOST_SLOT_WAIT_TIMEOUT_SECONDS):
+        """호스트 동시성 한도 안에서 요청 슬롯을 얻습니다. 서킷이 열려 있으면 HostCircuitOpenError,
+        wait_timeout 안에 슬롯이 나지 않으면 HostSlotTimeoutError.
+        서킷의 대기 시간이 지난 뒤(half-open)에는 시험 요청 하나만 허용합니다."""
+        host = host_of(url)
+        deadline = time.monotonic() + wait_timeout
+        with self._condition:
+            while True:
+                state = self._state(host)
+                now = time.time()
+                if state.circuit_open_until > now:
+                    raise HostCircuitOpenError(f"Circuit open for host '{host}' until {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(state.circuit_open_until))}")
+                half_open = state.circuit_open_count > 0 and state.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD
+                if half_open:
+                    if not state.half_open_trial_in_flight and state.in_flight == 0:
+                        state.half_open_trial_in_flight = True
+                        state.in_flight += 1
+                        return
+                elif state.in_flight < int(state.concurrency_limit):
+                    state.in_flight += 1
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise HostSlotTimeoutError(f"Timed out waiting for a request slot on host '{host}' after {wait_timeout}s")
+                self._condition.wait(timeout=remaining)
+
+    def release(self, url, success, latency_seconds=None):
+        """요청 결과를 기록하고 슬롯을 반환합니다 (AIMD 조절 및 서킷 상태 갱신)."""
+        with self._condition:
+            state = self._state(host_of(url))
+            state.in_flight = max(0, state.in_flight - 1)
+            state.half_open_trial_in_flight = False
+            if latency_seconds is not None:
+                state.latency_ewma = latency_seconds if state.latency_ewma is None else \
+                    HOST_LATENCY_EWMA_ALPHA * latency_seconds + (1 - HOST_LATENCY_EWMA_ALPHA) * state.latency_ewma
+
+            if success:
+                state.total_successes += 1
+                state.consecutive_failures = 0
+                state.circuit_open_count = 0
+                if latency_seconds is not None and latency_seconds > HOST_SLOW_LATENCY_SECONDS:
+                    state.concurrency_limit = max(HOST_MIN_CONCURRENCY, state.concurrency_limit / 2) # 곱셈 감소
+                else:
+                    state.concurrency_limit = min(HOST_MAX_CONCURRENCY, state.concurrency_limit + 1.0 / state.concurrency_limit) # 덧셈 증가
+            else:
+                state.total_failures += 1
+                state.consecutive_failures += 1
+                state.concurrency_limit = max(HOST_MIN_CONCURRENCY, state.concurrency_limit / 2)
+                if state.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+                    cooldown = min(CIRCUIT_MAX_COOLDOWN_SECONDS, CIRCUIT_BASE_COOLDOWN_SECONDS * (2 ** state.circuit_open_count))
+                    state.circuit_open_until = time.time() + cooldown
+                    state.circuit_open_count += 1
+                    print(f"  Circuit opened for host '{host_of(url)}' after {state.consecutive_failures} consecutive failures (cooldown {cooldown / 60:.0f} min).")
+            self._condition.notify_all()
+
+
+class HostRequestGuard:
+    """크롤러 한 번의 요청에 대해 슬롯 획득(네트워크 요청 직전)과 결과 기록을 묶어 처리합니다.
+    before_network_request를 HttpResponseCache.fetch에 넘기고, 요청이 끝나면 finish()를 호출합니다."""
+
+    def __init__(self, tracker, url, rate_limiter=None):
+        self.tracker = tracker
+        self.url = url
+        self.rate_limiter = rate_limiter
+        self._started_at = None
+
+    def before_network_request(self, url):
+        if self.tracker is not None:
+            self.tracker.acquire(url)
+            self._started_at = time.monotonic()
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait_for_slot(url)
+            if self._started_at is not None:
+                self._started_at = time.monotonic() # 간격 대기 시간은 지연시간에서 제외
+
+    def finish(self, exception=None):
+        """요청이 실제로 전송된 경우에만 결과를 기록합니다. exception이 호스트 장애가 아니면 성공으로 봅니다."""
+        if self.tracker is None or self._started_at is None:
+            return
+        latency = time.monotonic() - self._started_at
+        self._started_at = None
+        success = exception is None or not is_host_failure(exception)
+        self.tracker.release(self.url, success, latency_seconds=latency)
+
+
+# --- 프로세스 공유 인스턴스 ---
+_shared_tracker = None
+_shared_tracker_lock = threading.Lock()
+
+def get_shared_host_health():
+    """크롤러들이 공유하는 HostHealthTracker를 반환합니다 (최초 호출 시 저장된 상태를 로드)."""
+    global _shared_tracker
+    if _shared_tracker is None:
+        with _shared_tracker_lock:
+            if _shared_tracker is None:
+                _shared_tracker = HostHealthTracker()
+    return _shared_tracker
@@ -0,0 +1,145 @@
+import os
+import gzip
+import time
+import sqlite3
+import hashlib
+import threading
+from url_canonicalizer import canonicalize_url
+
+try:
+    import zstandard # 선택적 의존성: 설치되어 있으면 gzip보다 빠르고 작은 zstd 압축 사용
+except ImportError:
+    zstandard = None
+
+# --- 원본 HTML 보관소 설정 ---
+# 다운로드한 기사 HTML을 내용 해시(sha256)로 주소를 매긴 압축 파일로 보관하고, URL -> 해시 색인을 SQLite에 저장합니다.
+# KEYWORD_CONFIG, 정제 규칙, 국가 매핑을 바꾼 뒤 웹을 다시 크롤링하지 않고 보관된 HTML로 전처리를 재실행(replay)할 수 있습니다.
+HTML_ARCHIVE_DIR = "html_archive"
+HTML_ARCHIVE_INDEX_FILENAME = "index.sqlite3"
+HTML_ARCHIVE_GZIP_LEVEL = 6
+HTML_ARCHIVE_ZSTD_LEVEL = 10
+
+# 압축 방식별 파일 확장자
+_CODEC_EXTENSIONS = {"zstd": ".html.zst", "gzip": ".html.gz"}
+
+
+def content_hash_for_html(html_bytes):
+    return hashlib.sha256(html_bytes).hexdigest()
+
+
+class HtmlArchive:
+    """내용 주소 방식의 원본 HTML 보관소. 같은 내용은 한 번만 저장되며 여러 스레드에서 동시에 사용 가능."""
+
+    def __init__(self, archive_dir=HTML_ARCHIVE_DIR):
+        if not os.path.isabs(archive_dir):
+            archive_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), archive_dir)
+        self.archive_dir = archive_dir
+        self.objects_dir = os.path.join(archive_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.codec = "zstd" if zstandard is not None else "gzip"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(archive_dir, HTML_ARCHIVE_INDEX_FILENAME), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                crawler TEXT,
+                archived_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    # --- 내부 헬퍼 ---
+    def _blob_path(self, content_hash, codec):
+        return os.path.join(self.objects_dir, content_hash[:2], content_hash + _CODEC_EXTENSIONS[codec])
+
+    def _compress(self, data):
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=HTML_ARCHIVE_ZSTD_LEVEL).compress(data)
+        return gzip.compress(data, compresslevel=HTML_ARCHIVE_GZIP_LEVEL)
+
+    @staticmethod
+    def _decompress(data, codec):
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("This archive entry is zstd-compressed but the 'zstandard' package is not installed.")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    # --- 공개 API ---
+    def put(self, url, html_text, crawler=None):
+        """URL의 HTML을 보관하고 내용 해시를 반환합니다. 내용이 같으면 파일은 다시 쓰지 않습니다."""
+        if not html_text:
+            return None
+        key = canonicalize_url(url)
+        html_bytes = html_text.encode("utf-8")
+        content_hash = content_hash_for_html(html_bytes)
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash, codec FROM pages WHERE url = ?", (key,)).fetchone()
+        if row and row[0] == content_hash and os.path.exists(self._blob_path(*row)):
+            return content_hash
+
+        codec = self.codec
+        blob_path = self._blob_path(content_hash, codec)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            temp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(self._compress(html_bytes))
+            os.replace(temp_path, blob_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, content_hash, codec, crawler, archived_at) VALUES (?, ?, ?, ?, ?)",
+                (key, content_hash, codec, crawler, time.time()),
+            )
+            self._conn.commit()
+        return content_hash
+
+    def get_html(self, url):
+        """URL의 (가장 최근에 보관된) HTML을 반환합니다. 없으면 None."""
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash, codec FROM pages WHERE url = ?", (canonicalize_url(url),)).fetchone()
+        return self._read_blob(*row) if row else None
+
+    def _read_blob(self, content_hash, codec):
+        with open(self._blob_path(content_hash, codec), "rb") as f:
+            return self._decompress(f.read(), codec).decode("utf-8")
+
+    def iter_pages(self, crawler=None):
+        """보관된 (url, crawler, html_text)를 보관 순서대로 생성합니다. crawler를 주면 해당 크롤러가 받은 페이지만."""
+        query = "SELECT url, crawler, content_hash, codec FROM pages"
+        params = ()
+        if crawler:
+            query += " WHERE crawler = ?"
+            params = (crawler,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY archived_at", params).fetchall()
+        for url, page_crawler, content_hash, codec in rows:
+            try:
+                yield url, page_crawler, self._read_blob(content_hash, codec)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"Warning: Could not read archived HTML for {url}: {e}")
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- 프로세스 공유 인스턴스 ---
+_shared_archive = None
+_shared_archive_lock = threading.Lock()
+
+def get_shared_html_archive():
+    """크롤러들이 공유하는 HtmlArchive 인스턴스를 반환합니다 (최초 호출 시 생성)."""
+    global _shared_archive
+    if _shared_archive is None:
+        with _shared_archive_lock:
+            if _shared_archive is None:
+                _shared_archive = HtmlArchive()
+    return _shared_archive
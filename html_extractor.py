@@ -0,0 +1,165 @@
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit
+import lxml.html
+from lxml import etree
+
+# --- 단일 패스 기사 추출기 ---
+# HTML을 lxml(C 기반 파서)로 한 번만 파싱하고, 제목/발행일/본문 규칙을 한 번의 트리 순회로 모두 평가합니다.
+# 규칙은 간단한 CSS 선택자 문법(tag, tag.class, tag[attr="v"], tag[attr*="v"], 'ancestor tag')만 지원하며
+# 호스트명별로 컴파일된 결과를 캐시합니다.
+
+DEFAULT_EXTRACTION_RULES = {
+    # 우선순위 순서: 앞쪽 선택자에 맞는 요소가 있으면 그것을 사용
+    "title": ['h1', 'header h1', 'h2.article-title', 'h1.entry-title'],
+    "date_meta": [
+        'meta[property="article:published_time"]',
+        'meta[name="pubdate"]',
+        'meta[name="creation_date"]',
+        'meta[name="cXenseParse:recs:publishtime"]',
+        'meta[name="dcterms.created"]',
+        'meta[name="date"]',
+    ],
+    "date_time": ['time'],
+    "date_display": ['span[class*="date"]', 'div[class*="date"]', 'p[class*="date"]'], # 문서 순서상 첫 요소 사용
+    "content": ['article', 'main', 'div.story-content', 'div.article-content',
+                'div.entry-content', 'div.post-content', 'div.content', 'div.body',
+                'section[class*="article-body"]'],
+    "paragraph": ['p'],
+}
+MIN_PARAGRAPH_LENGTH = 50 # 이 길이 이하의 문단(캡션, 광고 링크 등)은 본문에서 제외
+
+# 호스트명별 규칙 (기본 규칙을 덮어쓸 항목만 지정). 예:
+# "www.aljazeera.com": {"content": ['div.wysiwyg', 'main'], "title": ['h1']}
+DOMAIN_EXTRACTION_RULES = {
+    "www.aljazeera.com": {"content": ['div.wysiwyg', 'main', 'article']},
+}
+
+_SELECTOR_PART_PATTERN = re.compile(
+    r'^(?P<tag>[a-zA-Z0-9_-]+|\*)?(?:\.(?P<cls>[a-zA-Z0-9_-]+))?'
+    r'(?:\[(?P<attr>[^\]=*~^$|]+)(?P<op>\*?=)"(?P<value>[^"]*)"\])?$'
+)
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class CompiledSelector:
+    """'tag.class[attr="v"]' 형태의 단순 선택자와 (선택적) 조상 태그 조건을 요소에 대해 평가합니다."""
+
+    def __init__(self, selector):
+        self.selector = selector
+        parts = selector.split()
+        match = _SELECTOR_PART_PATTERN.match(parts[-1])
+        if not match or len(parts) > 2:
+            raise ValueError(f"Unsupported selector: '{selector}'")
+        self.tag = (match.group('tag') or '*').lower()
+        self.css_class = match.group('cls')
+        self.attr = match.group('attr')
+        self.attr_op = match.group('op')
+        self.attr_value = match.group('value')
+        self.ancestor_tag = parts[0].lower() if len(parts) == 2 else None
+
+    def matches(self, element, open_tags):
+        """open_tags: 현재 요소의 조상 태그 이름별 개수 (트리 순회 중 유지)."""
+        if self.tag != '*' and element.tag != self.tag:
+            return False
+        if self.css_class and self.css_class not in (element.get('class') or '').split():
+            return False
+        if self.attr:
+            attr_value = element.get(self.attr)
+            if attr_value is None:
+                return False
+            if self.attr_op == '=' and attr_value != self.attr_value:
+                return False
+            if self.attr_op == '*=' and self.attr_value not in attr_value:
+                return False
+        if self.ancestor_tag and not open_tags.get(self.ancestor_tag):
+            return False
+        return True
+
+
+@lru_cache(maxsize=256)
+def get_compiled_rules(hostname):
+    """호스트명에 맞는 추출 규칙(기본 규칙 + 도메인별 덮어쓰기)을 컴파일하여 반환합니다 (호스트명별 캐시)."""
+    rules = dict(DEFAULT_EXTRACTION_RULES)
+    rules.update(DOMAIN_EXTRACTION_RULES.get(hostname, {}))
+    return {rule_name: [CompiledSelector(selector) for selector in selectors] for rule_name, selectors in rules.items()}
+
+
+def _element_text(element):
+    return _WHITESPACE_PATTERN.sub(' ', element.text_content()).strip()
+
+
+def extract_article_fields(html_text, url=""):
+    """
+    HTML 문자열에서 (title, published_date, body)를 추출합니다. 찾지 못한 항목은 None.
+    트리는 한 번만 순회하며, 각 규칙 목록에서 우선순위가 가장 높은 선택자의 (문서 순서상) 첫 요소를 사용합니다.
+    """
+    if not html_text or not html_text.strip():
+        return None, None, None
+    try:
+        root = lxml.html.fromstring(html_text)
+    except ValueError: # XML 인코딩 선언이 있는 문자열은 bytes로 넘겨야 함
+        root = lxml.html.fromstring(html_text.encode('utf-8'))
+    rules = get_compiled_rules(urlsplit(url).hostname or "")
+
+    title_hits = {}        # 선택자 순번 -> 첫 일치 요소의 텍스트
+    meta_hits = {}         # 선택자 순번 -> 첫 일치 meta의 content
+    first_time_element = None
+    first_date_display_text = None
+    content_found = set()  # 첫 일치 컨테이너가 이미 발견된 선택자 순번
+    open_containers = {}   # 현재 열려 있는(조상인) 컨테이너 요소 -> 선택자 순번 집합
+    open_tags = {}         # 현재 조상 태그 이름 -> 개수
+    paragraphs = []        # (문단 텍스트, 문단을 감싸는 컨테이너 선택자 순번 집합)
+
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        tag = element.tag
+        if not isinstance(tag, str): # 주석, 처리 명령 등은 건너뜀
+            continue
+        tag = tag.lower()
+        if event == "end":
+            open_tags[tag] -= 1
+            open_containers.pop(element, None)
+            continue
+
+        for index, selector in enumerate(rules["title"]):
+            if index not in title_hits and selector.matches(element, open_tags):
+                title_hits[index] = _element_text(element)
+        for index, selector in enumerate(rules["date_meta"]):
+            if index not in meta_hits and selector.matches(element, open_tags):
+                meta_hits[index] = (element.get('content') or '').strip()
+        if first_time_element is None and any(selector.matches(element, open_tags) for selector in rules["date_time"]):
+            first_time_element = element
+        if first_date_display_text is None and any(selector.matches(element, open_tags) for selector in rules["date_display"]):
+            first_date_display_text = _element_text(element)
+        for index, selector in enumerate(rules["content"]):
+            if index not in content_found and selector.matches(element, open_tags):
+                content_found.add(index)
+                open_containers[element] = open_containers.get(element, frozenset()) | {index}
+        if any(selector.matches(element, open_tags) for selector in rules["paragraph"]):
+            enclosing = frozenset().union(*open_containers.values()) if open_containers else frozenset()
+            paragraphs.append((_element_text(element), enclosing))
+
+        open_tags[tag] = open_tags.get(tag, 0) + 1
+
+    title = title_hits[min(title_hits)] if title_hits else None
+
+    published_date = None
+    for index in sorted(meta_hits):
+        if meta_hits[index]:
+            published_date = meta_hits[index]
+            break
+    if published_date is None:
+        if first_time_element is not None:
+            published_date = (first_time_element.get('datetime') or '').strip() or _element_text(first_time_element)
+        elif first_date_display_text is not None:
+            published_date = first_date_display_text
+
+    # 가장 우선순위가 높은 컨테이너 안의 문단만, 없으면 문서 전체의 문단
+    best_container = min(content_found) if content_found else None
+    body_parts = [
+        text for text, enclosing in paragraphs
+        if (best_container is None or best_container in enclosing) and len(text) > MIN_PARAGRAPH_LENGTH
+    ]
+    body = "\n".join(body_parts) if body_parts else None
+
+    return title, published_date, body
@@ -0,0 +1,137 @@
+import html
+from html.parser import HTMLParser
+import pandas as pd
+from bs4 import BeautifulSoup
+from bs4.dammit import EntitySubstitution
+
+# --- HTML 태그 제거 (clean_html_text 엔진) ---
+# newspaper3k가 돌려주는 제목/본문은 대부분 이미 일반 텍스트이므로 '<'와 '&'가 없으면 파싱 없이 strip()만 합니다.
+# 마크업이 있는 값은 트리를 만들지 않는 스트리밍 파서로 텍스트 조각만 모읍니다.
+# 결과는 BeautifulSoup(text, "html.parser").get_text(separator=" ", strip=True)와 같도록 맞춥니다:
+# 태그/주석으로 끊긴 텍스트 조각마다 strip() 후 빈 조각을 빼고 공백 하나로 연결, script/style/template 내용과
+# 주석/DOCTYPE/처리 명령은 제외, CDATA 내용은 포함, 알 수 없는 엔티티는 '&이름' 그대로 둡니다.
+EXCLUDED_TEXT_TAGS = {"script", "style", "template"} # 안의 문자열(중첩 태그 포함)이 get_text에서 빠지는 태그
+# 닫는 태그 없이 바로 닫히는 태그 (BeautifulSoup html.parser 빌더의 empty_element_tags와 같음)
+VOID_ELEMENTS = {
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr", "image", "img", "input",
+    "isindex", "keygen", "link", "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+}
+
+
+def is_plain_text(text):
+    """태그나 엔티티가 없어 파싱이 필요 없는 값이면 True."""
+    return "<" not in text and "&" not in text
+
+
+class _TextStripper(HTMLParser):
+    """태그를 버리고 텍스트 조각만 모으는 HTMLParser (트리를 만들지 않음)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False) # 엔티티는 BeautifulSoup과 같은 규칙으로 직접 변환
+        self.chunks = []        # strip된 텍스트 조각
+        self._pending = []      # 아직 태그로 끊기지 않은 현재 텍스트 조각의 부분들
+        self._open_tags = []    # 열린 태그 스택 (닫는 태그가 조상 태그를 닫으면 그 안의 태그도 함께 닫힘)
+        self._excluded_open = 0 # 스택에 있는 EXCLUDED_TEXT_TAGS 수
+        self._closed_void_tags = [] # <img>처럼 이미 닫힌 빈 태그 (뒤따르는 </img>는 텍스트를 끊지 않음)
+
+    def _flush(self):
+        if self._pending:
+            text = "".join(self._pending).strip()
+            self._pending = []
+            if text:
+                self.chunks.append(text)
+
+    def handle_data(self, data):
+        if not self._excluded_open:
+            self._pending.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in VOID_ELEMENTS:
+            self._closed_void_tags.append(tag)
+            return
+        self._open_tags.append(tag)
+        if tag in EXCLUDED_TEXT_TAGS:
+            self._excluded_open += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void_tags:
+            self._closed_void_tags.remove(tag)
+            return
+        self._flush()
+        if tag not in self._open_tags: # 열리지 않은 태그의 닫는 태그는 무시
+            return
+        while self._open_tags:
+            closed_tag = self._open_tags.pop()
+            if closed_tag in EXCLUDED_TEXT_TAGS:
+                self._excluded_open -= 1
+            if closed_tag == tag:
+                break
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+    def handle_charref(self, name):
+        self.handle_data(html.unescape(f"&#{name};"))
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["): # CDATA 내용은 template 안에서도 텍스트로 포함
+            text = data[len("CDATA["):].strip()
+            if text:
+                self.chunks.append(text)
+
+    def get_text(self, markup):
+        self.feed(markup)
+        self.close()
+        self._flush()
+        return " ".join(self.chunks)
+
+
+def strip_html_markup(markup):
+    """마크업이 있는 문자열의 텍스트를 추출합니다. 파서가 처리하지 못하면 BeautifulSoup으로 다시 시도합니다."""
+    try:
+        return _TextStripper().get_text(markup)
+    except Exception:
+        return BeautifulSoup(markup, "html.parser").get_text(separator=" ", strip=True)
+
+
+def clean_html_text(raw_html):
+    """값 하나의 태그를 제거한 텍스트. 비어 있거나 NaN이면 빈 문자열."""
+    if not raw_html or pd.isna(raw_html): return ""
+    text = str(raw_html)
+    if is_plain_text(text):
+        return text.strip()
+    try:
+        return strip_html_markup(text)
+    except Exception:
+        return text # 파싱 불가 시 원본 반환
+
+
+def clean_html_text_column(values):
+    """
+    clean_html_text의 열 단위 버전. 일반 텍스트 값은 str 벡터 연산으로 strip하고,
+    마크업이 있는 값만 (중복 제거 후) 하나씩 파싱합니다. 입력과 같은 인덱스의 문자열 Series를 반환합니다.
+    """
+    values = pd.Series(values, dtype=object)
+    text = values.astype(str).where(values.notna(), "")
+    cleaned = text.str.strip()
+    has_markup = text.str.contains("[<&]", regex=True)
+    if has_markup.any():
+        markup_values = text[has_markup]
+        stripped = {value: clean_html_text(value) for value in markup_values.unique()}
+        cleaned[has_markup] = markup_values.map(stripped)
+    return cleaned.astype(object)
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from http_session import get_shared_session
+from url_canonicalizer import canonicalize_url
+
+# --- HTTP 응답 디스크 캐시 설정 ---
+# 매 스케줄 실행마다 바뀌지 않은 기사 HTML을 다시 받지 않도록, 본문과 ETag/Last-Modified를 저장하고
+# 조건부 요청(If-None-Match / If-Modified-Since)으로 재검증합니다.
+HTTP_CACHE_DB_PATH = "http_response_cache.sqlite3"
+HTTP_CACHE_FRESH_TTL_SECONDS = 6 * 3600        # 이 시간 안에 받은 응답은 네트워크 요청 없이 그대로 사용
+HTTP_CACHE_MAX_ENTRY_AGE_SECONDS = 30 * 86400  # 이 기간 동안 사용되지 않은 항목은 삭제
+HTTP_CACHE_MAX_TOTAL_BYTES = 200 * 1024 * 1024 # 압축된 본문 총 크기 상한 (초과 시 LRU 삭제)
+
+# fetch 결과 상태값
+CACHE_STATUS_FRESH = "fresh"             # TTL 안의 캐시 사용 (네트워크 전송 없음)
+CACHE_STATUS_REVALIDATED = "revalidated" # 304 Not Modified (본문 전송 없음)
+CACHE_STATUS_DOWNLOADED = "downloaded"   # 새로 받은 본문 (200)
+
+
+def cache_key_for_url(url):
+    """캐시 키로 사용할 URL 정규형을 만듭니다 (url_canonicalizer.canonicalize_url과 동일)."""
+    return canonicalize_url(url)
+
+
+class CachedFetchResult:
+    """HttpResponseCache.fetch의 반환값. status가 fresh/revalidated이면 본문은 캐시에서 온 것입니다."""
+    def __init__(self, status, text, parsed=None):
+        self.status = status
+        self.text = text
+        self.parsed = parsed # 이전에 저장된 파싱 결과 (없으면 None)
+
+    @property
+    def from_cache(self):
+        return self.status in (CACHE_STATUS_FRESH, CACHE_STATUS_REVALIDATED)
+
+
+class HttpResponseCache:
+    """SQLite 파일 하나에 압축된 응답 본문, 검증자(ETag/Last-Modified), 크롤러별 파싱 결과를 저장하는 캐시."""
+
+    def __init__(self, db_path=HTTP_CACHE_DB_PATH, fresh_ttl_seconds=HTTP_CACHE_FRESH_TTL_SECONDS,
+                 max_entry_age_seconds=HTTP_CACHE_MAX_ENTRY_AGE_SECONDS, max_total_bytes=HTTP_CACHE_MAX_TOTAL_BYTES):
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), db_path)
+        self.db_path = db_path
+        self.fresh_ttl_seconds = fresh_ttl_seconds
+        self.max_entry_age_seconds = max_entry_age_seconds
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                size_bytes INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_last_accessed ON responses(last_accessed);
+            CREATE TABLE IF NOT EXISTS parsed_results (
+                url TEXT NOT NULL,
+                parser TEXT NOT NULL,
+                data_json TEXT NOT NULL,
+                PRIMARY KEY (url, parser)
+            );
+        """)
+        self._conn.commit()
+
+    # --- 내부 헬퍼 ---
+    def _load_entry(self, key):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT body, encoding, etag, last_modified, fetched_at FROM responses WHERE url = ?", (key,)
+            ).fetchone()
+
+    def _load_parsed(self, key, parser):
+        if not parser:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data_json FROM parsed_results WHERE url = ? AND parser = ?", (key, parser)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _touch(self, key, refreshed_at=None):
+        now = time.time()
+        with self._lock:
+            if refreshed_at is not None:
+                self._conn.execute("UPDATE responses SET last_accessed = ?, fetched_at = ? WHERE url = ?", (now, refreshed_at, key))
+            else:
+                self._conn.execute("UPDATE responses SET last_accessed = ? WHERE url = ?", (now, key))
+            self._conn.commit()
+
+    def _store_response(self, key, response):
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, body, encoding, etag, last_modified, fetched_at, last_accessed, size_bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, body, response.encoding, response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now, len(body)),
+            )
+            # 본문이 바뀌었으므로 이전 파싱 결과는 무효
+            self._conn.execute("DELETE FROM parsed_results WHERE url = ?", (key,))
+            self._conn.commit()
+
+    @staticmethod
+    def _decode_body(body_blob, encoding):
+        return zlib.decompress(body_blob).decode(encoding or "utf-8", errors="replace")
+
+    # --- 공개 API ---
+    def fetch(self, url, timeout=15, parser=None, before_network_request=None):
+        """
+        URL을 캐시 우선으로 가져옵니다.
+        - TTL 안의 항목: 네트워크 요청 없이 반환 (fresh)
+        - 오래된 항목: 조건부 GET으로 재검증, 304면 캐시 본문 반환 (revalidated)
+        - 그 외: 새로 다운로드하여 저장 (downloaded)
+        parser 이름을 주면 해당 크롤러가 저장해 둔 파싱 결과도 함께 반환합니다 (fresh/revalidated일 때만).
+        before_network_request(url)은 실제 네트워크 요청 직전에만 호출됩니다 (예: 도메인별 요청 간격 대기).
+        """
+        key = cache_key_for_url(url)
+        entry = self._load_entry(key)
+        now = time.time()
+
+        if entry:
+            body_blob, encoding, etag, last_modified, fetched_at = entry
+            if now - fetched_at < self.fresh_ttl_seconds:
+                self._touch(key)
+                return CachedFetchResult(CACHE_STATUS_FRESH, self._decode_body(body_blob, encoding), self._load_parsed(key, parser))
+
+            conditional_headers = {}
+            if etag:
+                conditional_headers["If-None-Match"] = etag
+            if last_modified:
+                conditional_headers["If-Modified-Since"] = last_modified
+            if before_network_request:
+                before_network_request(url)
+            response = get_shared_session().get(url, timeout=timeout, headers=conditional_headers)
+            if response.status_code == 304:
+                self._touch(key, refreshed_at=now)
+                return CachedFetchResult(CACHE_STATUS_REVALIDATED, self._decode_body(body_blob, encoding), self._load_parsed(key, parser))
+        else:
+            if before_network_request:
+                before_network_request(url)
+            response = get_shared_session().get(url, timeout=timeout)
+
+        response.raise_for_status()
+        self._store_response(key, response)
+        return CachedFetchResult(CACHE_STATUS_DOWNLOADED, response.text)
+
+    def store_parsed(self, url, parser, data):
+        """크롤러가 파싱한 결과(JSON 직렬화 가능한 dict)를 저장합니다. 다음 fresh/304 응답 시 파싱을 건너뛸 수 있습니다."""
+        key = cache_key_for_url(url)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parsed_results (url, parser, data_json) "
+                "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM responses WHERE url = ?)",
+                (key, parser, json.dumps(data, ensure_ascii=False), key),
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """오래된 항목(TTL 초과)과 총 크기 상한을 넘는 항목(LRU 순)을 삭제합니다. 삭제한 항목 수를 반환."""
+        cutoff = time.time() - self.max_entry_age_seconds
+        with self._lock:
+            stale_keys = [row[0] for row in self._conn.execute("SELECT url FROM responses WHERE last_accessed < ?", (cutoff,))]
+            total_bytes = self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM responses WHERE last_accessed >= ?", (cutoff,)).fetchone()[0]
+            lru_keys = []
+            if total_bytes > self.max_total_bytes:
+                for key, size_bytes in self._conn.execute(
+                        "SELECT url, size_bytes FROM responses WHERE last_accessed >= ? ORDER BY last_accessed ASC", (cutoff,)):
+                    if total_bytes <= self.max_total_bytes:
+                        break
+                    lru_keys.append(key)
+                    total_bytes -= size_bytes
+            keys_to_delete = [(key,) for key in stale_keys + lru_keys]
+            self._conn.executemany("DELETE FROM responses WHERE url = ?", keys_to_delete)
+            self._conn.executemany("DELETE FROM parsed_results WHERE url = ?", keys_to_delete)
+            self._conn.commit()
+        if keys_to_delete:
+            print(f"HTTP cache eviction: removed {len(stale_keys)} expired and {len(lru_keys)} LRU entries.")
+        return len(keys_to_delete)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- 프로세스 공유 캐시 인스턴스 ---
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_response_cache():
+    """두 크롤러가 공유하는 HttpResponseCache 인스턴스를 반환합니다 (최초 호출 시 생성)."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = HttpResponseCache()
+    return _shared_cache
@@ -0,0 +1,86 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- 공유 HTTP 세션 설정 ---
+# 두 크롤러(google_news_crawler.py, aljazeera_crawler.py)가 같은 세션을 사용하므로
+# 같은 뉴스 도메인에 반복 요청 시 TCP/TLS 연결을 재사용(keep-alive)합니다.
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
+POOL_HOSTS_CACHED = 50        # 연결 풀을 유지할 호스트 수
+POOL_MAX_CONNECTIONS_PER_HOST = 4 # 호스트당 최대 동시 연결 수 (크롤링 스레드 수와 맞춤)
+RETRY_TOTAL = 2               # 실패 시 재시도 횟수
+RETRY_BACKOFF_FACTOR = 0.5    # 재시도 간 대기: 0.5s, 1s, 2s ...
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504) # 재시도할 HTTP 상태 코드
+
+_shared_session = None
+_session_lock = threading.Lock()
+
+
+def build_pooled_session(pool_hosts=POOL_HOSTS_CACHED, max_connections_per_host=POOL_MAX_CONNECTIONS_PER_HOST,
+                         retry_total=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF_FACTOR,
+                         user_agent=DEFAULT_USER_AGENT):
+    """keep-alive 연결 풀과 재시도/백오프 정책이 설정된 requests.Session을 생성합니다."""
+    retry_policy = Retry(
+        total=retry_total,
+        connect=retry_total,
+        read=retry_total,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False, # 마지막 응답은 그대로 반환 (raise_for_status는 호출 측에서)
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_hosts,
+        pool_maxsize=max_connections_per_host,
+        max_retries=retry_policy,
+        pool_block=True, # 호스트당 연결 수 초과 시 새 연결을 만들지 않고 대기
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": user_agent,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_shared_session():
+    """프로세스 전체에서 공유하는 HTTP 세션을 반환합니다 (최초 호출 시 생성)."""
+    global _shared_session
+    if _shared_session is None:
+        with _session_lock:
+            if _shared_session is None:
+                _shared_session = build_pooled_session()
+    return _shared_session
+
+
+def configure_shared_session(**session_options):
+    """공유 세션을 새 설정(풀 크기, 재시도 횟수 등)으로 교체합니다. 인자는 build_pooled_session과 동일."""
+    global _shared_session
+    with _session_lock:
+        old_session = _shared_session
+        _shared_session = build_pooled_session(**session_options)
+    if old_session is not None:
+        old_session.close()
+    return _shared_session
+
+
+def close_shared_session():
+    """공유 세션과 열려 있는 연결들을 닫습니다 (파이프라인 종료 시 호출)."""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is not None:
+            _shared_session.close()
+            _shared_session = None
+
+
+def fetch_html(url, timeout=15, **request_kwargs):
+    """공유 세션으로 URL을 GET 하여 응답 객체를 반환합니다. HTTP 오류 시 예외 발생."""
+    response = get_shared_session().get(url, timeout=timeout, **request_kwargs)
+    response.raise_for_status()
+    return response
@@ -0,0 +1,106 @@
+import json
+import hashlib
+
+# --- 토큰 단위 키워드 매처 ---
+# KEYWORD_CONFIG / NEGATIVE_KEYWORDS의 구문을 lemma 토큰 트라이로 한 번 컴파일해 두고,
+# 기사의 lemma 목록을 한 번 훑어 키워드/부정 키워드 일치를 모두 찾습니다.
+# 토큰 단위로 비교하므로 'war'가 'award'나 'warn' 안에서 일치하지 않습니다.
+
+
+def phrase_tokens(phrase):
+    """구문을 기사 lemma 목록과 같은 기준(소문자, 불용어/비알파벳 제외)의 토큰 튜플로 바꿉니다."""
+    from spacy.lang.en.stop_words import STOP_WORDS # spaCy 패키지 임포트는 느리므로 매처를 만들 때 임포트
+    return tuple(word for word in phrase.lower().split() if word.isalpha() and word not in STOP_WORDS)
+
+
+class PhraseTrie:
+    """토큰 튜플 -> payload 목록을 저장하는 트라이. 토큰 목록의 모든 위치에서 일치하는 구문을 찾습니다."""
+
+    def __init__(self):
+        self._root = {}
+        self.max_depth = 0
+
+    def add(self, tokens, payload):
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(None, []).append(payload) # None 키: 이 위치에서 끝나는 구문의 payload
+        self.max_depth = max(self.max_depth, len(tokens))
+
+    def find_all(self, tokens):
+        """토큰 목록에서 일치하는 모든 구문의 payload를 (중복 포함) 생성합니다."""
+        root = self._root
+        num_tokens = len(tokens)
+        for start in range(num_tokens):
+            node = root.get(tokens[start])
+            position = start + 1
+            while node is not None:
+                if None in node:
+                    yield from node[None]
+                if position >= num_tokens:
+                    break
+                node = node.get(tokens[position])
+                position += 1
+
+
+class CompiledKeywordMatcher:
+    """
+    키워드 그룹 설정과 부정 키워드를 트라이로 컴파일한 매처.
+    lemmatize(phrase)가 주어지면 키워드의 lemma 형태(예: 'casualties' -> 'casualty')도 함께 등록하여
+    기사 lemma와 같은 기준으로 비교합니다.
+    """
+
+    def __init__(self, keyword_config, negative_keywords, title_multiplier, lemmatize=None):
+        self.title_multiplier = title_multiplier
+        self.keyword_weights = []   # 키워드 순번 -> 그룹 가중치
+        self.keyword_labels = []    # 키워드 순번 -> (그룹 이름, 키워드) (relevance_feature_matrix 열 이름)
+        self._keyword_trie = PhraseTrie()
+        for group_name, group_data in keyword_config.items():
+            for keyword in group_data["keywords"]:
+                keyword_index = len(self.keyword_weights)
+                variants = self._phrase_variants(keyword, lemmatize)
+                self.keyword_weights.append(group_data["weight"])
+                self.keyword_labels.append((group_name, keyword))
+                for tokens in variants:
+                    self._keyword_trie.add(tokens, keyword_index)
+
+        self.negative_phrases = []
+        self.negative_penalties = []
+        self._negative_trie = PhraseTrie()
+        for negative_index, (negative_keyword, penalty) in enumerate(negative_keywords.items()):
+            self.negative_phrases.append(negative_keyword)
+            self.negative_penalties.append(penalty)
+            for tokens in self._phrase_variants(negative_keyword, lemmatize):
+                self._negative_trie.add(tokens, negative_index)
+
+    @staticmethod
+    def _phrase_variants(phrase, lemmatize):
+        variants = [phrase_tokens(phrase)]
+        if lemmatize is not None:
+            variants.append(tuple(token for token in lemmatize(phrase) if token)) # lemmatizer 없는 모델은 빈 lemma를 반환
+        return [tokens for index, tokens in enumerate(variants) if tokens and tokens not in variants[:index]]
+
+    def keyword_hits(self, lemmas):
+        """lemma 목록에서 일치한 키워드 순번 집합."""
+        return set(self._keyword_trie.find_all(lemmas))
+
+    def negative_hits(self, lemmas):
+        """lemma 목록에서 일치한 부정 키워드 순번 집합."""
+        return set(self._negative_trie.find_all(lemmas))
+
+    def keyword_score(self, title_lemmas, body_lemmas):
+        """제목/본문 각각에서 일치한 키워드마다 가중치를 한 번씩 더합니다 (제목은 title_multiplier 배)."""
+        return (sum(self.keyword_weights[index] for index in self.keyword_hits(title_lemmas)) * self.title_multiplier
+                + sum(self.keyword_weights[index] for index in self.keyword_hits(body_lemmas)))
+
+    def negative_penalty(self, lemmas):
+        """lemma 목록에 나타난 부정 키워드마다 페널티를 한 번씩 더한 값 (0 이하)."""
+        return sum(self.negative_penalties[index] for index in self.negative_hits(lemmas))
+
+
+def keyword_config_signature(keyword_config, negative_keywords, title_multiplier, model_name=None):
+    """설정 내용(과 lemma에 쓰인 모델 이름)의 해시. 설정이 바뀌면 매처를 다시 컴파일하는 기준입니다."""
+    payload = json.dumps([keyword_config, negative_keywords, title_multiplier, model_name], sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,260 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from resource_registry import register_resource
+
+# --- news_articles 로컬 읽기 복제본 ---
+# API가 매 요청마다 Supabase까지 왕복하지 않도록 news_articles를 로컬 SQLite에 복제해 두고 피드 조회를 여기서 처리합니다.
+# Supabase가 원본이며, 파이프라인이 upsert 직후 저장한 행을 반영하고 주기적으로 전체 동기화(삭제 반영)를 합니다.
+# 키워드 검색은 FTS5 trigram 색인으로 Supabase의 ilike '%키워드%'(대소문자 무시 부분 문자열)와 같은 결과를 냅니다.
+NEWS_REPLICA_DB_PATH = "news_replica.sqlite3"
+NEWS_REPLICA_FULL_SYNC_INTERVAL_SECONDS = 24 * 3600 # 이 기간이 지나면 파이프라인 종료 시 Supabase에서 전체를 다시 받음
+NEWS_REPLICA_SYNC_PAGE_SIZE = 1000                  # 전체 동기화 시 한 번에 받는 행 수
+FTS_MIN_KEYWORD_LENGTH = 3                          # trigram 색인은 3글자 이상만 검색 가능 (더 짧으면 LIKE로 검색)
+NEWS_REPLICA_COLUMNS = ['id', 'title', 'published_date', 'url', 'body', 'relevance_score', 'image_url', 'country_iso_code']
+# 피드 정렬(relevance_score, published_date, id 내림차순, NULL은 마지막)용 생성 컬럼 sort_*의 NULL 대체값.
+# NULL을 어떤 실제 값보다 작은 값으로 바꿔 두면 같은 순서를 유지하면서 정렬 색인을 그대로 쓸 수 있음
+# (SQLite는 정수 < 문자열 순으로 비교하므로 NULL_SORT_ID는 정수/문자열 id 모두보다 작음).
+# id가 아직 없는 행끼리 순서가 정해지도록 마지막 정렬 키로 url(유일)을 씀.
+NULL_SORT_SCORE = -1e308
+NULL_SORT_DATE = ""
+NULL_SORT_ID = -2 ** 63
+
+
+def normalize_timestamp(value):
+    """날짜/시각 문자열을 UTC 'YYYY-MM-DDTHH:MM:SS+00:00'으로 맞춥니다 (문자열 비교로 범위 검색 가능). 해석 불가 시 None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+class NewsReplica:
+    """news_articles의 로컬 복제본. 쓰기는 하나의 연결과 락으로, 읽기는 스레드별 연결로 처리합니다."""
+
+    def __init__(self, db_path=NEWS_REPLICA_DB_PATH):
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), db_path)
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL") # API의 읽기가 파이프라인의 쓰기를 기다리지 않음
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS news_articles (
+                url TEXT PRIMARY KEY,
+                id,
+                title TEXT,
+                published_date TEXT,
+                body TEXT,
+                relevance_score REAL,
+                image_url TEXT,
+                country_iso_code TEXT,
+                sync_generation INTEGER NOT NULL DEFAULT 0,
+                sort_score GENERATED ALWAYS AS (COALESCE(relevance_score, {NULL_SORT_SCORE})) VIRTUAL,
+                sort_date GENERATED ALWAYS AS (COALESCE(published_date, '{NULL_SORT_DATE}')) VIRTUAL,
+                sort_id GENERATED ALWAYS AS (COALESCE(id, {NULL_SORT_ID})) VIRTUAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_news_country_feed_order
+                ON news_articles(country_iso_code, sort_score DESC, sort_date DESC, sort_id DESC, url DESC);
+            CREATE INDEX IF NOT EXISTS idx_news_feed_order ON news_articles(sort_score DESC, sort_date DESC, sort_id DESC, url DESC);
+            CREATE INDEX IF NOT EXISTS idx_news_published_date ON news_articles(published_date);
+            CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+                title, body, content='news_articles', content_rowid='rowid', tokenize='trigram'
+            );
+            CREATE TRIGGER IF NOT EXISTS news_articles_ai AFTER INSERT ON news_articles BEGIN
+                INSERT INTO news_fts(rowid, title, body) VALUES (new.rowid, new.title, new.body);
+            END;
+            CREATE TRIGGER IF NOT EXISTS news_articles_ad AFTER DELETE ON news_articles BEGIN
+                INSERT INTO news_fts(news_fts, rowid, title, body) VALUES ('delete', old.rowid, old.title, old.body);
+            END;
+            CREATE TRIGGER IF NOT EXISTS news_articles_au AFTER UPDATE OF title, body ON news_articles BEGIN
+                INSERT INTO news_fts(news_fts, rowid, title, body) VALUES ('delete', old.rowid, old.title, old.body);
+                INSERT INTO news_fts(rowid, title, body) VALUES (new.rowid, new.title, new.body);
+            END;
+            CREATE TABLE IF NOT EXISTS replica_meta (key TEXT PRIMARY KEY, value);
+        """)
+        self._conn.commit()
+
+    # --- 메타데이터 ---
+    def _get_meta(self, key, default=None):
+        row = self._read_conn().execute("SELECT value FROM replica_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO replica_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def last_full_sync_at(self):
+        return self._get_meta("last_full_sync_at")
+
+    def is_ready(self):
+        """전체 동기화를 한 번 이상 마친 복제본이면 True (그 전에는 API가 Supabase를 사용)."""
+        return self.last_full_sync_at() is not None
+
+    def needs_full_sync(self, interval_seconds=NEWS_REPLICA_FULL_SYNC_INTERVAL_SECONDS):
+        last_sync = self.last_full_sync_at()
+        return last_sync is None or time.time() - last_sync >= interval_seconds
+
+    # --- 쓰기 ---
+    def upsert_rows(self, rows, sync_generation=None):
+        """DB 행(dict) 목록을 url 기준으로 반영합니다. id가 없는 행은 기존 id를 유지합니다. 반영한 행 수를 반환."""
+        values = []
+        for row in rows:
+            if not row.get('url'):
+                continue
+            score = row.get('relevance_score')
+            values.append((
+                row['url'], row.get('id'), row.get('title'), normalize_timestamp(row.get('published_date')), row.get('body'),
+                float(score) if score is not None else None, row.get('image_url'), row.get('country_iso_code'),
+                sync_generation or 0,
+            ))
+        if not values:
+            return 0
+        with self._write_lock:
+            self._conn.executemany("""
+                INSERT INTO news_articles (url, id, title, published_date, body, relevance_score, image_url, country_iso_code, sync_generation)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    id = COALESCE(excluded.id, news_articles.id), title = excluded.title,
+                    published_date = excluded.published_date, body = excluded.body,
+                    relevance_score = excluded.relevance_score, image_url = excluded.image_url,
+                    country_iso_code = excluded.country_iso_code,
+                    sync_generation = MAX(excluded.sync_generation, news_articles.sync_generation)
+            """, values)
+            self._conn.commit()
+        return len(values)
+
+    def sync_from_supabase(self, db_client, table_name, page_size=NEWS_REPLICA_SYNC_PAGE_SIZE):
+        """Supabase 테이블 전체를 받아 복제본을 맞춥니다 (원본에 없는 행은 삭제). 받은 행 수를 반환, 실패 시 예외."""
+        start_time = time.time()
+        sync_generation = int(self._get_meta("sync_generation", 0)) + 1
+        num_rows = 0
+        offset = 0
+        while True:
+            response = db_client.table(table_name).select(", ".join(NEWS_REPLICA_COLUMNS)) \
+                .order('id').range(offset, offset + page_size - 1).execute()
+            error = getattr(response, 'error', None)
+            if error:
+                raise RuntimeError(str(error))
+            rows = response.data or []
+            num_rows += self.upsert_rows(rows, sync_generation=sync_generation)
+            if len(rows) < page_size:
+                break
+            offset += page_size
+        with self._write_lock:
+            num_deleted = self._conn.execute(
+                "DELETE FROM news_articles WHERE sync_generation < ?", (sync_generation,)
+            ).rowcount
+            self._set_meta("sync_generation", sync_generation)
+            self._set_meta("last_full_sync_at", time.time())
+            self._conn.commit()
+        print(f"News replica synced from Supabase: {num_rows} rows, {num_deleted} stale rows removed "
+              f"in {time.time() - start_time:.2f}s.")
+        return num_rows
+
+    # --- 읽기 ---
+    def _read_conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def build_filters(date_filter=None, keyword_filter=None, country_iso_filter=None):
+        """피드 필터를 (WHERE 절 목록, 파라미터 목록)으로 바꿉니다. 조건은 api_server의 Supabase 쿼리와 같습니다."""
+        clauses, params = [], []
+        if date_filter:
+            try:
+                day_start = datetime.strptime(date_filter, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+                clauses.append("published_date >= ? AND published_date < ?")
+                params += [day_start.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+                           (day_start + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S+00:00")]
+            except ValueError:
+                pass # 잘못된 날짜 형식은 Supabase 경로와 마찬가지로 무시
+        if keyword_filter and keyword_filter.strip():
+            keyword = keyword_filter.strip()
+            if len(keyword) >= FTS_MIN_KEYWORD_LENGTH:
+                clauses.append("rowid IN (SELECT rowid FROM news_fts WHERE news_fts MATCH ?)")
+                params.append('"' + keyword.replace('"', '""') + '"') # 구문 그대로 부분 문자열 검색
+            else:
+                clauses.append("(title LIKE ? OR body LIKE ?)")
+                params += [f"%{keyword}%", f"%{keyword}%"]
+        if country_iso_filter and country_iso_filter.strip():
+            clauses.append("country_iso_code = ?")
+            params.append(country_iso_filter.strip().upper())
+        return clauses, params
+
+    def query_feed(self, limit, date_filter=None, keyword_filter=None, country_iso_filter=None, offset=0, after=None):
+        """
+        관련도 점수, 발행일, id 내림차순(NULL은 마지막)으로 피드 행(dict) 목록을 반환합니다.
+        after(decode_feed_cursor 결과)가 주어지면 OFFSET 대신 그 커서 뒤의 행부터 읽습니다.
+        """
+        clauses, params = self.build_filters(date_filter, keyword_filter, country_iso_filter)
+        if after is not None:
+            # 정렬 컬럼에는 NULL이 없으므로 행 값 비교 하나로 색인에서 바로 커서 위치를 찾음
+            clauses.append("(sort_score, sort_date, sort_id, url) < (?, ?, ?, ?)")
+            params += [
+                after['relevance_score'] if after['relevance_score'] is not None else NULL_SORT_SCORE,
+                normalize_timestamp(after['published_date']) or NULL_SORT_DATE,
+                after['id'] if after['id'] is not None else NULL_SORT_ID,
+                after.get('url') or "",
+            ]
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._read_conn().execute(
+            f"SELECT {', '.join(NEWS_REPLICA_COLUMNS)} FROM news_articles {where_sql} "
+            f"ORDER BY sort_score DESC, sort_date DESC, sort_id DESC, url DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_feed(self, date_filter=None, keyword_filter=None, country_iso_filter=None):
+        """필터에 맞는 전체 행 수."""
+        clauses, params = self.build_filters(date_filter, keyword_filter, country_iso_filter)
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._read_conn().execute(f"SELECT COUNT(*) FROM news_articles {where_sql}", params).fetchone()[0]
+
+    def count(self):
+        return self._read_conn().execute("SELECT COUNT(*) FROM news_articles").fetchone()[0]
+
+    def close(self):
+        with self._write_lock:
+            self._conn.close()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# --- 프로세스 공유 인스턴스 ---
+def _open_news_replica():
+    try:
+        return NewsReplica()
+    except Exception as e:
+        print(f"Warning: Could not open news replica '{NEWS_REPLICA_DB_PATH}': {e}")
+        return None
+
+_news_replica_resource = register_resource("news_replica", _open_news_replica)
+
+def get_news_replica():
+    """파이프라인과 API 서버가 공유하는 NewsReplica를 반환합니다 (처음 호출 시 열기, 실패 시 None)."""
+    return _news_replica_resource.get()
+
+if __name__ == "__main__":
+    # 'python news_replica.py --sync': Supabase에서 복제본 전체 동기화
+    if "--sync" in sys.argv[1:]:
+        from run_pipeline import get_supabase_client, DB_NEWS_TABLE_NAME
+        client = get_supabase_client()
+        if not client:
+            sys.exit(1)
+        get_news_replica().sync_from_supabase(client, DB_NEWS_TABLE_NAME)
+    print(f"News replica '{NEWS_REPLICA_DB_PATH}': {get_news_replica().count()} rows.")
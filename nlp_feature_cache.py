@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+# --- spaCy 결과(특징) 캐시 설정 ---
+# 재실행/백필 때 같은 기사 본문을 spaCy로 다시 처리하지 않도록, 점수 계산과 국가 추출에 필요한
+# 특징(제목/본문 lemma 목록, 엔티티 텍스트와 라벨)만 hash(모델 버전 + 정제된 제목 + 본문) 키로 저장합니다.
+NLP_FEATURE_CACHE_DB_PATH = "nlp_feature_cache.sqlite3"
+NLP_FEATURE_CACHE_MAX_TOTAL_BYTES = 100 * 1024 * 1024 # 압축된 특징 총 크기 상한 (초과 시 LRU 삭제)
+NLP_FEATURE_SCHEMA_VERSION = 1 # 저장하는 특징 형식이 바뀌면 올려서 이전 항목을 무효화
+
+
+def feature_cache_key(model_id, title_text, body_text):
+    """모델 식별자와 (spaCy에 넘긴) 정제된 제목/본문으로 캐시 키를 만듭니다."""
+    digest = hashlib.sha256()
+    for part in (f"{model_id}|schema{NLP_FEATURE_SCHEMA_VERSION}", title_text, body_text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class NlpFeatureCache:
+    """내용 해시 -> 압축된 특징 JSON을 저장하는 SQLite 캐시. 여러 스레드에서 동시에 사용 가능."""
+
+    def __init__(self, db_path=NLP_FEATURE_CACHE_DB_PATH, max_total_bytes=NLP_FEATURE_CACHE_MAX_TOTAL_BYTES):
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), db_path)
+        self.db_path = db_path
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS nlp_features (
+                content_key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                last_accessed REAL NOT NULL,
+                size_bytes INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_nlp_features_last_accessed ON nlp_features(last_accessed);
+        """)
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """키 목록 중 캐시에 있는 항목을 {키: 특징 dict}로 반환하고 마지막 사용 시각을 갱신합니다."""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(keys), 500): # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, data in self._conn.execute(
+                        f"SELECT content_key, data FROM nlp_features WHERE content_key IN ({placeholders})", chunk):
+                    found[key] = json.loads(zlib.decompress(data))
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE nlp_features SET last_accessed = ? WHERE content_key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+        return found
+
+    def put_many(self, items):
+        """{키: 특징 dict}를 저장합니다."""
+        now = time.time()
+        rows = []
+        for key, features in items.items():
+            data = zlib.compress(json.dumps(features, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            rows.append((key, data, now, len(data)))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO nlp_features (content_key, data, last_accessed, size_bytes) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """총 크기 상한을 넘는 만큼 오래 사용되지 않은 항목부터 삭제합니다. 삭제한 항목 수를 반환."""
+        with self._lock:
+            total_bytes = self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM nlp_features").fetchone()[0]
+            keys_to_delete = []
+            if total_bytes > self.max_total_bytes:
+                for key, size_bytes in self._conn.execute(
+                        "SELECT content_key, size_bytes FROM nlp_features ORDER BY last_accessed ASC"):
+                    if total_bytes <= self.max_total_bytes:
+                        break
+                    keys_to_delete.append((key,))
+                    total_bytes -= size_bytes
+                self._conn.executemany("DELETE FROM nlp_features WHERE content_key = ?", keys_to_delete)
+                self._conn.commit()
+        if keys_to_delete:
+            print(f"NLP feature cache eviction: removed {len(keys_to_delete)} LRU entries.")
+        return len(keys_to_delete)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- 프로세스 공유 인스턴스 ---
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_nlp_feature_cache():
+    """전처리 단계가 공유하는 NlpFeatureCache 인스턴스를 반환합니다 (최초 호출 시 생성)."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = NlpFeatureCache()
+    return _shared_cache
@@ -1,23 +1,49 @@
 import pandas as pd
-from bs4 import BeautifulSoup
-import spacy
 # from spacy.matcher import Matcher # 현재 버전에서는 Matcher 직접 사용 안 함
 import re
 import json # GeoJSON 파일 로드용
 import os   # 파일 경로 확인용
-
-# --- spaCy 영어 모델 로드 ---
-NLP_EN = None
+from html_text_cleaner import clean_html_text, clean_html_text_column # 일반 텍스트는 파싱 없이, 마크업은 스트리밍 파서로 태그 제거
+from url_canonicalizer import canonicalize_url # URL 중복 판정 키 (추적 파라미터/AMP/http 차이 제거)
+from country_alias_index import CountryAliasIndex, load_country_records # 국가 별칭 색인
+from keyword_matcher import CompiledKeywordMatcher, keyword_config_signature # 키워드 구문 트라이 매처
+from nlp_feature_cache import get_shared_nlp_feature_cache, feature_cache_key # 내용 해시 기반 spaCy 결과 캐시
+from resource_registry import register_resource, warm_up # 모델/색인 지연 로드 (처음 사용할 때 한 번만)
+
+# --- spaCy 영어 모델 (지연 로드) ---
+# 모듈을 임포트할 때는 모델을 읽지 않고, get_nlp_model()이 처음 호출될 때 한 번만 로드합니다 (resource_registry).
+NLP_EN = None # 로드된 모델 (get_nlp_model()이 채움, 테스트에서는 직접 지정 가능)
 SPACY_MODEL_NAME = "en_core_web_sm"
-try:
-    NLP_EN = spacy.load(SPACY_MODEL_NAME)
-    print(f"spaCy English model '{SPACY_MODEL_NAME}' loaded successfully in preprocess_data.py.")
-except OSError:
-    print(f"spaCy model '{SPACY_MODEL_NAME}' not found. Please run: python -m spacy download {SPACY_MODEL_NAME}")
-    NLP_EN = None # 명시적으로 None 설정
-except Exception as e:
-    print(f"An error occurred while loading the spaCy model in preprocess_data.py: {e}")
-    NLP_EN = None
+# 점수 계산과 국가 추출에는 lemma(tok2vec/tagger/attribute_ruler/lemmatizer)와 NER만 필요하므로
+# 의존 구문 분석기(parser)는 끄고 실행합니다 (lemma/엔티티 결과는 동일).
+SPACY_DISABLED_COMPONENTS = ["parser", "senter"]
+SPACY_PIPE_BATCH_SIZE = 64 # nlp.pipe에 한 번에 넘기는 문서 수
+SPACY_N_PROCESS = 1        # nlp.pipe 프로세스 수 (대량 재처리 시 CPU 코어 수만큼 늘리면 처리량 증가)
+USE_NLP_FEATURE_CACHE = True # True면 같은 제목/본문은 spaCy 대신 nlp_feature_cache.sqlite3의 저장된 결과 사용
+
+def _load_spacy_model():
+    try:
+        import spacy # 패키지 임포트만으로도 시간이 걸리므로 모델이 처음 필요할 때 임포트
+        nlp = spacy.load(SPACY_MODEL_NAME)
+        for component_name in SPACY_DISABLED_COMPONENTS:
+            if component_name in nlp.pipe_names:
+                nlp.disable_pipe(component_name)
+        print(f"spaCy English model '{SPACY_MODEL_NAME}' loaded successfully in preprocess_data.py (active components: {', '.join(nlp.pipe_names)}).")
+        return nlp
+    except OSError:
+        print(f"spaCy model '{SPACY_MODEL_NAME}' not found. Please run: python -m spacy download {SPACY_MODEL_NAME}")
+    except Exception as e:
+        print(f"An error occurred while loading the spaCy model in preprocess_data.py: {e}")
+    return None
+
+_spacy_model_resource = register_resource("spacy_en", _load_spacy_model)
+
+def get_nlp_model():
+    """spaCy 모델을 반환합니다 (처음 호출 시 로드, 로드 실패 시 None)."""
+    global NLP_EN
+    if NLP_EN is None:
+        NLP_EN = _spacy_model_resource.get()
+    return NLP_EN
 
 # --- 설정값 ---
 RELEVANCE_THRESHOLD = 2.0 # 관련도 점수 임계값 (조정 가능)
@@ -33,10 +59,11 @@ GEOJSON_FILE_PATH = "countries_geo.json"
 # --- 국가명-ISO 코드 매핑 및 국가명 리스트 ---
 COUNTRY_ISO_MAP = {} # {'united states': 'US', 'south korea': 'KR', ...} (소문자 국가명 기준)
 ALL_COUNTRY_NAMES_LOWER = set() # {'united states', 'south korea', ...} (매칭용 소문자 국가명 세트)
+COUNTRY_ALIAS_INDEX = None # CountryAliasIndex: 엔티티 문자열 -> ISO 코드 (별칭/단어 트라이/demonym, 결과 메모)
 
 def load_country_data_from_geojson(geojson_path):
-    """GeoJSON 파일에서 국가명과 ISO_A2 코드를 로드하여 매핑 및 이름 세트 생성."""
-    global COUNTRY_ISO_MAP, ALL_COUNTRY_NAMES_LOWER
+    """GeoJSON 파일에서 국가명과 ISO_A2 코드를 로드하여 별칭 색인(COUNTRY_ALIAS_INDEX), 매핑 및 이름 세트 생성."""
+    global COUNTRY_ALIAS_INDEX
     # 경로가 절대 경로가 아니면, 이 스크립트 파일 위치 기준으로 구성
     if not os.path.isabs(geojson_path):
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -47,32 +74,12 @@ def load_country_data_from_geojson(geojson_path):
         return
 
     try:
-        with open(geojson_path, 'r', encoding='utf-8') as f:
-            geojson_data = json.load(f)
-        
-        for feature in geojson_data.get('features', []):
-            properties = feature.get('properties', {})
-            # GeoJSON 파일의 속성명에 따라 'ADMIN' 또는 'name' 등을 사용
-            country_name = properties.get('ADMIN') or properties.get('NAME') or properties.get('name') 
-            iso_a2 = properties.get('ISO_A2')
-            
-            if country_name and iso_a2 and iso_a2 != "-99": # 유효한 ISO A2 코드만
-                country_name_lower = str(country_name).lower().strip()
-                iso_a2_upper = str(iso_a2).upper().strip()
-                
-                COUNTRY_ISO_MAP[country_name_lower] = iso_a2_upper
-                ALL_COUNTRY_NAMES_LOWER.add(country_name_lower)
-                
-                # 추가적인 일반적인 이름 변형 (예시)
-                if "united states of america" in country_name_lower:
-                    for variant in ["united states", "u.s.", "usa", "america"]:
-                        COUNTRY_ISO_MAP[variant] = "US"
-                        ALL_COUNTRY_NAMES_LOWER.add(variant)
-                if "united kingdom" in country_name_lower:
-                     for variant in ["u.k.", "great britain", "britain"]:
-                        COUNTRY_ISO_MAP[variant] = "GB"
-                        ALL_COUNTRY_NAMES_LOWER.add(variant)
-                # (다른 국가들의 일반적인 별칭이나 약칭도 필요에 따라 추가)
+        # 주석이 포함된 파일과 ADMIN_NAME/ISO_A2_CODE 속성명도 처리 (country_alias_index.load_country_records)
+        COUNTRY_ALIAS_INDEX = CountryAliasIndex(load_country_records(geojson_path))
+        COUNTRY_ISO_MAP.clear()
+        COUNTRY_ISO_MAP.update(COUNTRY_ALIAS_INDEX.exact) # 정규화된 국가명/별칭/demonym -> ISO
+        ALL_COUNTRY_NAMES_LOWER.clear()
+        ALL_COUNTRY_NAMES_LOWER.update(COUNTRY_ISO_MAP)
 
         if COUNTRY_ISO_MAP:
             print(f"Successfully loaded {len(COUNTRY_ISO_MAP)} country-ISO mappings from '{geojson_path}'.")
@@ -81,19 +88,25 @@ def load_country_data_from_geojson(geojson_path):
     except Exception as e:
         print(f"An error occurred loading country mappings from '{geojson_path}': {e}")
 
-# 스크립트 로드 시 국가 매핑 정보 준비
-if NLP_EN: # NLP 모델이 로드되었을 때만 국가 매핑 시도 (NER에 필요)
+def _load_country_alias_index():
     load_country_data_from_geojson(GEOJSON_FILE_PATH)
+    return COUNTRY_ALIAS_INDEX
 
+_country_alias_index_resource = register_resource("country_alias_index", _load_country_alias_index)
+
+def get_country_alias_index():
+    """국가 별칭 색인을 반환합니다 (처음 호출 시 GeoJSON에서 생성, 실패 시 None)."""
+    if COUNTRY_ALIAS_INDEX is None:
+        return _country_alias_index_resource.get()
+    return COUNTRY_ALIAS_INDEX
+
+def warm_up_preprocessing():
+    """spaCy 모델과 국가 색인을 미리 로드합니다 (파이프라인 시작 시 호출). 모델을 쓸 수 있으면 True."""
+    warm_up("spacy_en", "country_alias_index")
+    return get_nlp_model() is not None
 
-# --- 텍스트 클리닝, 정규화, 요약 함수 ---
-def clean_html_text(raw_html):
-    if not raw_html or pd.isna(raw_html): return ""
-    try:
-        return BeautifulSoup(str(raw_html), "html.parser").get_text(separator=" ", strip=True)
-    except Exception:
-        return str(raw_html) # 이미 텍스트이거나 파싱 불가 시 원본 반환
 
+# --- 텍스트 클리닝, 정규화, 요약 함수 ---
 def normalize_iso_date(date_str):
     if not date_str or pd.isna(date_str): return None
     try:
@@ -107,6 +120,28 @@ def normalize_iso_date(date_str):
     except Exception:
         return None
 
+# google_news_crawler / aljazeera_crawler가 저장하는 날짜 형식 (열 단위 변환의 빠른 경로)
+CRAWLER_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def normalize_iso_date_column(values):
+    """
+    normalize_iso_date의 열 단위 버전. 날짜 열 전체를 pd.to_datetime 한 번으로 'YYYY-MM-DD'(또는 None)로 바꿉니다.
+    크롤러 형식이 아닌 값만 모아 형식 추론으로 한 번 더 파싱하고, 시간대가 섞여 있으면 그 값들만 행 단위로 처리합니다.
+    """
+    values = pd.Series(values, dtype=object)
+    text = values.astype(str).str.strip().where(values.notna(), '')
+    parsed = pd.to_datetime(text, format=CRAWLER_DATE_FORMAT, errors='coerce')
+    iso_dates = parsed.dt.strftime('%Y-%m-%d')
+    leftover = parsed.isna() & text.ne('')
+    if leftover.any():
+        leftover_text = text[leftover]
+        try:
+            reparsed = pd.to_datetime(leftover_text, format='mixed', errors='coerce')
+            iso_dates[leftover] = reparsed.dt.strftime('%Y-%m-%d')
+        except (ValueError, TypeError, AttributeError): # 시간대가 다른 값이 섞인 경우 (현지 날짜 유지를 위해 UTC 변환 안 함)
+            iso_dates[leftover] = leftover_text.map({value: normalize_iso_date(value) for value in leftover_text.unique()})
+    return iso_dates.astype(object).where(iso_dates.notna(), None)
+
 def create_text_snippet(full_text, max_length=MAX_BODY_SNIPPET_LENGTH):
     if not full_text or pd.isna(full_text): return ""
     text = str(full_text).strip()
@@ -117,6 +152,18 @@ def create_text_snippet(full_text, max_length=MAX_BODY_SNIPPET_LENGTH):
     last_space = snippet.rfind(' ')
     return snippet[:last_space] + "..." if last_space > 0 else snippet + "..."
 
+def create_text_snippet_column(texts, max_length=MAX_BODY_SNIPPET_LENGTH):
+    """create_text_snippet의 열 단위 버전 (str 벡터 연산). 긴 본문은 마지막 공백 앞에서 잘라 '...'을 붙입니다."""
+    texts = pd.Series(texts, dtype=object)
+    text = texts.astype(str).str.strip().where(texts.notna(), '')
+    is_long = text.str.len() > max_length
+    if not is_long.any():
+        return text
+    # 정제된 본문은 앞 공백이 없으므로 마지막 공백 앞까지 (공백이 없으면 그대로) 남김
+    cut = text[is_long].str.slice(0, max_length).str.replace(r" [^ ]*\Z", "", regex=True)
+    text[is_long] = cut + "..."
+    return text
+
 # --- 관련도 점수 계산 함수 (키워드 기반) ---
 # 실제 키워드와 가중치는 프로젝트의 상세 요구사항에 맞게 정의해야 합니다.
 # 이 KEYWORD_CONFIG는 이전 답변에서 제공된 상세 버전을 사용하거나, 직접 정의해야 합니다.
@@ -129,67 +176,145 @@ KEYWORD_CONFIG = {
 }
 NEGATIVE_KEYWORDS = {"peace talks": -1.0, "peace agreement": -2.0, "sports match": -3.0, "war on drugs": -2.0, "trade war": -2.0, "historical war": -1.5}
 TITLE_MULTIPLIER = 1.5
-
-def calculate_relevance_score(title_doc, body_doc, keyword_config, negative_keywords, title_multiplier):
-    if not NLP_EN: return 0.0
+# 선택적 설정 파일: 있으면 {"keyword_config": {...}, "negative_keywords": {...}}로 위 기본값을 덮어씀.
+# 파일이 바뀌면(수정 시각 기준) 다음 배치부터 자동으로 다시 읽고 매처를 다시 컴파일합니다.
+KEYWORD_CONFIG_PATH = "keyword_config.json"
+_keyword_config_file_mtime = None
+
+def reload_keyword_config_if_changed():
+    """KEYWORD_CONFIG_PATH 파일이 새로 생겼거나 바뀌었으면 KEYWORD_CONFIG / NEGATIVE_KEYWORDS를 다시 읽습니다."""
+    global KEYWORD_CONFIG, NEGATIVE_KEYWORDS, _keyword_config_file_mtime
+    config_path = KEYWORD_CONFIG_PATH
+    if not os.path.isabs(config_path):
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), config_path)
+    try:
+        mtime = os.path.getmtime(config_path)
+    except OSError:
+        return False
+    if mtime == _keyword_config_file_mtime:
+        return False
+    _keyword_config_file_mtime = mtime
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            loaded_config = json.load(f)
+        KEYWORD_CONFIG = loaded_config.get('keyword_config', KEYWORD_CONFIG)
+        NEGATIVE_KEYWORDS = loaded_config.get('negative_keywords', NEGATIVE_KEYWORDS)
+        print(f"Loaded keyword configuration from '{config_path}'.")
+        return True
+    except Exception as e:
+        print(f"Warning: Could not load keyword configuration from '{config_path}': {e}")
+        return False
+
+_keyword_matcher_cache = {} # 설정 해시 -> CompiledKeywordMatcher (설정이 바뀌면 다시 컴파일)
+
+def _lemmatize_phrase(phrase):
+    return [token.lemma_.lower() for token in get_nlp_model()(phrase) if not token.is_stop and not token.is_punct and token.is_alpha]
+
+def get_keyword_matcher(keyword_config=None, negative_keywords=None, title_multiplier=None):
+    """설정(기본값: 현재 KEYWORD_CONFIG / NEGATIVE_KEYWORDS / TITLE_MULTIPLIER)으로 컴파일된 매처를 반환합니다."""
+    keyword_config = KEYWORD_CONFIG if keyword_config is None else keyword_config
+    negative_keywords = NEGATIVE_KEYWORDS if negative_keywords is None else negative_keywords
+    title_multiplier = TITLE_MULTIPLIER if title_multiplier is None else title_multiplier
+    nlp = get_nlp_model()
+    model_name = SPACY_MODEL_NAME if nlp else None
+    signature = keyword_config_signature(keyword_config, negative_keywords, title_multiplier, model_name)
+    matcher = _keyword_matcher_cache.get(signature)
+    if matcher is None:
+        matcher = CompiledKeywordMatcher(keyword_config, negative_keywords, title_multiplier,
+                                         lemmatize=_lemmatize_phrase if nlp else None)
+        if len(_keyword_matcher_cache) >= 8: # 이전 설정의 매처는 버림
+            _keyword_matcher_cache.clear()
+        _keyword_matcher_cache[signature] = matcher
+    return matcher
+
+# --- 관련도 특징 행렬 기록 ---
+# True면 spaCy 특징을 계산한 기사마다 (키워드 일치/NER 라벨 수/부정 키워드 일치) 행을 모아 relevance_features.npz에 누적 저장합니다.
+# 저장된 행렬로 가중치/임계값을 바꿨을 때의 점수를 spaCy 없이 다시 계산할 수 있습니다 (relevance_feature_matrix.py).
+# relevance_feature_matrix는 scipy를 임포트하므로 처음 행을 기록할 때 임포트합니다 (모듈 임포트 시간 단축).
+RECORD_RELEVANCE_FEATURES = True
+_relevance_feature_builder = None # RelevanceFeatureMatrixBuilder (첫 기록 시 생성)
+
+def record_relevance_features(prepared, features):
+    global _relevance_feature_builder
+    if not RECORD_RELEVANCE_FEATURES:
+        return
+    if _relevance_feature_builder is None:
+        from relevance_feature_matrix import RelevanceFeatureMatrixBuilder # 가중치/임계값 재계산용 희소 특징 행렬
+        _relevance_feature_builder = RelevanceFeatureMatrixBuilder()
+    _relevance_feature_builder.add_row(prepared['url_key'], get_keyword_matcher(), features)
+
+def save_relevance_features():
+    """이번 실행에서 모은 특징 행을 기존 relevance_features 파일과 (URL 기준으로) 합쳐 저장합니다."""
+    global _relevance_feature_builder
+    if not RECORD_RELEVANCE_FEATURES or _relevance_feature_builder is None or not len(_relevance_feature_builder):
+        return
+    try:
+        from relevance_feature_matrix import RelevanceFeatureMatrix
+        feature_matrix = _relevance_feature_builder.build()
+        previous_matrix = RelevanceFeatureMatrix.load()
+        if previous_matrix is not None:
+            feature_matrix = previous_matrix.merged_with(feature_matrix)
+        feature_matrix.save()
+        print(f"Relevance feature matrix saved: {feature_matrix.matrix.shape[0]} articles x {feature_matrix.matrix.shape[1]} features.")
+        _relevance_feature_builder = None
+    except Exception as e:
+        print(f"Warning: Could not save relevance feature matrix: {e}")
+
+# 텍스트에서 lemma 추출 (불용어, 구두점, 숫자 아닌 것 제외)
+def get_lemmas(doc):
+    return [token.lemma_.lower() for token in doc if not token.is_stop and not token.is_punct and token.is_alpha]
+
+def extract_nlp_features(title_doc, body_doc):
+    """점수 계산과 국가 추출에 필요한 spaCy 결과만 JSON으로 저장 가능한 dict로 뽑습니다 (nlp_feature_cache에 저장되는 형식)."""
+    return {
+        'title_lemmas': get_lemmas(title_doc),
+        'body_lemmas': get_lemmas(body_doc),
+        'title_entities': [[ent.text, ent.label_] for ent in title_doc.ents],
+        'body_entities': [[ent.text, ent.label_] for ent in body_doc.ents],
+    }
+
+def calculate_relevance_score_from_features(features, keyword_config, negative_keywords, title_multiplier):
+    """extract_nlp_features 결과로 관련도 점수를 계산합니다."""
     score = 0.0
-    
-    # 텍스트에서 lemma 추출 (불용어, 구두점, 숫자 아닌 것 제외)
-    def get_lemmas(doc):
-        return [token.lemma_.lower() for token in doc if not token.is_stop and not token.is_punct and token.is_alpha]
-
-    title_lemmas = get_lemmas(title_doc)
-    body_lemmas = get_lemmas(body_doc)
-
-    # 키워드 점수 계산
-    for group_name, group_data in keyword_config.items():
-        group_score = 0
-        for keyword in group_data["keywords"]:
-            # 제목에서 키워드 찾기 (부분 일치도 가능하게)
-            if any(keyword in lemma_seq for lemma_seq in [" ".join(title_lemmas[i:i+len(keyword.split())]) for i in range(len(title_lemmas))]):
-                group_score += group_data["weight"] * title_multiplier
-            # 본문에서 키워드 찾기
-            if any(keyword in lemma_seq for lemma_seq in [" ".join(body_lemmas[i:i+len(keyword.split())]) for i in range(len(body_lemmas))]):
-                group_score += group_data["weight"]
-        score += group_score
+    title_lemmas = features['title_lemmas']
+    body_lemmas = features['body_lemmas']
+    keyword_matcher = get_keyword_matcher(keyword_config, negative_keywords, title_multiplier)
+
+    # 키워드 점수 계산 (컴파일된 트라이로 lemma 목록을 한 번씩 훑음, 토큰 단위 일치)
+    score += keyword_matcher.keyword_score(title_lemmas, body_lemmas)
 
     # NER 엔티티 기반 점수 (선택적, 예시)
-    for entity in list(title_doc.ents) + list(body_doc.ents):
+    for _, entity_label in features['title_entities'] + features['body_entities']:
         for group_data in keyword_config.values():
-            if entity.label_ in group_data.get("ner_tags", []):
+            if entity_label in group_data.get("ner_tags", []):
                 score += group_data["weight"] * 0.2 # NER 태그는 가중치 약간 낮게
 
-    # 부정 키워드 페널티
-    full_text_lemmas = " " + " ".join(title_lemmas + body_lemmas) + " " # 앞뒤 공백 추가하여 정확한 단어 매칭
-    for neg_keyword, penalty in negative_keywords.items():
-        if f" {neg_keyword} " in full_text_lemmas:
-            score += penalty
+    # 부정 키워드 페널티 (제목과 본문 lemma를 이어서 검색)
+    score += keyword_matcher.negative_penalty(title_lemmas + body_lemmas)
             
     return max(0, score) # 점수는 0 이상
 
+def calculate_relevance_score(title_doc, body_doc, keyword_config, negative_keywords, title_multiplier):
+    if not get_nlp_model(): return 0.0
+    return calculate_relevance_score_from_features(
+        extract_nlp_features(title_doc, body_doc), keyword_config, negative_keywords, title_multiplier
+    )
+
 
 # --- 국가 ISO 코드 추출 함수 ---
-def extract_main_country_iso(title_doc, body_doc):
-    """제목과 본문에서 가장 관련 있는 국가의 ISO 코드를 추출합니다."""
-    if not NLP_EN or not COUNTRY_ISO_MAP: return ""
+def extract_main_country_iso_from_features(features):
+    """extract_nlp_features 결과의 GPE 엔티티에서 가장 많이 언급된 국가의 ISO 코드를 추출합니다."""
+    country_alias_index = get_country_alias_index()
+    if country_alias_index is None: return ""
     
     mentioned_country_isos = {} # {'US': 2, 'RU': 1} (ISO 코드: 언급 빈도)
 
-    # NER의 GPE 엔티티와 직접 매칭되는 국가명에서 ISO 코드 추출
-    for doc in [title_doc, body_doc]:
-        for ent in doc.ents:
-            if ent.label_ == "GPE":
-                entity_text_lower = ent.text.lower().strip()
-                if entity_text_lower in COUNTRY_ISO_MAP:
-                    iso = COUNTRY_ISO_MAP[entity_text_lower]
-                    mentioned_country_isos[iso] = mentioned_country_isos.get(iso, 0) + 1
-                else: # 직접 매칭 안될 시, 더 넓은 국가명 세트에서 부분 포함 확인 (느릴 수 있음)
-                    for country_name_variant in ALL_COUNTRY_NAMES_LOWER:
-                        if country_name_variant in entity_text_lower or entity_text_lower in country_name_variant:
-                            iso = COUNTRY_ISO_MAP.get(country_name_variant)
-                            if iso:
-                                mentioned_country_isos[iso] = mentioned_country_isos.get(iso, 0) + 1
-                                break # 하나의 GPE에 대해 하나의 ISO 매칭
+    # NER의 GPE 엔티티를 별칭 색인으로 ISO 코드로 변환 (정확 일치 -> 포함된 별칭 -> 별칭 일부, 결과는 메모됨)
+    for entity_text, entity_label in features['title_entities'] + features['body_entities']:
+        if entity_label == "GPE":
+            iso = country_alias_index.resolve(entity_text)
+            if iso:
+                mentioned_country_isos[iso] = mentioned_country_isos.get(iso, 0) + 1
 
     # 빈도수가 가장 높은 ISO 코드 반환, 동일 빈도 시 알파벳 순
     if mentioned_country_isos:
@@ -197,96 +322,247 @@ def extract_main_country_iso(title_doc, body_doc):
     
     return ""
 
+def extract_main_country_iso(title_doc, body_doc):
+    """제목과 본문에서 가장 관련 있는 국가의 ISO 코드를 추출합니다."""
+    if not get_nlp_model(): return ""
+    return extract_main_country_iso_from_features(extract_nlp_features(title_doc, body_doc))
+
 
 # --- 데이터 전처리 및 필터링 주 함수 ---
+OUTPUT_DF_COLUMNS = ['Title', 'Published Date', 'URL', 'Body_Snippet', 'Relevance_Score', 'Image_URL', 'Country_ISO_Code', 'Full_Body']
+INPUT_CSV_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NULL', 'NaN', 'n/a', 'nan', 'null']
+
+def prepare_article_for_scoring(article, unique_urls=None, text_is_clean=False):
+    """
+    크롤링된 기사 하나(dict 또는 Series: title, body, url, published_date, image_url)를 정제합니다 (spaCy 실행 전 단계).
+    URL이 없거나 이미 처리했거나 텍스트가 너무 짧으면 None, 아니면 정제된 필드 dict를 반환합니다.
+    text_is_clean=True면 제목/본문의 HTML 제거를 이미 했다고 보고 건너뜁니다 (coerce_article_columns 결과).
+    """
+    url = str(article.get('url', '')).strip() # 출력(DB 저장)에는 원래 URL을 그대로 사용
+    url_key = canonicalize_url(url) # 중복 판정은 정규형으로 (추적 파라미터/AMP 변형도 같은 기사)
+    if not url_key or (unique_urls is not None and url_key in unique_urls):
+        return None
+
+    title_raw = str(article.get('title', ''))
+    body_raw = str(article.get('body', '')) # google_news_crawler가 newspaper3k의 article.text를 body로 저장
+    
+    # published_date는 google_news_crawler가 '%Y-%m-%d %H:%M:%S' 또는 빈 문자열로 저장
+    published_date_raw = str(article.get('published_date', '')) 
+    image_url = str(article.get('image_url', '')).strip()
+
+    title_clean = title_raw if text_is_clean else clean_html_text(title_raw)
+    body_clean = body_raw if text_is_clean else clean_html_text(body_raw)
+
+    if not title_clean or len(body_clean) < MIN_TEXT_LENGTH_FOR_SCORING:
+        return None
+    return {
+        'url': url, 'url_key': url_key, 'title': title_clean, 'body': body_clean,
+        'published_date': published_date_raw, 'image_url': image_url,
+    }
+
+def score_prepared_article(prepared, features, unique_urls=None, format_fields=True):
+    """
+    정제된 기사와 spaCy 특징(extract_nlp_features)으로 점수를 매겨, 임계값을 통과하면 출력 행(dict, OUTPUT_DF_COLUMNS)을 반환합니다.
+    format_fields=False면 날짜/요약본 변환을 건너뜁니다 ('Published Date'는 원본 값, 'Body_Snippet'은 None).
+    여러 기사를 처리할 때는 finalize_output_columns로 열 단위로 한 번에 채웁니다.
+    """
+    url = prepared['url']
+    if unique_urls is not None and prepared['url_key'] in unique_urls: # 같은 배치 안에서 앞서 통과한 URL
+        return None
+
+    relevance_score = calculate_relevance_score_from_features(
+        features, KEYWORD_CONFIG, NEGATIVE_KEYWORDS, TITLE_MULTIPLIER
+    )
+
+    if relevance_score < RELEVANCE_THRESHOLD:
+        return None
+
+    if format_fields:
+        iso_date = normalize_iso_date(prepared['published_date'])
+        snippet = create_text_snippet(prepared['body'])
+    else:
+        iso_date, snippet = prepared['published_date'], None
+    country_iso = extract_main_country_iso_from_features(features)
+    image_url = prepared['image_url']
+
+    if unique_urls is not None:
+        unique_urls.add(prepared['url_key'])
+    return {
+        'Title': prepared['title'],
+        'Published Date': iso_date, # YYYY-MM-DD 형식 또는 None (format_fields=False면 원본 값)
+        'URL': url,
+        'Body_Snippet': snippet,
+        'Relevance_Score': round(relevance_score, 2),
+        'Image_URL': image_url if image_url and image_url.lower() != 'nan' else "",
+        'Country_ISO_Code': country_iso,
+        'Full_Body': prepared['body'] # 전체 본문 (선택적 저장)
+    }
+
+def preprocess_article_record(article, unique_urls=None):
+    """
+    크롤링된 기사 하나를 정제하고 점수를 매깁니다 (문서 단위 spaCy 실행; 여러 기사는 preprocess_articles_dataframe 사용).
+    관련도 임계값을 통과하면 출력 행(dict, OUTPUT_DF_COLUMNS)을, 아니면 None을 반환합니다.
+    unique_urls 세트를 넘기면 이미 처리한 URL은 건너뛰고, 통과한 URL을 세트에 추가합니다.
+    """
+    prepared = prepare_article_for_scoring(article, unique_urls)
+    if prepared is None:
+        return None
+    return score_prepared_article(prepared, compute_nlp_features([prepared])[0], unique_urls)
+
+def iter_title_body_docs(prepared_articles, batch_size=SPACY_PIPE_BATCH_SIZE, n_process=SPACY_N_PROCESS):
+    """정제된 기사들의 제목과 본문을 nlp.pipe로 한꺼번에 처리하여 (title_doc, body_doc) 쌍을 입력 순서대로 생성합니다."""
+    nlp = get_nlp_model()
+    texts = []
+    for prepared in prepared_articles:
+        texts.append(prepared['title'][:nlp.max_length]) # 길이 제한
+        texts.append(prepared['body'][:nlp.max_length])
+    docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+    for title_doc in docs:
+        yield title_doc, next(docs)
+
+def get_nlp_model_id():
+    """특징 캐시 키에 들어가는 모델 식별자 (모델 이름과 버전이 바뀌면 캐시 항목도 바뀜)."""
+    return f"{SPACY_MODEL_NAME}-{get_nlp_model().meta.get('version', '')}"
+
+def compute_nlp_features(prepared_articles):
+    """
+    정제된 기사들의 spaCy 특징 목록을 입력 순서대로 반환합니다.
+    USE_NLP_FEATURE_CACHE가 True면 내용 해시로 캐시를 먼저 조회하고, 없는 기사만 nlp.pipe로 처리한 뒤 저장합니다.
+    """
+    feature_cache = None
+    if USE_NLP_FEATURE_CACHE and prepared_articles:
+        try:
+            feature_cache = get_shared_nlp_feature_cache()
+        except Exception as e:
+            print(f"Warning: Could not open NLP feature cache, running spaCy for every article: {e}")
+    if feature_cache is None:
+        return [extract_nlp_features(title_doc, body_doc) for title_doc, body_doc in iter_title_body_docs(prepared_articles)]
+
+    model_id = get_nlp_model_id()
+    max_length = get_nlp_model().max_length
+    cache_keys = [
+        feature_cache_key(model_id, prepared['title'][:max_length], prepared['body'][:max_length])
+        for prepared in prepared_articles
+    ]
+    cached_features = feature_cache.get_many(cache_keys)
+    missing_positions = [position for position, key in enumerate(cache_keys) if key not in cached_features]
+    new_features = {}
+    missing_articles = [prepared_articles[position] for position in missing_positions]
+    for position, (title_doc, body_doc) in zip(missing_positions, iter_title_body_docs(missing_articles)):
+        new_features[cache_keys[position]] = extract_nlp_features(title_doc, body_doc)
+    if new_features:
+        feature_cache.put_many(new_features)
+    if cached_features:
+        print(f"NLP feature cache: {len(prepared_articles) - len(missing_positions)} hits, {len(missing_positions)} articles sent to spaCy.")
+    return [cached_features.get(key) or new_features[key] for key in cache_keys]
+
+ARTICLE_TEXT_COLUMNS = ['title', 'body', 'url', 'published_date', 'image_url'] # prepare_article_for_scoring이 읽는 입력 컬럼
+
+def coerce_article_columns(df):
+    """
+    입력 DataFrame의 기사 텍스트 컬럼을 열 단위로 문자열로 바꾸고 제목/본문의 HTML을 열 단위로 제거해
+    레코드(dict) 목록으로 반환합니다 (iterrows 대신 사용, prepare_article_for_scoring(..., text_is_clean=True)용).
+    """
+    coerced = pd.DataFrame(index=df.index)
+    for col in ARTICLE_TEXT_COLUMNS:
+        # 행 단위 str(article.get(col, ''))과 같은 결과 (NaN -> 'nan', None -> 'None')
+        coerced[col] = df[col].to_numpy(dtype=object).astype(str) if col in df.columns else ''
+    coerced['title'] = clean_html_text_column(coerced['title'])
+    coerced['body'] = clean_html_text_column(coerced['body'])
+    return coerced.to_dict(orient='records')
+
+def finalize_output_columns(output_df):
+    """score_prepared_article(format_fields=False) 결과의 날짜와 요약본을 열 단위로 채웁니다."""
+    output_df['Published Date'] = normalize_iso_date_column(output_df['Published Date'])
+    output_df['Body_Snippet'] = create_text_snippet_column(output_df['Full_Body'])
+    return output_df
+
+def preprocess_articles_dataframe(df, unique_urls=None):
+    """크롤링 결과 DataFrame을 정제/점수화하여 관련 기사만 담은 DataFrame(OUTPUT_DF_COLUMNS)을 반환합니다.
+    unique_urls 세트를 여러 호출에 걸쳐 공유하면 배치 간 URL 중복도 제거됩니다."""
+    if df is None or df.empty or not get_nlp_model():
+        return pd.DataFrame(columns=OUTPUT_DF_COLUMNS)
+    if unique_urls is None:
+        unique_urls = set()
+    reload_keyword_config_if_changed() # 설정 파일이 바뀌었으면 이번 배치부터 새 설정으로 점수 계산
+
+    df = df.copy()
+    # 입력 DataFrame 컬럼명 소문자 변환 및 공백 제거 (일관성 위해)
+    df.columns = [str(col).lower().replace(' ', '_') for col in df.columns]
+    # 필요한 컬럼 존재 확인
+    required_input_cols = ['title', 'body', 'url']
+    if not all(col in df.columns for col in required_input_cols):
+        print(f"Error: Input data must contain columns: {', '.join(required_input_cols)}")
+        return pd.DataFrame(columns=OUTPUT_DF_COLUMNS)
+
+    # 1) 정제 및 길이/URL 필터 (spaCy 없이)  2) 특징 캐시에 없는 기사의 제목/본문만 nlp.pipe로 일괄 처리  3) 점수화
+    prepared_articles = [
+        prepared for prepared in (prepare_article_for_scoring(record, unique_urls, text_is_clean=True) for record in coerce_article_columns(df))
+        if prepared is not None
+    ]
+    processed_articles = []
+    for prepared, features in zip(prepared_articles, compute_nlp_features(prepared_articles)):
+        record_relevance_features(prepared, features)
+        processed = score_prepared_article(prepared, features, unique_urls, format_fields=False)
+        if processed is not None:
+            processed_articles.append(processed)
+
+    if not processed_articles:
+        return pd.DataFrame(columns=OUTPUT_DF_COLUMNS)
+    output_df = finalize_output_columns(pd.DataFrame(processed_articles))
+    # 모든 컬럼이 있는지 확인하고, 없다면 빈 값으로 채움
+    for col in OUTPUT_DF_COLUMNS:
+        if col not in output_df.columns:
+            output_df[col] = None # 또는 ""
+    return output_df[OUTPUT_DF_COLUMNS].fillna("") # NaN을 빈 문자열로
+
+def iter_preprocessed_batches(article_iterable, batch_size=20):
+    """
+    크롤링된 기사(dict)를 하나씩 받는 이터러블을 batch_size 단위로 묶어 전처리하고,
+    (입력 배치 DataFrame, 관련 기사 DataFrame) 튜플을 차례로 생성합니다.
+    전체 데이터를 메모리에 모으지 않으므로 크롤링과 전처리/저장이 함께 진행될 수 있습니다.
+    """
+    unique_urls = set() # 배치 간 URL 중복 제거용
+    batch = []
+    for article in article_iterable:
+        batch.append(article)
+        if len(batch) >= batch_size:
+            batch_df = pd.DataFrame(batch)
+            yield batch_df, preprocess_articles_dataframe(batch_df, unique_urls)
+            batch = []
+    if batch:
+        batch_df = pd.DataFrame(batch)
+        yield batch_df, preprocess_articles_dataframe(batch_df, unique_urls)
+
 def preprocess_and_filter_data(input_csv_path="combined_crawled_news.csv", output_csv_path=CLEANED_NLP_NEWS_CSV_DEFAULT):
     print(f"\nStarting preprocessing for '{input_csv_path}' -> '{output_csv_path}'...")
-    if not NLP_EN:
+    if not get_nlp_model():
         print("spaCy NLP model not loaded. Preprocessing cannot proceed effectively.")
         # 빈 파일이라도 생성
-        pd.DataFrame(columns=['Title', 'Published Date', 'URL', 'Body_Snippet', 'Relevance_Score', 'Image_URL', 'Country_ISO_Code', 'Full_Body']).to_csv(output_csv_path, index=False, encoding='utf-8-sig')
+        pd.DataFrame(columns=OUTPUT_DF_COLUMNS).to_csv(output_csv_path, index=False, encoding='utf-8-sig')
         return
 
     try:
         # 입력 CSV 컬럼명은 google_news_crawler.py의 출력 컬럼명과 일치해야 함:
         # "title", "authors", "published_date", "body", "image_url", "keywords", "summary", "url"
-        df = pd.read_csv(input_csv_path, encoding='utf-8-sig', keep_default_na=False, na_values=['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NULL', 'NaN', 'n/a', 'nan', 'null'])
+        df = pd.read_csv(input_csv_path, encoding='utf-8-sig', keep_default_na=False, na_values=INPUT_CSV_NA_VALUES)
         if df.empty:
             print(f"Warning: Input CSV '{input_csv_path}' is empty.")
-            pd.DataFrame(columns=['Title', 'Published Date', 'URL', 'Body_Snippet', 'Relevance_Score', 'Image_URL', 'Country_ISO_Code', 'Full_Body']).to_csv(output_csv_path, index=False, encoding='utf-8-sig')
+            pd.DataFrame(columns=OUTPUT_DF_COLUMNS).to_csv(output_csv_path, index=False, encoding='utf-8-sig')
             return
     except FileNotFoundError:
         print(f"Error: Input CSV '{input_csv_path}' not found."); return
     except pd.errors.EmptyDataError:
         print(f"Warning: Input CSV '{input_csv_path}' is empty (EmptyDataError).")
-        pd.DataFrame(columns=['Title', 'Published Date', 'URL', 'Body_Snippet', 'Relevance_Score', 'Image_URL', 'Country_ISO_Code', 'Full_Body']).to_csv(output_csv_path, index=False, encoding='utf-8-sig')
-        return
-
-    processed_articles = []
-    unique_urls = set()
-
-    # 입력 DataFrame 컬럼명 소문자 변환 및 공백 제거 (일관성 위해)
-    df.columns = [col.lower().replace(' ', '_') for col in df.columns]
-    # 필요한 컬럼 존재 확인
-    required_input_cols = ['title', 'body', 'url']
-    if not all(col in df.columns for col in required_input_cols):
-        print(f"Error: Input CSV must contain columns: {', '.join(required_input_cols)}")
+        pd.DataFrame(columns=OUTPUT_DF_COLUMNS).to_csv(output_csv_path, index=False, encoding='utf-8-sig')
         return
 
-    for index, row in df.iterrows():
-        url = str(row.get('url', '')).strip()
-        if not url or url in unique_urls:
-            continue
-
-        title_raw = str(row.get('title', ''))
-        body_raw = str(row.get('body', '')) # google_news_crawler가 newspaper3k의 article.text를 body로 저장
-        
-        # published_date는 google_news_crawler가 '%Y-%m-%d %H:%M:%S' 또는 빈 문자열로 저장
-        published_date_raw = str(row.get('published_date', '')) 
-        image_url = str(row.get('image_url', '')).strip()
-
-        title_clean = clean_html_text(title_raw)
-        body_clean = clean_html_text(body_raw)
-
-        if not title_clean or len(body_clean) < MIN_TEXT_LENGTH_FOR_SCORING:
-            continue
-
-        title_doc = NLP_EN(title_clean[:NLP_EN.max_length]) # 길이 제한
-        body_doc = NLP_EN(body_clean[:NLP_EN.max_length])  # 길이 제한
-
-        relevance_score = calculate_relevance_score(
-            title_doc, body_doc, KEYWORD_CONFIG, NEGATIVE_KEYWORDS, TITLE_MULTIPLIER
-        )
-
-        if relevance_score >= RELEVANCE_THRESHOLD:
-            iso_date = normalize_iso_date(published_date_raw)
-            snippet = create_text_snippet(body_clean)
-            country_iso = extract_main_country_iso(title_doc, body_doc)
-
-            processed_articles.append({
-                'Title': title_clean,
-                'Published Date': iso_date, # YYYY-MM-DD 형식 또는 None
-                'URL': url,
-                'Body_Snippet': snippet,
-                'Relevance_Score': round(relevance_score, 2),
-                'Image_URL': image_url if image_url and image_url.lower() != 'nan' else "",
-                'Country_ISO_Code': country_iso,
-                'Full_Body': body_clean # 전체 본문 (선택적 저장)
-            })
-            unique_urls.add(url)
-    
-    output_df_columns = ['Title', 'Published Date', 'URL', 'Body_Snippet', 'Relevance_Score', 'Image_URL', 'Country_ISO_Code', 'Full_Body']
-    if processed_articles:
-        output_df = pd.DataFrame(processed_articles)
-        # 모든 컬럼이 있는지 확인하고, 없다면 빈 값으로 채움
-        for col in output_df_columns:
-            if col not in output_df.columns:
-                output_df[col] = None # 또는 ""
-        output_df = output_df[output_df_columns].fillna("") # NaN을 빈 문자열로
-        output_df.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
+    output_df = preprocess_articles_dataframe(df)
+    save_relevance_features()
+    output_df.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
+    if not output_df.empty:
         print(f"Preprocessing finished. {len(output_df)} relevant articles saved to '{output_csv_path}'.")
     else:
-        pd.DataFrame(columns=output_df_columns).to_csv(output_csv_path, index=False, encoding='utf-8-sig')
         print(f"No articles met the relevance threshold. Empty file '{output_csv_path}' saved.")
 
 if __name__ == "__main__":
@@ -295,7 +571,7 @@ if __name__ == "__main__":
     default_input = "combined_crawled_news.csv" 
     default_output = CLEANED_NLP_NEWS_CSV_DEFAULT
     
-    if not NLP_EN:
+    if not warm_up_preprocessing():
         print("Cannot run preprocess_data.py directly as spaCy model failed to load.")
     else:
         print(f"Running preprocess_data.py directly: input='{default_input}', output='{default_output}'")
@@ -0,0 +1,161 @@
+import os
+import json
+import numpy as np
+import scipy.sparse as sp
+
+# --- 관련도 특징 행렬 ---
+# 전처리 단계에서 spaCy를 거친 기사마다 (제목/본문 키워드 일치, NER 라벨 개수, 부정 키워드 일치)를
+# 희소 행렬의 한 행으로 저장해 두면, KEYWORD_CONFIG 가중치 / TITLE_MULTIPLIER / NEGATIVE_KEYWORDS 페널티 /
+# RELEVANCE_THRESHOLD를 바꿨을 때의 점수와 통과 기사 수를 spaCy 없이 행렬 곱 한 번으로 계산할 수 있습니다.
+# (새 키워드/구문 추가처럼 일치 여부 자체가 바뀌는 변경은 nlp_feature_cache의 lemma로 행렬을 다시 만들어야 함)
+RELEVANCE_FEATURES_PATH_PREFIX = "relevance_features" # <prefix>.npz (행렬) + <prefix>.json (열/행 이름)
+NER_BONUS_FACTOR = 0.2 # preprocess_data.calculate_relevance_score의 엔티티당 보너스 비율
+
+# 열 이름 형식
+TITLE_KEYWORD_COLUMN = "title_kw:{group}/{keyword}"
+BODY_KEYWORD_COLUMN = "body_kw:{group}/{keyword}"
+NER_LABEL_COLUMN = "ner:{label}"
+NEGATIVE_COLUMN = "neg:{phrase}"
+
+
+def _resolve_path(path):
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    return path
+
+
+class RelevanceFeatureMatrixBuilder:
+    """전처리 중 기사 특징을 행 단위로 모았다가 RelevanceFeatureMatrix로 만듭니다. 열은 이름으로 식별되어 설정이 바뀌어도 합칠 수 있습니다."""
+
+    def __init__(self):
+        self.row_keys = []
+        self.row_index = {}
+        self.column_index = {}
+        self._rows = []    # 행 번호 -> {열 번호: 값}
+
+    def _column(self, name):
+        column = self.column_index.get(name)
+        if column is None:
+            column = self.column_index[name] = len(self.column_index)
+        return column
+
+    def add_row(self, row_key, keyword_matcher, features):
+        """기사 하나(row_key: 보통 URL)의 특징을 추가합니다. 같은 키가 다시 들어오면 덮어씁니다."""
+        values = {}
+        for index in keyword_matcher.keyword_hits(features['title_lemmas']):
+            group, keyword = keyword_matcher.keyword_labels[index]
+            values[self._column(TITLE_KEYWORD_COLUMN.format(group=group, keyword=keyword))] = 1.0
+        for index in keyword_matcher.keyword_hits(features['body_lemmas']):
+            group, keyword = keyword_matcher.keyword_labels[index]
+            values[self._column(BODY_KEYWORD_COLUMN.format(group=group, keyword=keyword))] = 1.0
+        for _, entity_label in features['title_entities'] + features['body_entities']:
+            column = self._column(NER_LABEL_COLUMN.format(label=entity_label))
+            values[column] = values.get(column, 0.0) + 1.0
+        for index in keyword_matcher.negative_hits(features['title_lemmas'] + features['body_lemmas']):
+            values[self._column(NEGATIVE_COLUMN.format(phrase=keyword_matcher.negative_phrases[index]))] = 1.0
+
+        if row_key in self.row_index:
+            self._rows[self.row_index[row_key]] = values
+        else:
+            self.row_index[row_key] = len(self.row_keys)
+            self.row_keys.append(row_key)
+            self._rows.append(values)
+
+    def __len__(self):
+        return len(self.row_keys)
+
+    def build(self):
+        row_numbers, column_numbers, data = [], [], []
+        for row_number, values in enumerate(self._rows):
+            for column_number, value in values.items():
+                row_numbers.append(row_number)
+                column_numbers.append(column_number)
+                data.append(value)
+        matrix = sp.csr_matrix((data, (row_numbers, column_numbers)),
+                               shape=(len(self.row_keys), len(self.column_index)), dtype=np.float32)
+        columns = sorted(self.column_index, key=self.column_index.get)
+        return RelevanceFeatureMatrix(matrix, list(self.row_keys), columns)
+
+
+class RelevanceFeatureMatrix:
+    """기사 x 특징 희소 행렬 (CSR). rescore()로 새 가중치의 점수를, threshold_counts()로 임계값별 통과 기사 수를 계산합니다."""
+
+    def __init__(self, matrix, row_keys, columns):
+        self.matrix = matrix.tocsr()
+        self.row_keys = row_keys
+        self.columns = columns
+
+    # --- 저장/로드 ---
+    def save(self, path_prefix=RELEVANCE_FEATURES_PATH_PREFIX):
+        path_prefix = _resolve_path(path_prefix)
+        sp.save_npz(f"{path_prefix}.npz", self.matrix)
+        temp_path = f"{path_prefix}.json.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"row_keys": self.row_keys, "columns": self.columns}, f, ensure_ascii=False)
+        os.replace(temp_path, f"{path_prefix}.json")
+
+    @classmethod
+    def load(cls, path_prefix=RELEVANCE_FEATURES_PATH_PREFIX):
+        """저장된 행렬을 불러옵니다. 파일이 없으면 None."""
+        path_prefix = _resolve_path(path_prefix)
+        if not (os.path.exists(f"{path_prefix}.npz") and os.path.exists(f"{path_prefix}.json")):
+            return None
+        with open(f"{path_prefix}.json", "r", encoding="utf-8") as f:
+            names = json.load(f)
+        return cls(sp.load_npz(f"{path_prefix}.npz"), names["row_keys"], names["columns"])
+
+    def merged_with(self, newer):
+        """newer의 행으로 같은 키의 행을 교체하고 새 행/열을 더한 행렬을 반환합니다 (실행 간 누적 저장용)."""
+        columns = list(self.columns) + [name for name in newer.columns if name not in set(self.columns)]
+        column_position = {name: position for position, name in enumerate(columns)}
+
+        def widen(feature_matrix):
+            coo = feature_matrix.matrix.tocoo()
+            mapped_columns = np.array([column_position[name] for name in feature_matrix.columns], dtype=np.int64)
+            return sp.csr_matrix((coo.data, (coo.row, mapped_columns[coo.col] if coo.nnz else coo.col)),
+                                 shape=(feature_matrix.matrix.shape[0], len(columns)))
+
+        newer_keys = set(newer.row_keys)
+        kept_rows = [position for position, key in enumerate(self.row_keys) if key not in newer_keys]
+        matrix = sp.vstack([widen(self)[kept_rows], widen(newer)], format="csr")
+        return RelevanceFeatureMatrix(matrix, [self.row_keys[position] for position in kept_rows] + list(newer.row_keys), columns)
+
+    # --- 재점수화 ---
+    def weight_vector(self, keyword_config, negative_keywords, title_multiplier, ner_bonus_factor=NER_BONUS_FACTOR):
+        """설정으로 열별 가중치 벡터를 만듭니다. 설정에 없는 그룹/구문의 열은 0."""
+        group_weights = {group: group_data["weight"] for group, group_data in keyword_config.items()}
+        group_keywords = {group: set(group_data["keywords"]) for group, group_data in keyword_config.items()}
+        label_bonus = {}
+        for group_data in keyword_config.values():
+            for label in group_data.get("ner_tags", []):
+                label_bonus[label] = label_bonus.get(label, 0.0) + group_data["weight"] * ner_bonus_factor
+
+        weights = np.zeros(len(self.columns), dtype=np.float64)
+        for position, name in enumerate(self.columns):
+            kind, _, value = name.partition(":")
+            if kind in ("title_kw", "body_kw"):
+                group, _, keyword = value.partition("/")
+                if keyword in group_keywords.get(group, ()):
+                    weights[position] = group_weights[group] * (title_multiplier if kind == "title_kw" else 1.0)
+            elif kind == "ner":
+                weights[position] = label_bonus.get(value, 0.0)
+            elif kind == "neg":
+                weights[position] = negative_keywords.get(value, 0.0)
+        return weights
+
+    def rescore(self, keyword_config, negative_keywords, title_multiplier, ner_bonus_factor=NER_BONUS_FACTOR):
+        """모든 기사의 관련도 점수를 새 설정으로 다시 계산합니다 (행렬-벡터 곱 한 번). 반환값: 행 순서의 점수 배열."""
+        scores = self.matrix @ self.weight_vector(keyword_config, negative_keywords, title_multiplier, ner_bonus_factor)
+        return np.maximum(scores, 0.0) # 점수는 0 이상
+
+    @staticmethod
+    def threshold_counts(scores, thresholds):
+        """임계값별로 점수가 임계값 이상인 기사 수를 반환합니다. {임계값: 기사 수}"""
+        sorted_scores = np.sort(np.asarray(scores))
+        thresholds = np.asarray(list(thresholds), dtype=np.float64)
+        kept = len(sorted_scores) - np.searchsorted(sorted_scores, thresholds, side="left")
+        return dict(zip(thresholds.tolist(), kept.tolist()))
+
+    def kept_row_keys(self, scores, threshold):
+        """점수가 임계값 이상인 기사의 키(URL) 목록."""
+        return [self.row_keys[position] for position in np.flatnonzero(np.asarray(scores) >= threshold)]
@@ -0,0 +1,113 @@
+import sys
+import time
+import threading
+import subprocess
+
+# --- 프로세스 공유 리소스 레지스트리 ---
+# spaCy 모델, 국가 별칭 색인, Supabase 클라이언트처럼 만들기 비싼 리소스를 모듈 임포트 시점이 아니라
+# 처음 사용할 때 한 번만 만들고, 같은 프로세스의 모든 모듈이 공유합니다.
+# 미리 준비해 두고 싶을 때(예: API 서버 시작, 파이프라인 단계 0)는 warm_up()으로 명시적으로 로드합니다.
+# 'python resource_registry.py --import-times'로 주요 모듈의 임포트 시간을 새 프로세스에서 측정할 수 있습니다.
+IMPORT_TIME_MODULES = ["preprocess_data", "run_pipeline", "api_server", "google_news_crawler", "aljazeera_crawler"]
+
+
+class LazyResource:
+    """loader()를 처음 get()할 때 한 번만 실행하고 결과를 보관합니다 (로더가 None을 반환해도 다시 시도하지 않음)."""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.load_seconds = None
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self):
+        return self._loaded
+
+    def get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    start_time = time.perf_counter()
+                    self._value = self.loader()
+                    self.load_seconds = time.perf_counter() - start_time
+                    self._loaded = True
+        return self._value
+
+    def set(self, value):
+        """로더를 거치지 않고 값을 지정합니다 (테스트용 모델 등)."""
+        with self._lock:
+            self._value = value
+            self.load_seconds = 0.0
+            self._loaded = True
+
+    def reset(self):
+        """보관한 값을 버려 다음 get()에서 다시 로드하게 합니다."""
+        with self._lock:
+            self._value = None
+            self.load_seconds = None
+            self._loaded = False
+
+
+_resources = {}
+_resources_lock = threading.Lock()
+
+def register_resource(name, loader):
+    """이름으로 리소스를 등록하고 LazyResource를 반환합니다. 이미 등록된 이름이면 기존 리소스를 그대로 반환합니다."""
+    with _resources_lock:
+        resource = _resources.get(name)
+        if resource is None:
+            resource = _resources[name] = LazyResource(name, loader)
+        elif getattr(resource.loader, "__qualname__", None) != getattr(loader, "__qualname__", None) or \
+                getattr(resource.loader, "__module__", None) != getattr(loader, "__module__", None):
+            # 다른 모듈이 같은 이름을 쓰면 먼저 등록한 쪽의 로더(와 설정)가 조용히 쓰이게 되므로 알림 (모듈 재로드는 같은 로더로 봄)
+            print(f"Warning: Resource '{name}' is already registered by {resource.loader.__module__}; "
+                  f"loader from {getattr(loader, '__module__', '?')} is ignored.")
+        return resource
+
+def get_resource(name):
+    """등록된 리소스 값을 반환합니다 (처음 호출 시 로드). 등록되지 않은 이름이면 KeyError."""
+    return _resources[name].get()
+
+def warm_up(*names):
+    """지정한 리소스(없으면 등록된 전체)를 미리 로드하고 {이름: 로드 시간(초)}를 반환합니다."""
+    load_times = {}
+    for name in names or list(_resources):
+        resource = _resources[name]
+        resource.get()
+        load_times[name] = resource.load_seconds
+        print(f"Resource '{name}' ready ({resource.load_seconds:.2f}s to load).")
+    return load_times
+
+def loaded_resource_names():
+    return [name for name, resource in _resources.items() if resource.is_loaded]
+
+
+# --- 임포트 시간 측정 ---
+def measure_import_time(module_name):
+    """새 파이썬 프로세스에서 module_name을 임포트하는 데 걸린 시간(초)을 반환합니다. 실패하면 None."""
+    code = (
+        "import time; start_time = time.perf_counter(); "
+        f"import {module_name}; print('IMPORT_SECONDS', time.perf_counter() - start_time)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith("IMPORT_SECONDS "):
+            return float(line.split()[1])
+    return None
+
+def report_import_times(module_names=IMPORT_TIME_MODULES):
+    import_times = {}
+    for module_name in module_names:
+        import_times[module_name] = measure_import_time(module_name)
+        seconds = import_times[module_name]
+        print(f"  {module_name}: " + (f"{seconds:.2f}s" if seconds is not None else "import failed"))
+    return import_times
+
+
+if __name__ == "__main__":
+    if "--import-times" in sys.argv[1:]:
+        print("Import time per module (fresh interpreter each):")
+        report_import_times([arg for arg in sys.argv[1:] if not arg.startswith("--")] or IMPORT_TIME_MODULES)
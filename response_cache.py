@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# --- API 응답 캐시 (LRU + TTL, stale-while-revalidate) ---
+# 뉴스 데이터는 파이프라인이 실행될 때만 바뀌므로 /api/news의 응답을 프로세스 메모리에 보관해 두고 재사용합니다.
+# TTL이 지난 항목은 최대 stale_seconds 동안 그대로 응답하면서 백그라운드에서 다시 만듭니다 (요청은 DB를 기다리지 않음).
+# 파이프라인은 다른 프로세스에서 실행되므로, 저장을 마치면 세대(generation) 파일을 갱신하고
+# API는 파일이 바뀐 것을 보고 이전 세대의 항목을 모두 stale로 취급합니다.
+RESPONSE_CACHE_MAX_ENTRIES = 512         # LRU 최대 항목 수
+RESPONSE_CACHE_TTL_SECONDS = 300         # 이 시간 동안은 그대로 응답 (fresh)
+RESPONSE_CACHE_STALE_SECONDS = 24 * 3600 # 이 시간까지는 stale 응답 후 백그라운드 갱신, 넘으면 동기적으로 다시 만듦
+RESPONSE_CACHE_REFRESH_WORKERS = 2       # 백그라운드 갱신 스레드 수
+CACHE_GENERATION_PATH = "news_cache_generation.txt"
+
+
+def _resolve_path(path):
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    return path
+
+
+def bump_cache_generation(path=CACHE_GENERATION_PATH):
+    """캐시 세대 파일을 갱신합니다 (데이터가 바뀌었음을 API 서버 프로세스에 알림)."""
+    path = _resolve_path(path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp_path, path) # 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 원자적으로 교체
+
+
+def read_cache_generation(path=CACHE_GENERATION_PATH):
+    """현재 캐시 세대 (세대 파일의 수정 시각). 파일이 없으면 0."""
+    try:
+        return os.stat(_resolve_path(path)).st_mtime_ns
+    except OSError:
+        return 0
+
+
+class _CacheEntry:
+    __slots__ = ("value", "created_at", "generation")
+
+    def __init__(self, value, created_at, generation):
+        self.value = value
+        self.created_at = created_at
+        self.generation = generation
+
+
+class ResponseCache:
+    """키 -> 응답 값. get_or_load(key, loader)로 사용하며 여러 스레드에서 동시에 사용 가능."""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+                 stale_seconds=RESPONSE_CACHE_STALE_SECONDS, generation_path=CACHE_GENERATION_PATH,
+                 refresh_workers=RESPONSE_CACHE_REFRESH_WORKERS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.generation_path = generation_path
+        self._entries = OrderedDict()
+        self._refreshing = set() # 백그라운드 갱신 중인 키 (같은 키를 중복 갱신하지 않음)
+        self._lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_errors': 0, 'evictions': 0}
+
+    def _store(self, key, value, generation):
+        with self._lock:
+            self._entries[key] = _CacheEntry(value, time.monotonic(), generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _refresh(self, key, loader, generation):
+        outcome = 'refresh_errors'
+        try:
+            value, cacheable = loader()
+            if cacheable:
+                self._store(key, value, generation)
+                outcome = 'refreshes'
+        except Exception as e:
+            print(f"Warning: Background refresh of cached response {key} failed, stale value kept: {e}")
+        finally:
+            with self._lock:
+                self._stats[outcome] += 1
+                self._refreshing.discard(key)
+
+    def get_or_load(self, key, loader):
+        """
+        캐시된 값을 반환하거나 loader()로 만듭니다. loader는 (값, 캐시 가능 여부)를 반환해야 합니다 (오류 응답은 False).
+        (값, 상태)를 반환하며 상태는 'hit', 'stale'(백그라운드 갱신 예약됨), 'miss' 중 하나입니다.
+        """
+        generation = read_cache_generation(self.generation_path)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.created_at
+                if entry.generation == generation and age < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry.value, 'hit'
+                if age < self.stale_seconds:
+                    self._entries.move_to_end(key)
+                    self._stats['stale_hits'] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._refresh_executor.submit(self._refresh, key, loader, generation)
+                    return entry.value, 'stale'
+            self._stats['misses'] += 1
+        value, cacheable = loader()
+        if cacheable:
+            self._store(key, value, generation)
+        return value, 'miss'
+
+    def clear(self):
+        """이 프로세스의 캐시를 모두 비웁니다."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'num_entries': len(self._entries)}
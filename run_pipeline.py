@@ -2,8 +2,14 @@ import sys
 import os
 import pandas as pd
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv  # .env 파일에서 환경 변수 로드
-from supabase import create_client, Client  # Supabase 클라이언트
+from resource_registry import register_resource # Supabase 클라이언트 지연 생성 (임포트 시 연결하지 않음)
+from bulk_writer import BulkUpsertWriter # 청크 단위 병렬/재시도 upsert
+from upsert_hash_store import UpsertHashStore, compute_record_content_hash, CONTENT_HASH_FIELD # 델타 upsert용 행 해시
+from news_replica import get_news_replica # API가 읽는 news_articles 로컬 복제본
+from response_cache import bump_cache_generation # API 서버 응답 캐시 무효화
+from url_canonicalizer import canonicalize_url # 중복 판정 키 (다운로드/저장에는 원래 URL 사용)
 
 # --- 모듈 임포트 ---
 # 스크립트가 있는 디렉토리를 sys.path에 추가 (선택적, 보통은 같은 디렉토리 내 모듈은 바로 임포트 가능)
@@ -12,10 +18,22 @@ from supabase import create_client, Client  # Supabase 클라이언트
 #     sys.path.append(current_script_dir)
 
 try:
-    # google_news_crawler.py에서 DataFrame을 반환하는 함수와 NLTK 다운로더 임포트
-    from google_news_crawler import run_news_collection_pipeline, download_nltk_resources_if_needed
+    # google_news_crawler.py에서 검색/크롤링 함수와 (지연) 요약/키워드 계산 함수 임포트
+    from google_news_crawler import (
+        add_summaries_and_keywords,
+        search_google_for_urls, crawl_article_data, DomainRateLimiter, DEFAULT_CRAWL_MAX_WORKERS,
+        parse_article_html as parse_google_news_article_html
+    )
+    from aljazeera_crawler import parse_article_html as parse_aljazeera_article_html
+    from html_archive import HtmlArchive
+    from nlp_feature_cache import get_shared_nlp_feature_cache
     # preprocess_data.py에서 데이터 전처리 함수와 필요한 상수 임포트
-    from preprocess_data import preprocess_and_filter_data, SPACY_MODEL_NAME, CLEANED_NLP_NEWS_CSV_DEFAULT
+    from http_cache import get_shared_response_cache
+    from host_health import get_shared_host_health
+    from seen_url_store import SeenUrlStore, SEEN_URL_DEFAULT_RECHECK_SECONDS
+    from preprocess_data import (
+        iter_preprocessed_batches, save_relevance_features, warm_up_preprocessing, SPACY_MODEL_NAME, CLEANED_NLP_NEWS_CSV_DEFAULT
+    )
     print("Successfully imported pipeline modules in run_pipeline.py.")
 except ImportError as e:
     print(f"FATAL ERROR: Could not import required pipeline modules: {e}")
@@ -31,25 +49,157 @@ SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")  # service_role 키 사용 권장
 DB_NEWS_TABLE_NAME = "news_articles"  # Supabase에 생성한 테이블 이름
 
-supabase_client: Client = None
-if SUPABASE_URL and SUPABASE_KEY:
+def _create_supabase_client():
+    if not (SUPABASE_URL and SUPABASE_KEY):
+        print("Warning: Supabase URL or SERVICE_ROLE Key not found in .env file. Database operations will be skipped.")
+        return None
     try:
-        supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        from supabase import create_client # 패키지 임포트가 느리므로 처음 연결할 때 임포트
+        client = create_client(SUPABASE_URL, SUPABASE_KEY)
         print("Successfully connected to Supabase for data pipeline.")
+        return client
     except Exception as e:
         print(f"Warning: Error connecting to Supabase in run_pipeline.py: {e}")
         print("Database operations will be skipped if connection failed.")
-        supabase_client = None # 명시적으로 None 처리
-else:
-    print("Warning: Supabase URL or SERVICE_ROLE Key not found in .env file. Database operations will be skipped.")
+        return None
+
+_supabase_client_resource = register_resource("pipeline_supabase_client", _create_supabase_client) # 이름은 모듈별로 다르게 (api_server의 클라이언트와 설정/로그가 다름)
+
+def get_supabase_client():
+    """Supabase 클라이언트를 반환합니다 (처음 호출 시 생성, 설정이 없거나 연결 실패 시 None)."""
+    return _supabase_client_resource.get()
 
 # --- 파일 이름 및 경로 설정 ---
-# 여러 검색어 결과를 합친 크롤링 데이터 CSV 파일 (중간 저장용)
+# 여러 검색어 결과를 합친 크롤링 데이터 CSV 파일 (선택적 체크포인트, 디버깅용)
 COMBINED_CRAWLED_ARTICLES_CSV = "combined_crawled_articles.csv"
-# 최종 전처리된 데이터 CSV 파일 (Supabase 입력 및 디버깅용)
+# 최종 전처리된 데이터 CSV 파일 (선택적 체크포인트, 디버깅용)
 # preprocess_data.py의 기본 출력 파일명을 그대로 사용
 PROCESSED_DATA_FOR_DB_CSV = CLEANED_NLP_NEWS_CSV_DEFAULT
 
+# --- 스트리밍 처리 설정 ---
+# 크롤링된 기사는 CSV를 거치지 않고 micro-batch 단위로 전처리 -> 포맷 -> upsert 됩니다.
+STREAM_BATCH_SIZE = 20 # 한 번에 전처리/저장할 기사 수 (메모리 사용량과 DB 요청 수의 균형)
+WRITE_CHECKPOINT_CSVS = True # True면 배치마다 위 두 CSV 파일에 추가 기록 (DB 저장에는 사용되지 않음)
+
+# --- 병렬 크롤링 설정 ---
+MAX_PARALLEL_SEARCH_QUERIES = 3 # 동시에 실행할 구글 검색 수 (너무 크면 구글 측 차단 위험)
+MAX_PARALLEL_ARTICLE_DOWNLOADS = DEFAULT_CRAWL_MAX_WORKERS # 동시에 다운로드할 기사 수
+
+# --- 증분 크롤링 설정 ---
+USE_SEEN_URL_STORE = True # True면 이전 실행에서 처리한 URL은 크롤링하지 않음 (seen_urls.sqlite3)
+CRAWL_FAILED_TITLE = "Error: Could not crawl" # google_news_crawler가 실패 시 넣는 제목 (처리 완료로 기록하지 않음)
+
+# --- 델타 upsert 설정 ---
+USE_DELTA_UPSERTS = True # True면 마지막으로 저장한 내용과 해시가 같은 행은 DB에 다시 보내지 않음 (upsert_hashes.sqlite3)
+SEND_CONTENT_HASH_COLUMN = False # True면 해시도 news_articles.content_hash 컬럼에 저장 (테이블에 해당 컬럼이 있어야 함)
+
+# --- 로컬 읽기 복제본 설정 ---
+UPDATE_NEWS_REPLICA = True # True면 저장한 행을 news_replica.sqlite3에도 반영하고, 주기적으로 Supabase에서 전체 동기화
+
+# --- newspaper3k 요약/키워드 설정 ---
+# 크롤링 중에는 article.nlp()를 실행하지 않음. True면 관련도 임계값을 통과한 기사에만 배치별로 계산하여
+# 전처리 체크포인트 CSV에 'Summary', 'Keywords' 컬럼으로 추가 (DB에는 저장되지 않음)
+COMPUTE_SUMMARIES_FOR_RELEVANT_ARTICLES = False
+
+
+# --- 보관된 HTML 재처리(replay) 설정 ---
+# 'python run_pipeline.py --replay'는 네트워크 없이 html_archive/의 HTML을 다시 추출/전처리하여 CSV로 저장합니다.
+REPLAY_PROCESSED_DATA_CSV = "replayed_cleaned_nlp_news.csv"
+# 보관소의 크롤러 이름 -> 해당 크롤러의 HTML 파서 (크롤링 때와 같은 추출 결과)
+ARCHIVE_HTML_PARSERS = {
+    "google_news_crawler": parse_google_news_article_html,
+    "aljazeera_crawler": parse_aljazeera_article_html,
+}
+
+
+# --- 여러 검색어 병렬 크롤링 함수 ---
+def iter_crawled_articles(search_queries, articles_per_query,
+                          max_search_workers=MAX_PARALLEL_SEARCH_QUERIES,
+                          max_download_workers=MAX_PARALLEL_ARTICLE_DOWNLOADS,
+                          seen_url_store=None, crawl_stats=None):
+    """
+    여러 검색어를 병렬로 검색하고, 다운로드가 끝나는 순서대로 기사 dict를 하나씩 생성(yield)합니다.
+    - 검색어 간 URL 중복은 다운로드 전에 제거 (같은 페이지를 두 번 받지 않음)
+    - seen_url_store가 주어지면 이전 실행에서 이미 처리한 URL도 다운로드 전에 제외
+    - 다운로드는 별도 스레드 풀에서 도메인별 요청 간격을 지키며 동시에 진행
+    - 서킷이 열린(최근 계속 실패한) 호스트의 URL은 다운로드하지 않음 (다음 실행에서 다시 시도)
+    crawl_stats dict를 넘기면 'all_ok'(검색/다운로드 오류 없음), 'skipped_previously_seen', 'skipped_open_circuit',
+    'num_crawled'가 채워집니다.
+    """
+    if crawl_stats is None:
+        crawl_stats = {}
+    crawl_stats.update(all_ok=True, skipped_previously_seen=0, skipped_open_circuit=0, num_crawled=0)
+    rate_limiter = DomainRateLimiter()
+    host_health = get_shared_host_health()
+    seen_url_keys = set() # 이번 실행에서 이미 예약한 URL의 정규형
+
+    def download_article(url):
+        return crawl_article_data(url, rate_limiter=rate_limiter, host_health=host_health)
+
+    with ThreadPoolExecutor(max_workers=max_search_workers, thread_name_prefix="news-search") as search_executor, \
+         ThreadPoolExecutor(max_workers=max_download_workers, thread_name_prefix="news-crawl") as download_executor:
+        # 진행 중인 작업: future -> ('search', 검색어) 또는 ('download', URL)
+        pending_futures = {
+            search_executor.submit(search_google_for_urls, query_term, num_to_fetch=articles_per_query): ("search", query_term)
+            for query_term in search_queries
+        }
+        while pending_futures:
+            done_futures, _ = wait(pending_futures, return_when=FIRST_COMPLETED)
+            for future in done_futures:
+                task_kind, task_label = pending_futures.pop(future)
+                if task_kind == "download":
+                    try:
+                        article = future.result()
+                    except Exception as e:
+                        print(f"ERROR during article download for '{task_label}': {e}")
+                        crawl_stats['all_ok'] = False
+                        continue
+                    crawl_stats['num_crawled'] += 1
+                    yield article
+                    continue
+
+                try:
+                    found_urls = future.result()
+                except Exception as e:
+                    print(f"ERROR during news search for query '{task_label}': {e}")
+                    crawl_stats['all_ok'] = False
+                    continue
+
+                # 중복 판정은 정규형으로, 다운로드는 검색 결과의 원래 URL로
+                url_by_key = {}
+                for url in found_urls:
+                    url_key = canonicalize_url(url)
+                    if url_key and url_key not in seen_url_keys and url_key not in url_by_key:
+                        url_by_key[url_key] = url
+                seen_url_keys.update(url_by_key)
+                new_urls = list(url_by_key.values())
+                if seen_url_store is not None:
+                    due_url_keys = seen_url_store.filter_due(list(url_by_key))
+                    crawl_stats['skipped_previously_seen'] += len(url_by_key) - len(due_url_keys)
+                    new_urls = [url_by_key[url_key] for url_key in due_url_keys]
+                reachable_urls = [url for url in new_urls if not host_health.is_circuit_open(url)]
+                crawl_stats['skipped_open_circuit'] += len(new_urls) - len(reachable_urls)
+                new_urls = reachable_urls
+                print(f"Query '{task_label}' finished: {len(found_urls)} URLs found, {len(new_urls)} new (duplicates and already-processed URLs skipped).")
+                for url in new_urls:
+                    pending_futures[download_executor.submit(download_article, url)] = ("download", url)
+
+
+def append_checkpoint_csv(df, csv_path, is_first_batch):
+    """배치 DataFrame을 체크포인트 CSV에 추가합니다 (첫 배치는 헤더와 함께 새로 씀)."""
+    df.to_csv(csv_path, mode='w' if is_first_batch else 'a', header=is_first_batch, index=False, encoding='utf-8-sig')
+
+
+def mark_crawled_urls_as_seen(seen_url_store, crawled_df, recheck_after_seconds=SEEN_URL_DEFAULT_RECHECK_SECONDS):
+    """크롤링에 성공한 기사 URL을 처리 완료로 기록합니다 (실패한 URL은 다음 실행에서 다시 시도)."""
+    if seen_url_store is None or crawled_df is None or crawled_df.empty or 'url' not in crawled_df.columns:
+        return 0
+    succeeded_df = crawled_df[crawled_df['title'] != CRAWL_FAILED_TITLE] if 'title' in crawled_df.columns else crawled_df
+    url_keys = [canonicalize_url(url) for url in succeeded_df['url'].dropna().astype(str)]
+    num_marked = seen_url_store.mark_seen([url_key for url_key in url_keys if url_key], recheck_after_seconds=recheck_after_seconds)
+    print(f"Recorded {num_marked} processed URLs in seen-URL store (total known: {seen_url_store.count()}).")
+    return num_marked
+
 
 # --- Supabase 저장용 데이터 포맷 함수 ---
 def format_dataframe_for_supabase(input_df: pd.DataFrame):
@@ -59,6 +209,7 @@ def format_dataframe_for_supabase(input_df: pd.DataFrame):
     - 데이터 타입 변환 (특히 published_date)
     - 누락값 처리 (NaN -> 빈 문자열 또는 None)
     - Supabase 테이블에 정의된 컬럼만 선택
+    - 레코드마다 내용 해시(CONTENT_HASH_FIELD) 추가 (델타 upsert 비교용, 전송 여부는 SEND_CONTENT_HASH_COLUMN)
     """
     if not isinstance(input_df, pd.DataFrame) or input_df.empty:
         print("Formatting warning: Input DataFrame is empty or not a DataFrame. Returning empty list.")
@@ -86,10 +237,10 @@ def format_dataframe_for_supabase(input_df: pd.DataFrame):
 
     # 1. published_date: TIMESTAMPTZ 타입에 맞게 ISO 8601 형식 (UTC 자정)으로 변환
     if 'published_date' in df_to_format.columns:
-        df_to_format['published_date'] = pd.to_datetime(df_to_format['published_date'], errors='coerce')
-        df_to_format['published_date'] = df_to_format['published_date'].apply(
-            lambda x: x.strftime('%Y-%m-%dT00:00:00Z') if pd.notnull(x) else None
-        )
+        # 열 전체를 한 번에 변환 (preprocess_data 출력은 'YYYY-MM-DD' 또는 빈 문자열)
+        published_dates = pd.to_datetime(df_to_format['published_date'], format='mixed', errors='coerce')
+        published_dates = published_dates.dt.strftime('%Y-%m-%dT00:00:00Z')
+        df_to_format['published_date'] = published_dates.astype(object).where(published_dates.notna(), None)
     else:
         df_to_format['published_date'] = None # 컬럼 없으면 None으로 채움 (DB에서 nullable이어야 함)
 
@@ -131,12 +282,36 @@ def format_dataframe_for_supabase(input_df: pd.DataFrame):
     valid_records = [rec for rec in records_list if rec.get('url')]
     if len(valid_records) < len(records_list):
         print(f"Formatting Warning: {len(records_list) - len(valid_records)} records removed due to missing URL.")
-        
+
+    for record in valid_records:
+        record[CONTENT_HASH_FIELD] = compute_record_content_hash(record)
     return valid_records
 
 
-def save_data_to_supabase(db_client: Client, table_name: str, data_records_list: list):
-    """데이터 레코드 리스트를 Supabase 테이블에 저장합니다 (upsert 사용)."""
+def select_records_to_upsert(upsert_hash_store, table_name, records):
+    """
+    새로 추가되거나 내용이 바뀐 레코드만 골라 DB 전송용 목록으로 반환합니다. (전송할 레코드 목록, 분류 결과 dict)
+    upsert_hash_store가 None이면 모든 레코드를 보냅니다. 저장 성공 후 분류 결과로 mark_stored를 호출해야 합니다.
+    """
+    if upsert_hash_store is None:
+        upsert_delta = {'inserted': list(records), 'changed': [], 'unchanged': []}
+    else:
+        upsert_delta = upsert_hash_store.classify(table_name, records)
+        print(f"Delta upsert: {len(upsert_delta['inserted'])} new, {len(upsert_delta['changed'])} changed, "
+              f"{len(upsert_delta['unchanged'])} unchanged (skipped).")
+    records_to_send = upsert_delta['inserted'] + upsert_delta['changed']
+    if not SEND_CONTENT_HASH_COLUMN:
+        records_to_send = [{key: value for key, value in record.items() if key != CONTENT_HASH_FIELD} for record in records_to_send]
+    return records_to_send, upsert_delta
+
+
+def save_data_to_supabase(db_client, table_name: str, data_records_list: list, news_replica=None):
+    """
+    데이터 레코드 리스트를 Supabase 테이블에 저장합니다 (upsert 사용).
+    레코드는 크기 제한이 있는 청크로 나뉘어 동시에 전송되고, 실패한 청크는 백오프 후 재시도됩니다 (bulk_writer.py).
+    news_replica가 주어지면 모든 청크가 저장된 뒤 DB가 돌려준 행(id 포함)을 로컬 복제본에도 반영합니다.
+    모든 청크가 저장되면 True.
+    """
     if not db_client:
         print("Supabase client is not initialized. Skipping database save operation.")
         return False
@@ -145,25 +320,24 @@ def save_data_to_supabase(db_client: Client, table_name: str, data_records_list:
         return True # 작업할 데이터가 없는 것은 오류가 아님
 
     try:
-        print(f"Attempting to upsert {len(data_records_list)} records into Supabase table '{table_name}' (on_conflict='url')...")
         # Supabase 테이블의 'url' 컬럼에 UNIQUE 제약조건이 설정되어 있어야 upsert가 올바르게 작동합니다.
-        response = db_client.table(table_name).upsert(data_records_list, on_conflict='url').execute()
-        
-        # supabase-py v1.x 이후, 에러는 response.error 로, 성공 시 데이터는 response.data 로 접근
-        if hasattr(response, 'error') and response.error:
-            print(f"ERROR during Supabase upsert: {response.error}")
-            # 문제 해결을 위해 첫 번째 레코드 샘플 출력
-            if data_records_list:
-                print(f"Sample of first record that might have caused error: {data_records_list[0]}")
+        write_stats = BulkUpsertWriter(db_client, table_name, on_conflict='url').write(data_records_list)
+        if write_stats['num_failed_chunks']:
+            print(f"ERROR during Supabase upsert: {len(write_stats['failed_records'])} of {len(data_records_list)} records "
+                  f"could not be saved after retries.")
             return False
-        else:
-            num_processed = len(response.data) if hasattr(response, 'data') and response.data else "unknown (check Supabase logs)"
-            print(f"Successfully upserted/processed records in Supabase. Response count/length: {num_processed}")
-            return True
     except Exception as e:
         print(f"An unexpected exception occurred during Supabase upsert operation: {e}")
         return False
 
+    if news_replica is not None:
+        # 응답에 행이 없으면(returning=minimal 등) 보낸 레코드를 반영 (id는 다음 전체 동기화 때 채워짐)
+        try:
+            news_replica.upsert_rows(write_stats['returned_rows'] or data_records_list)
+        except Exception as e:
+            print(f"Warning: Could not update local news replica: {e}")
+    return True
+
 # --- 메인 파이프라인 실행 함수 ---
 def execute_full_news_data_pipeline():
     start_pipeline_time = time.time()
@@ -172,18 +346,19 @@ def execute_full_news_data_pipeline():
 
     # --- 단계 0: 환경 점검 ---
     print("\n--- Step 0: Environment & Prerequisites Check ---")
-    try:
-        download_nltk_resources_if_needed() # google_news_crawler에서 가져온 함수
-        import spacy # spaCy 로드 시도 (preprocess_data.py에서도 로드하지만, 여기서 한번 더 확인)
-        spacy.load(SPACY_MODEL_NAME) 
-        print("NLTK and spaCy environment appear to be OK.")
-    except Exception as e:
-        print(f"FATAL ERROR during environment pre-check (NLTK/spaCy): {e}.")
+    # NLTK 'punkt'는 newspaper3k 요약/키워드(article.nlp())를 계산할 때만 필요하므로 여기서 받지 않음
+    # spaCy 모델과 국가 색인을 여기서 한 번 로드 (전처리 단계가 같은 인스턴스를 사용)
+    if not warm_up_preprocessing():
+        print(f"FATAL ERROR during environment pre-check: spaCy model '{SPACY_MODEL_NAME}' could not be loaded.")
         print("Pipeline cannot continue without these prerequisites.")
         return False # 필수 환경 없으면 파이프라인 중단
+    print("spaCy environment appears to be OK.")
+    supabase_client = get_supabase_client()
 
-    # --- 단계 1: 뉴스 크롤링 (여러 검색어 결과 종합) ---
-    print(f"\n--- Step 1: News Crawling ---")
+    # --- 단계 1~3: 크롤링 -> 전처리/NLP -> Supabase 저장 (스트리밍) ---
+    # 기사는 다운로드되는 대로 STREAM_BATCH_SIZE 단위로 전처리되어 바로 upsert 됩니다.
+    # 중간 CSV는 WRITE_CHECKPOINT_CSVS가 True일 때 디버깅용으로만 기록됩니다.
+    print(f"\n--- Steps 1-3: Streaming Crawl -> Preprocess -> Save (batch size: {STREAM_BATCH_SIZE}) ---")
     # 검색어 목록은 외부 설정 파일(예: JSON, YAML)에서 읽어오는 것이 더 좋음
     news_search_queries = [
         "global conflict overview", "ukraine war updates", "middle east security situation", 
@@ -192,106 +367,139 @@ def execute_full_news_data_pipeline():
     ]
     articles_to_fetch_per_query = 7 # 테스트 시에는 2-3개로 줄여서 사용
 
-    all_crawled_dataframes_list = []
-    crawling_step_success = True
-    for i, query_term in enumerate(news_search_queries):
-        print(f"\nCrawling for query {i+1}/{len(news_search_queries)}: '{query_term}'...")
+    seen_url_store = None
+    if USE_SEEN_URL_STORE:
         try:
-            # run_news_collection_pipeline은 DataFrame을 반환 (google_news_crawler.py 수정됨)
-            df_from_query = run_news_collection_pipeline(query_term, num_articles_to_fetch=articles_to_fetch_per_query)
-            if df_from_query is not None and not df_from_query.empty:
-                all_crawled_dataframes_list.append(df_from_query)
-                print(f"Crawled {len(df_from_query)} articles for '{query_term}'.")
-            else:
-                print(f"No articles found or DataFrame was empty for query '{query_term}'.")
+            seen_url_store = SeenUrlStore()
+        except Exception as e:
+            print(f"Warning: Could not open seen-URL store, all found URLs will be crawled: {e}")
+
+    if not supabase_client:
+        print("Supabase client not available, database save operation will be skipped for every batch.")
+
+    upsert_hash_store = None
+    if USE_DELTA_UPSERTS and supabase_client:
+        try:
+            upsert_hash_store = UpsertHashStore()
         except Exception as e:
-            print(f"ERROR during news crawling for query '{query_term}': {e}")
-            crawling_step_success = False # 크롤링 중 에러 발생 시 플래그 설정
-            # 여기서 break 할 수도 있지만, 다른 쿼리는 계속 시도하도록 둠
-
-    if not all_crawled_dataframes_list:
-        print("CRITICAL: No articles were crawled from any query. Aborting pipeline.")
-        return False # 크롤링된 데이터가 전혀 없으면 중단
-    if not crawling_step_success:
-        print("Warning: Some crawling queries may have failed. Proceeding with available data.")
-        overall_pipeline_status_ok = False # 전체 성공은 아님을 표시
-
-    # 모든 검색어 결과를 하나의 DataFrame으로 합치고 URL 기준 중복 제거
-    master_crawled_df = pd.concat(all_crawled_dataframes_list, ignore_index=True)
-    if 'url' in master_crawled_df.columns: # 'url' 컬럼명 확인
-        master_crawled_df.drop_duplicates(subset=['url'], keep='first', inplace=True)
-    else: # 'URL' 등 다른 이름일 경우 대비 (google_news_crawler.py의 반환 컬럼명 확인 필요)
-        print("Warning: 'url' column not found for deduplication. Check crawler output.")
-        # master_crawled_df.drop_duplicates(subset=['URL'], keep='first', inplace=True)
-
-    # 합쳐진 크롤링 결과를 CSV로 저장 (디버깅 및 중간 저장용)
+            print(f"Warning: Could not open upsert hash store, every processed record will be sent: {e}")
+    upsert_totals = {'inserted': 0, 'changed': 0, 'unchanged': 0}
+    news_replica = get_news_replica() if UPDATE_NEWS_REPLICA and supabase_client else None
+
+    # 검색어들은 병렬로 실행되고, URL은 검색어 간 중복 제거 후 한 번씩만 다운로드됨
+    print(f"Running {len(news_search_queries)} queries in parallel (search workers: {MAX_PARALLEL_SEARCH_QUERIES}, download workers: {MAX_PARALLEL_ARTICLE_DOWNLOADS})...")
+    crawl_stats = {}
+    num_batches = 0
+    num_relevant_articles = 0
+    num_saved_records = 0
     try:
-        master_crawled_df.to_csv(COMBINED_CRAWLED_ARTICLES_CSV, index=False, encoding='utf-8-sig')
-        print(f"All crawled data combined ({len(master_crawled_df)} unique articles after deduplication) and saved to '{COMBINED_CRAWLED_ARTICLES_CSV}'.")
+        crawled_article_stream = iter_crawled_articles(
+            news_search_queries, articles_to_fetch_per_query, seen_url_store=seen_url_store, crawl_stats=crawl_stats
+        )
+        for crawled_batch_df, processed_batch_df in iter_preprocessed_batches(crawled_article_stream, batch_size=STREAM_BATCH_SIZE):
+            num_batches += 1
+            num_relevant_articles += len(processed_batch_df)
+            print(f"\nBatch {num_batches}: {len(crawled_batch_df)} crawled, {len(processed_batch_df)} relevant after preprocessing.")
+            if COMPUTE_SUMMARIES_FOR_RELEVANT_ARTICLES and not processed_batch_df.empty:
+                processed_batch_df = add_summaries_and_keywords(
+                    processed_batch_df, title_col='Title', body_col='Full_Body', url_col='URL',
+                    summary_col='Summary', keywords_col='Keywords'
+                )
+
+            if WRITE_CHECKPOINT_CSVS:
+                try:
+                    append_checkpoint_csv(crawled_batch_df, COMBINED_CRAWLED_ARTICLES_CSV, num_batches == 1)
+                    append_checkpoint_csv(processed_batch_df, PROCESSED_DATA_FOR_DB_CSV, num_batches == 1)
+                except Exception as e:
+                    print(f"Warning: Could not write checkpoint CSVs for batch {num_batches}: {e}")
+
+            # DB 클라이언트가 없으면 저장하지 않았으므로 처리 완료로 기록하지 않음 (다음 실행에서 다시 크롤링)
+            batch_saved_ok = False
+            if supabase_client and processed_batch_df.empty:
+                batch_saved_ok = True # 모든 기사가 관련도 임계값 미달 (저장할 행 없음)
+            elif supabase_client:
+                records_to_upsert = format_dataframe_for_supabase(processed_batch_df)
+                records_to_send, upsert_delta = select_records_to_upsert(upsert_hash_store, DB_NEWS_TABLE_NAME, records_to_upsert)
+                if records_to_send:
+                    batch_saved_ok = save_data_to_supabase(supabase_client, DB_NEWS_TABLE_NAME, records_to_send, news_replica=news_replica)
+                else:
+                    batch_saved_ok = True # 모든 행이 마지막 저장과 같은 내용 (해시 일치)
+                if batch_saved_ok:
+                    num_saved_records += len(records_to_send)
+                    for outcome, outcome_records in upsert_delta.items():
+                        upsert_totals[outcome] += len(outcome_records)
+                    if upsert_hash_store is not None:
+                        upsert_hash_store.mark_stored(DB_NEWS_TABLE_NAME, upsert_delta['inserted'] + upsert_delta['changed'])
+                else:
+                    overall_pipeline_status_ok = False # DB 저장 실패 (다른 배치는 계속 진행)
+
+            # 저장까지 끝난 (또는 저장할 것이 없다고 확인된) 배치의 URL만 처리 완료로 기록 (실패 시 다음 실행에서 재시도)
+            if batch_saved_ok and seen_url_store is not None:
+                try:
+                    mark_crawled_urls_as_seen(seen_url_store, crawled_batch_df)
+                except Exception as e:
+                    print(f"Warning: Could not update seen-URL store: {e}")
     except Exception as e:
-        print(f"Error saving combined crawled data to CSV: {e}")
+        print(f"ERROR during streaming crawl/preprocess/save: {e}")
         overall_pipeline_status_ok = False
 
+    if seen_url_store is not None:
+        seen_url_store.close() # 블룸 필터 저장 포함
+    if upsert_hash_store is not None:
+        upsert_hash_store.close()
 
-    # --- 단계 2: 데이터 전처리 및 NLP 분석 ---
-    print(f"\n--- Step 2: Data Preprocessing & NLP Analysis ---")
-    preprocessing_step_success = False
-    if os.path.exists(COMBINED_CRAWLED_ARTICLES_CSV) and os.path.getsize(COMBINED_CRAWLED_ARTICLES_CSV) > 0:
+    # 로컬 복제본 전체 동기화 (처음 또는 주기가 지났을 때. 다른 곳에서 지워지거나 바뀐 행 반영)
+    news_replica_synced = False
+    if news_replica is not None and news_replica.needs_full_sync():
         try:
-            # preprocess_and_filter_data는 COMBINED_CRAWLED_ARTICLES_CSV를 입력으로 받고,
-            # PROCESSED_DATA_FOR_DB_CSV (기본값: "cleaned_nlp_news.csv")에 결과를 저장
-            preprocess_and_filter_data(COMBINED_CRAWLED_ARTICLES_CSV, PROCESSED_DATA_FOR_DB_CSV)
-            
-            if not os.path.exists(PROCESSED_DATA_FOR_DB_CSV) or os.path.getsize(PROCESSED_DATA_FOR_DB_CSV) == 0:
-                print(f"Warning: Preprocessing completed, but output file '{PROCESSED_DATA_FOR_DB_CSV}' is empty or not created.")
-                # 전처리 결과가 없으면 DB 저장 불가
-            else:
-                print(f"Data preprocessing completed. Output saved to '{PROCESSED_DATA_FOR_DB_CSV}'.")
-                preprocessing_step_success = True
+            news_replica.sync_from_supabase(supabase_client, DB_NEWS_TABLE_NAME)
+            news_replica_synced = True
         except Exception as e:
-            print(f"ERROR during data preprocessing: {e}")
-            overall_pipeline_status_ok = False
-    else:
-        print(f"Combined crawled news CSV ('{COMBINED_CRAWLED_ARTICLES_CSV}') not found or empty. Skipping preprocessing.")
-        overall_pipeline_status_ok = False # 전처리할 데이터가 없으므로 실패 간주
-
+            print(f"Warning: News replica full sync failed, API server will keep using its previous data: {e}")
 
-    # --- 단계 3: Supabase에 데이터 저장 ---
-    db_save_step_success = False
-    if overall_pipeline_status_ok and preprocessing_step_success and supabase_client and \
-       os.path.exists(PROCESSED_DATA_FOR_DB_CSV) and \
-       os.path.getsize(PROCESSED_DATA_FOR_DB_CSV) > 0:
-        print(f"\n--- Step 3: Saving Processed Data to Supabase ---")
+    # API 서버 응답 캐시 무효화 (데이터가 바뀐 경우에만. 캐시된 응답은 stale로 응답되며 백그라운드에서 갱신됨)
+    if num_saved_records or news_replica_synced:
         try:
-            processed_df_for_db = pd.read_csv(PROCESSED_DATA_FOR_DB_CSV, keep_default_na=False, na_values=['']) # NaN 처리 명시적
-            if not processed_df_for_db.empty:
-                records_to_upsert = format_dataframe_for_supabase(processed_df_for_db)
-                if records_to_upsert: # 포맷팅 후 유효한 레코드가 있을 때만 저장 시도
-                    if save_data_to_supabase(supabase_client, DB_NEWS_TABLE_NAME, records_to_upsert):
-                        db_save_step_success = True
-                    else:
-                        overall_pipeline_status_ok = False # DB 저장 실패
-                else:
-                    print("No valid records to save to Supabase after formatting.")
-                    db_save_step_success = True # 저장할 데이터가 없는 것은 오류가 아님
-            else:
-                print(f"'{PROCESSED_DATA_FOR_DB_CSV}' is empty after reading. Nothing to save to Supabase.")
-                db_save_step_success = True # 저장할 데이터 없는 것 오류 아님
-        except pd.errors.EmptyDataError:
-            print(f"Warning: Processed CSV '{PROCESSED_DATA_FOR_DB_CSV}' is empty (read as empty). Nothing to save to Supabase.")
-            db_save_step_success = True
+            bump_cache_generation()
+            print("API response cache invalidated (cache generation bumped).")
         except Exception as e:
-            print(f"ERROR reading processed CSV for Supabase or during save operation: {e}")
-            overall_pipeline_status_ok = False
-    elif not supabase_client:
-        print("\nSupabase client not available, database save operation skipped.")
-    elif overall_pipeline_status_ok and preprocessing_step_success:
-         print(f"\nProcessed CSV ('{PROCESSED_DATA_FOR_DB_CSV}') not found or empty. Skipping Supabase save.")
-    
-    if not db_save_step_success and overall_pipeline_status_ok and preprocessing_step_success and supabase_client:
-        # DB 저장이 실제로 시도되었어야 했는데 실패한 경우
-        overall_pipeline_status_ok = False
+            print(f"Warning: Could not bump API response cache generation: {e}")
+
+    # 호스트 상태 저장 (다음 실행에서 서킷/동시성 한도/평균 지연시간을 이어서 사용)
+    try:
+        get_shared_host_health().save()
+    except Exception as e:
+        print(f"Warning: Could not save host health state: {e}")
 
+    # HTTP 응답 캐시 정리 (오래된 항목 및 크기 상한 초과분 삭제)
+    try:
+        get_shared_response_cache().evict()
+    except Exception as e:
+        print(f"Warning: HTTP response cache eviction failed: {e}")
+    # spaCy 특징 캐시 정리 (크기 상한 초과분 삭제)
+    try:
+        get_shared_nlp_feature_cache().evict()
+    except Exception as e:
+        print(f"Warning: NLP feature cache eviction failed: {e}")
+    # 이번 실행의 관련도 특징 행렬 누적 저장 (가중치/임계값 재계산용)
+    save_relevance_features()
+
+    if not crawl_stats.get('all_ok', False):
+        print("Warning: Some crawling queries or downloads may have failed. Available data was processed.")
+        overall_pipeline_status_ok = False
+    if crawl_stats.get('num_crawled', 0) == 0:
+        if crawl_stats.get('skipped_previously_seen', 0) > 0 and crawl_stats.get('all_ok', False):
+            print(f"No new articles to process ({crawl_stats['skipped_previously_seen']} URLs were already processed in earlier runs).")
+        else:
+            print("CRITICAL: No articles were crawled from any query.")
+            overall_pipeline_status_ok = False
+    if crawl_stats.get('skipped_open_circuit', 0):
+        print(f"Skipped {crawl_stats['skipped_open_circuit']} URLs on hosts with an open circuit (repeated failures).")
+    print(f"\nStreaming summary: {crawl_stats.get('num_crawled', 0)} articles crawled in {num_batches} batches, "
+          f"{num_relevant_articles} relevant, {num_saved_records} records saved to Supabase.")
+    if upsert_hash_store is not None:
+        print(f"Delta upsert totals: {upsert_totals['inserted']} inserted, {upsert_totals['changed']} changed, "
+              f"{upsert_totals['unchanged']} unchanged rows skipped.")
 
     # 파이프라인 종료 로깅
     total_pipeline_duration_seconds = time.time() - start_pipeline_time
@@ -299,8 +507,9 @@ def execute_full_news_data_pipeline():
     
     print(f"\n\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] === Full News Data Pipeline Completed {final_status_message}! (Duration: {total_pipeline_duration_seconds:.2f} seconds) ===")
     if overall_pipeline_status_ok:
-        print(f"  - Combined crawled data was processed from '{COMBINED_CRAWLED_ARTICLES_CSV}'.")
-        print(f"  - Final processed data for DB is in '{PROCESSED_DATA_FOR_DB_CSV}'.")
+        if WRITE_CHECKPOINT_CSVS and num_batches:
+            print(f"  - Checkpoint of crawled data: '{COMBINED_CRAWLED_ARTICLES_CSV}'.")
+            print(f"  - Checkpoint of processed data: '{PROCESSED_DATA_FOR_DB_CSV}'.")
         print(f"  - Data has been saved/updated in Supabase table '{DB_NEWS_TABLE_NAME}'.")
         print("\n  API server (api_server.py) can now serve this updated data to the frontend.")
     else:
@@ -308,8 +517,52 @@ def execute_full_news_data_pipeline():
     
     return overall_pipeline_status_ok
 
+# --- 보관된 HTML 재처리 함수 ---
+def iter_archived_articles(html_archive, crawler=None):
+    """보관소의 HTML을 크롤러별 파서로 다시 추출하여 기사 dict를 하나씩 생성합니다 (네트워크 사용 안 함)."""
+    for url, page_crawler, html_text in html_archive.iter_pages(crawler=crawler):
+        parse_html = ARCHIVE_HTML_PARSERS.get(page_crawler, parse_google_news_article_html)
+        try:
+            yield parse_html(url, html_text)
+        except Exception as e:
+            print(f"Warning: Could not parse archived HTML for {url}: {e}")
+
+
+def execute_replay_from_archive(output_csv_path=REPLAY_PROCESSED_DATA_CSV, crawler=None):
+    """
+    KEYWORD_CONFIG, 정제 규칙, 국가 매핑 등을 바꾼 뒤 웹을 다시 크롤링하지 않고 결과를 확인할 때 사용합니다.
+    보관된 HTML -> 추출 -> 전처리/점수화 과정을 디스크 속도로 실행하고 결과를 output_csv_path에 저장합니다.
+    Supabase에는 저장하지 않습니다.
+    """
+    start_replay_time = time.time()
+    print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] === Replaying Archived HTML Through Preprocessing ===")
+    html_archive = HtmlArchive()
+    print(f"Archive contains {html_archive.count()} pages.")
+    num_pages = 0
+    num_relevant_articles = 0
+    try:
+        for num_batches, (crawled_batch_df, processed_batch_df) in enumerate(
+                iter_preprocessed_batches(iter_archived_articles(html_archive, crawler=crawler), batch_size=STREAM_BATCH_SIZE), start=1):
+            num_pages += len(crawled_batch_df)
+            num_relevant_articles += len(processed_batch_df)
+            append_checkpoint_csv(processed_batch_df, output_csv_path, num_batches == 1)
+    except Exception as e:
+        print(f"ERROR during archive replay: {e}")
+        return False
+    finally:
+        html_archive.close()
+    save_relevance_features()
+    print(f"Replay completed in {time.time() - start_replay_time:.2f} seconds: {num_pages} pages re-extracted, "
+          f"{num_relevant_articles} relevant articles written to '{output_csv_path}'.")
+    return True
+
+
 # --- 스크립트 직접 실행 시 ---
 if __name__ == "__main__":
+    if "--replay" in sys.argv[1:]:
+        # 보관된 HTML로 추출/전처리만 다시 실행 (네트워크, Supabase 사용 안 함)
+        sys.exit(0 if execute_replay_from_archive() else 1)
+
     # 이 스크립트가 직접 실행될 때 파이프라인 실행
     pipeline_run_succeeded = execute_full_news_data_pipeline()
     
@@ -49,6 +49,9 @@
         userAddedMarkers: [],
         currentNewsPage: 1,
         totalNewsItems: 0,
+        currentNewsItemCount: 0, // Items shown on the current page
+        newsPageCursors: [null], // API cursor for each visited page (index 0 = page 1, which needs no cursor)
+        nextNewsCursor: null, // next_cursor from the last API response (null = no more pages)
         currentSelectedNewsDateStr: '', // YYYY-MM-DD
         currentKeywordQuery: '',
         currentCountryFilterISO: null, // For filtering news by country ISO_A2 code
@@ -312,8 +315,11 @@
     /**
      * Fetches news data from the API based on current filters and page.
      */
-    async function fetchNewsItems(page = 1, limit = NEWS_ITEMS_PER_PAGE, dateStr = null, keywordStr = null, countryISO = null) {
+    async function fetchNewsItems(page = 1, limit = NEWS_ITEMS_PER_PAGE, dateStr = null, keywordStr = null, countryISO = null, cursor = null) {
         let url = `${NEWS_API_URL}?page=${page}&limit=${limit}`;
+        // Pages after the first continue from the previous page's cursor (keyset pagination, no offset scan).
+        // The total count is only requested with the first page and kept in state.
+        if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
         if (dateStr) url += `&date=${dateStr}`;
         if (keywordStr && keywordStr.trim()) url += `&keyword=${encodeURIComponent(keywordStr.trim())}`;
         if (countryISO) url += `&country_iso=${encodeURIComponent(countryISO)}`;
@@ -331,16 +337,25 @@
             NEWS_ITEMS_PER_PAGE,
             state.currentSelectedNewsDateStr,
             state.currentKeywordQuery,
-            state.currentCountryFilterISO
+            state.currentCountryFilterISO,
+            state.newsPageCursors[state.currentNewsPage - 1] || null
         );
 
         if (apiResponse) {
-            displayNewsItems(apiResponse.news || []);
-            state.totalNewsItems = apiResponse.total_count || 0;
+            const newsItems = apiResponse.news || [];
+            displayNewsItems(newsItems);
+            state.currentNewsItemCount = newsItems.length;
+            if (apiResponse.total_count !== null && apiResponse.total_count !== undefined) {
+                state.totalNewsItems = apiResponse.total_count;
+            }
+            state.nextNewsCursor = apiResponse.next_cursor || null;
+            if (state.nextNewsCursor) state.newsPageCursors[state.currentNewsPage] = state.nextNewsCursor;
         } else {
             // If apiResponse is null (fetchData handled error message), display empty state
             displayNewsItems([]);
+            state.currentNewsItemCount = 0;
             state.totalNewsItems = 0;
+            state.nextNewsCursor = null;
         }
         updateNewsPaginationControls();
     }
@@ -406,19 +421,20 @@
      */
     function updateNewsPaginationControls() {
         if (!DOM.newsStatusDisplay) return;
-        const startIndex = state.totalNewsItems > 0 ? (state.currentNewsPage - 1) * NEWS_ITEMS_PER_PAGE + 1 : 0;
-        const endIndex = Math.min(startIndex + NEWS_ITEMS_PER_PAGE - 1, state.totalNewsItems);
-        DOM.newsStatusDisplay.textContent = `${startIndex}-${endIndex} of ${state.totalNewsItems}`;
+        const startIndex = state.currentNewsItemCount > 0 ? (state.currentNewsPage - 1) * NEWS_ITEMS_PER_PAGE + 1 : 0;
+        const endIndex = state.currentNewsItemCount > 0 ? startIndex + state.currentNewsItemCount - 1 : 0;
+        // The total may be an estimate for large result sets; never show it below the items already reached
+        const totalItems = state.nextNewsCursor ? Math.max(state.totalNewsItems, endIndex + 1) : Math.max(state.totalNewsItems, endIndex);
+        DOM.newsStatusDisplay.textContent = `${startIndex}-${endIndex} of ${totalItems}`;
 
         if (DOM.prevNewsButton) DOM.prevNewsButton.disabled = (state.currentNewsPage <= 1);
-        const totalPages = Math.ceil(state.totalNewsItems / NEWS_ITEMS_PER_PAGE);
-        if (DOM.nextNewsButton) DOM.nextNewsButton.disabled = (state.currentNewsPage >= totalPages);
+        if (DOM.nextNewsButton) DOM.nextNewsButton.disabled = !state.nextNewsCursor;
     }
 
     function handlePrevNews() { if (state.currentNewsPage > 1) { state.currentNewsPage--; updateNewsFeed(); }}
     function handleNextNews() {
-        const totalPages = Math.ceil(state.totalNewsItems / NEWS_ITEMS_PER_PAGE);
-        if (state.currentNewsPage < totalPages) { state.currentNewsPage++; updateNewsFeed(); }
+        // Only move forward with the cursor returned for the current page (filters reset to page 1)
+        if (state.nextNewsCursor) { state.currentNewsPage++; updateNewsFeed(); }
     }
 
     function handleKeywordSearch() {
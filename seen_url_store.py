@@ -0,0 +1,124 @@
+import os
+import time
+import sqlite3
+import threading
+from url_canonicalizer import BloomFilter
+
+# --- 이미 처리한 URL 저장소 설정 ---
+# 매 실행마다 이미 news_articles에 저장된 기사를 다시 크롤링/전처리하지 않도록,
+# 처리 완료된 URL을 로컬 SQLite 파일에 기록하고 crawl_article_data 호출 전에 확인합니다.
+SEEN_URL_DB_PATH = "seen_urls.sqlite3"
+SEEN_URL_DEFAULT_RECHECK_SECONDS = None # None이면 한 번 처리한 URL은 다시 크롤링하지 않음 (예: 7 * 86400 = 7일 후 재확인)
+# SQLite 조회 앞단의 블룸 필터: 필터에 없는 URL은 DB 조회 없이 '확실히 새 URL'로 판정
+SEEN_URL_BLOOM_PATH = "seen_urls.bloom"
+SEEN_URL_BLOOM_CAPACITY = 1_000_000    # 예상 최대 URL 수 (약 1.2MB 메모리)
+SEEN_URL_BLOOM_FALSE_POSITIVE_RATE = 0.01
+
+
+class SeenUrlStore:
+    """처리 완료된 URL과 마지막 처리 시각, URL별 재확인 주기를 저장합니다.
+    URL은 url_canonicalizer.canonicalize_url로 정규화된 값이어야 합니다."""
+
+    def __init__(self, db_path=SEEN_URL_DB_PATH, bloom_path=SEEN_URL_BLOOM_PATH):
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(script_dir, db_path)
+        if bloom_path and not os.path.isabs(bloom_path):
+            bloom_path = os.path.join(script_dir, bloom_path)
+        self.db_path = db_path
+        self.bloom_path = bloom_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                url TEXT PRIMARY KEY,
+                first_seen REAL NOT NULL,
+                last_crawled REAL NOT NULL,
+                recheck_after_seconds REAL
+            )
+        """)
+        self._conn.commit()
+        self._bloom = self._load_or_rebuild_bloom()
+
+    def _load_or_rebuild_bloom(self):
+        """저장된 블룸 필터를 불러오고, 없거나 DB와 맞지 않으면 DB 내용으로 다시 만듭니다."""
+        bloom = BloomFilter.load(self.bloom_path) if self.bloom_path else None
+        stored_count = self.count()
+        if bloom is not None and bloom.num_added == stored_count: # 저장 시점의 URL 수와 같아야 최신 필터
+            return bloom
+        bloom = BloomFilter(max(SEEN_URL_BLOOM_CAPACITY, stored_count * 2), SEEN_URL_BLOOM_FALSE_POSITIVE_RATE)
+        with self._lock:
+            for (url,) in self._conn.execute("SELECT url FROM seen_urls"):
+                bloom.add(url)
+        if stored_count:
+            print(f"Rebuilt seen-URL bloom filter from {stored_count} stored URLs.")
+        return bloom
+
+    def is_due(self, url, now=None):
+        """URL을 (다시) 크롤링해야 하면 True. 처음 보는 URL이거나 재확인 주기가 지난 경우."""
+        return bool(self.filter_due([url], now=now))
+
+    def filter_due(self, urls, now=None):
+        """크롤링이 필요한 URL만 입력 순서대로 반환합니다 (이미 처리했고 재확인 시점 전인 URL은 제외)."""
+        now = time.time() if now is None else now
+        urls = [url for url in urls if url]
+        # 블룸 필터에 없는 URL은 확실히 처음 보는 URL이므로 DB를 조회할 필요가 없음
+        maybe_seen_urls = [url for url in urls if url in self._bloom]
+        known = {}
+        with self._lock:
+            # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+            for start in range(0, len(maybe_seen_urls), 500):
+                chunk = maybe_seen_urls[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for url, last_crawled, recheck_after in self._conn.execute(
+                        f"SELECT url, last_crawled, recheck_after_seconds FROM seen_urls WHERE url IN ({placeholders})", chunk):
+                    known[url] = (last_crawled, recheck_after)
+
+        due_urls = []
+        for url in urls:
+            if url not in known:
+                due_urls.append(url)
+                continue
+            last_crawled, recheck_after = known[url]
+            if recheck_after is not None and now - last_crawled >= recheck_after:
+                due_urls.append(url)
+        return due_urls
+
+    def mark_seen(self, urls, recheck_after_seconds=SEEN_URL_DEFAULT_RECHECK_SECONDS, now=None):
+        """URL들을 처리 완료로 기록합니다. recheck_after_seconds를 주면 그 시간이 지난 뒤 다시 크롤링 대상이 됩니다."""
+        now = time.time() if now is None else now
+        rows = [(url, now, now, recheck_after_seconds) for url in urls if url]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO seen_urls (url, first_seen, last_crawled, recheck_after_seconds) VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET last_crawled = excluded.last_crawled,
+                                               recheck_after_seconds = excluded.recheck_after_seconds
+            """, rows)
+            self._conn.commit()
+        self._bloom.update(row[0] for row in rows)
+        return len(rows)
+
+    def save_bloom(self):
+        """블룸 필터를 파일로 저장합니다 (다음 실행에서 DB 전체를 다시 읽지 않도록)."""
+        if self.bloom_path:
+            self._bloom.num_added = self.count() # 다음 로드 시 DB와 일치하는지 확인하는 기준값
+            self._bloom.save(self.bloom_path)
+
+    def forget(self, urls):
+        """URL들을 저장소에서 삭제합니다 (다음 실행에서 다시 크롤링됨).
+        블룸 필터에서는 지울 수 없지만, 필터 적중 시 DB를 확인하므로 결과는 정확합니다."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM seen_urls WHERE url = ?", [(url,) for url in urls])
+            self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen_urls").fetchone()[0]
+
+    def close(self):
+        self.save_bloom()
+        with self._lock:
+            self._conn.close()
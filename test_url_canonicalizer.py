@@ -0,0 +1,29 @@
+# test_url_canonicalizer.py
+# 중복 판정 키(canonicalize_url)가 같은 기사의 변형은 합치고, 다른 페이지는 구분하는지 확인합니다.
+from url_canonicalizer import canonicalize_url, dedupe_urls
+
+
+def test_tracking_and_amp_variants_share_key():
+    key = canonicalize_url("https://example.com/news/energy-prices")
+    assert canonicalize_url("http://Example.com/news/energy-prices/?utm_source=x&fbclid=1") == key
+    assert canonicalize_url("https://amp.example.com/news/energy-prices") == key
+    assert canonicalize_url("https://example.com/news/energy-prices/amp/") == key
+    assert canonicalize_url("https://example.com/news/energy-prices.amp.html") == key
+    assert canonicalize_url("https://example.com/amp/news/energy-prices") == key
+
+
+def test_interior_amp_segment_is_kept():
+    assert canonicalize_url("https://example.com/news/amp/energy-prices") == "https://example.com/news/amp/energy-prices"
+    assert canonicalize_url("https://example.com/news/amp/energy-prices") != canonicalize_url("https://example.com/news/energy-prices")
+
+
+def test_dedupe_keeps_first_original_url():
+    urls = [" http://example.com/a?utm_source=x ", "https://example.com/a", "https://example.com/news/amp/a"]
+    assert dedupe_urls(urls) == ["http://example.com/a?utm_source=x", "https://example.com/news/amp/a"]
+
+
+if __name__ == "__main__":
+    test_tracking_and_amp_variants_share_key()
+    test_interior_amp_segment_is_kept()
+    test_dedupe_keeps_first_original_url()
+    print("All URL canonicalizer checks passed.")
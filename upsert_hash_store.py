@@ -0,0 +1,95 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from url_canonicalizer import canonicalize_url # 행 키는 URL 정규형 (저장되는 URL은 원래 값)
+
+# --- 델타 upsert용 행 해시 저장소 ---
+# 마지막으로 DB에 저장한 각 행(url 정규형 기준)의 내용 해시를 로컬 SQLite에 기록해 두고,
+# 다음 저장 때 해시가 같은 행은 보내지 않습니다 (쓰기 I/O와 news_articles 인덱스 갱신 감소).
+# DB 쪽에서 행이 지워지거나 바뀐 경우를 대비해 오래된 해시는 믿지 않고 다시 보냅니다.
+UPSERT_HASH_DB_PATH = "upsert_hashes.sqlite3"
+UPSERT_HASH_MAX_AGE_SECONDS = 7 * 24 * 3600 # 이 기간이 지난 해시는 '변경됨'으로 보고 다시 저장
+CONTENT_HASH_FIELD = "content_hash"
+
+
+def compute_record_content_hash(record, exclude_fields=(CONTENT_HASH_FIELD,)):
+    """레코드 내용(키 순서와 무관)의 안정적인 해시. 같은 값이면 실행/프로세스가 달라도 같은 해시."""
+    payload = json.dumps(
+        {key: value for key, value in record.items() if key not in exclude_fields},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class UpsertHashStore:
+    """(테이블, url 정규형) -> 마지막으로 저장한 내용 해시. 여러 스레드에서 동시에 사용 가능."""
+
+    def __init__(self, db_path=UPSERT_HASH_DB_PATH, max_age_seconds=UPSERT_HASH_MAX_AGE_SECONDS):
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), db_path)
+        self.db_path = db_path
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS row_hashes (
+                table_name TEXT NOT NULL,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (table_name, url)
+            )
+        """)
+        self._conn.commit()
+
+    def _stored_hashes(self, table_name, urls):
+        """url -> (저장된 해시, 저장 시각)."""
+        stored = {}
+        with self._lock:
+            for start in range(0, len(urls), 500): # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+                chunk = urls[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for url, content_hash, stored_at in self._conn.execute(
+                        f"SELECT url, content_hash, stored_at FROM row_hashes WHERE table_name = ? AND url IN ({placeholders})",
+                        [table_name, *chunk]):
+                    stored[url] = (content_hash, stored_at)
+        return stored
+
+    def classify(self, table_name, records):
+        """
+        레코드(CONTENT_HASH_FIELD 포함)를 저장된 해시와 비교해 {'inserted': [...], 'changed': [...], 'unchanged': [...]}로 나눕니다.
+        저장 기록이 없는 url만 'inserted'이고, 해시가 다르거나 기록이 오래된(max_age_seconds) url은 다시 보내도록 'changed'로 분류됩니다.
+        """
+        url_keys = [canonicalize_url(record['url']) for record in records]
+        stored = self._stored_hashes(table_name, list(dict.fromkeys(url_keys)))
+        min_stored_at = time.time() - self.max_age_seconds
+        outcome = {'inserted': [], 'changed': [], 'unchanged': []}
+        for record, url_key in zip(records, url_keys):
+            stored_hash, stored_at = stored.get(url_key, (None, None))
+            if stored_hash is None:
+                outcome['inserted'].append(record)
+            elif stored_hash != record[CONTENT_HASH_FIELD] or stored_at < min_stored_at:
+                outcome['changed'].append(record)
+            else:
+                outcome['unchanged'].append(record)
+        return outcome
+
+    def mark_stored(self, table_name, records):
+        """DB 저장에 성공한 레코드의 해시를 기록합니다."""
+        now = time.time()
+        rows = [(table_name, canonicalize_url(record['url']), record[CONTENT_HASH_FIELD], now) for record in records]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO row_hashes (table_name, url, content_hash, stored_at) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
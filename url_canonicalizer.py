@@ -0,0 +1,145 @@
+import os
+import math
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# --- URL 정규화 설정 ---
+# 같은 기사가 추적 파라미터, AMP 버전, http/https, 끝 슬래시 차이로 다른 URL처럼 들어오는 것을 막기 위한 중복 판정 키.
+# 정규형은 중복 비교(seen URL 저장소, 블룸 필터, upsert 해시, 캐시 키)에만 쓰고, 다운로드와 DB 저장에는 원래 URL을 씁니다
+# (호스트에 따라 정규형 URL은 404, 리디렉션 또는 다른 내용을 돌려줄 수 있음).
+TRACKING_QUERY_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "ocid", "cmpid", "smid", "smtyp", "ref", "ref_src",
+    "amp", "outputtype", "ito", "at_medium", "at_campaign", "at_custom1", "at_custom2",
+    "at_custom3", "at_custom4", "ns_mchannel", "ns_source", "ns_campaign", "ns_linkname", "ns_fee",
+}
+TRACKING_QUERY_PREFIXES = ("utm_", "at_", "ns_", "pk_", "mtm_")
+AMP_PATH_SUFFIXES = ("/amp", "/amp.html", ".amp", ".amp.html")
+AMP_PATH_PREFIX = "/amp/"
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def canonicalize_url(url):
+    """
+    URL을 중복 비교용 정규형으로 변환합니다.
+    - 스킴은 https로 통일, 호스트 소문자, 기본 포트/fragment 제거
+    - AMP 변형(amp. 하위 도메인, 경로 끝 /amp 또는 맨 앞 /amp/ 세그먼트, ?amp=1 등) 제거
+    - 추적용 쿼리 파라미터(utm_*, fbclid 등) 제거, 나머지는 정렬
+    - 루트가 아닌 경로의 끝 슬래시 제거
+    정규화할 수 없는 값은 공백만 제거하여 그대로 반환합니다.
+    """
+    if url is None:
+        return ""
+    url = str(url).strip()
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.netloc:
+        return url
+
+    host = (parts.hostname or "").lower().rstrip(".")
+    if host.startswith("amp."):
+        host = host[len("amp."):]
+    port = parts.port if parts.port is not None else None
+    netloc = host if port is None or str(port) == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    # AMP 표시는 경로 끝(/amp, .amp.html 등)이나 맨 앞 /amp/ 세그먼트만 제거 (/news/amp/energy 같은 중간 세그먼트는 다른 페이지일 수 있음)
+    lowered_path = path.lower()
+    for suffix in AMP_PATH_SUFFIXES:
+        if lowered_path.endswith(suffix) and len(path) > len(suffix):
+            path = path[:-len(suffix)] or "/"
+            break
+    if path.lower().startswith(AMP_PATH_PREFIX):
+        path = path[len(AMP_PATH_PREFIX) - 1:]
+
+    query_pairs = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_QUERY_PARAMS and not key.lower().startswith(TRACKING_QUERY_PREFIXES)
+    ]
+    query = urlencode(sorted(query_pairs), doseq=True)
+
+    return urlunsplit(("https", netloc, path, query, ""))
+
+
+def dedupe_urls(urls):
+    """정규형 기준으로 중복을 제거한 원래 URL 목록(공백 제거)을 처음 나온 순서대로 반환합니다."""
+    unique_urls = []
+    seen = set()
+    for url in urls:
+        canonical = canonicalize_url(url)
+        if canonical and canonical not in seen:
+            seen.add(canonical)
+            unique_urls.append(str(url).strip())
+    return unique_urls
+
+
+# --- 블룸 필터 ---
+class BloomFilter:
+    """
+    메모리 크기가 고정된 확률적 집합. 'definitely new' 판정(False)은 항상 정확하고,
+    True는 오탐 확률(false_positive_rate) 이하로 틀릴 수 있습니다.
+    비트 배열은 파일로 저장/로드할 수 있습니다.
+    """
+
+    def __init__(self, capacity=1_000_000, false_positive_rate=0.01):
+        self.capacity = int(capacity)
+        self.false_positive_rate = float(false_positive_rate)
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(self.false_positive_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.num_added = 0
+
+    def _bit_positions(self, item):
+        # 이중 해싱 (Kirsch-Mitzenmacher): h1 + i*h2
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        with self._lock:
+            for position in self._bit_positions(item):
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.num_added += 1
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._bit_positions(item))
+
+    def save(self, file_path):
+        """비트 배열과 설정을 파일로 저장합니다 (임시 파일에 쓴 뒤 교체)."""
+        header = f"{self.capacity} {self.false_positive_rate} {self.num_added}\n".encode("ascii")
+        temp_path = f"{file_path}.tmp"
+        with self._lock, open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(self._bits)
+        os.replace(temp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path):
+        """save()로 저장한 파일에서 필터를 복원합니다. 파일이 없거나 손상되었으면 None."""
+        try:
+            with open(file_path, "rb") as f:
+                capacity, false_positive_rate, num_added = f.readline().decode("ascii").split()
+                bloom = cls(int(capacity), float(false_positive_rate))
+                bits = f.read()
+        except (OSError, ValueError):
+            return None
+        if len(bits) != len(bloom._bits):
+            return None
+        bloom._bits = bytearray(bits)
+        bloom.num_added = int(num_added)
+        return bloom